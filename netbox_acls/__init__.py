@@ -19,6 +19,21 @@ class NetBoxACLsConfig(PluginConfig):
     base_url = "access-lists"
     min_version = "4.1.0"
     max_version = "4.1.99"
+    default_settings = {
+        "graphql_max_results": 1000,
+        "graphql_max_cost": 50000,
+    }
+
+    def ready(self):
+        super().ready()
+
+        from utilities.counters import connect_counters
+
+        from . import signals  # noqa: F401
+        from .models import AccessList
+
+        # Maintain the cached rule counts of each Access List
+        connect_counters(AccessList)
 
 
 config = NetBoxACLsConfig
@@ -21,6 +21,20 @@ __all__ = [
 ]
 
 
+def _get_pk(data):
+    """
+    Return the primary key a related object is referenced by, or None when it is looked up by other attributes.
+    """
+    if isinstance(data, dict):
+        if set(data) != {"id"}:
+            return None
+        data = data["id"]
+    try:
+        return int(data)
+    except (TypeError, ValueError):
+        return None
+
+
 class NestedAccessListSerializer(WritableNestedSerializer):
     """
     Defines the nested serializer for the django AccessList model & associates it to a view.
@@ -38,6 +52,15 @@ class NestedAccessListSerializer(WritableNestedSerializer):
         model = AccessList
         fields = ("id", "url", "display", "name")
 
+    def to_internal_value(self, data):
+        """
+        Use the Access Lists preloaded in the context by list serializers, if any, instead of querying each of them.
+        """
+        access_list = self.context.get("access_lists", {}).get(_get_pk(data))
+        if access_list is not None:
+            return access_list
+        return super().to_internal_value(data)
+
 
 class NestedACLInterfaceAssignmentSerializer(WritableNestedSerializer):
     """
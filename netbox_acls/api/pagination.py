@@ -0,0 +1,112 @@
+"""
+Pagination of the ACL rule API endpoints.
+"""
+
+import base64
+import binascii
+
+from django.db import models
+from django.db.models import F, Func, Value
+from netbox.api.pagination import OptionalLimitOffsetPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+__all__ = [
+    "ACLRuleCursorPagination",
+]
+
+
+class _Row(Func):
+    """
+    A row constructor, compared to another one column by column, in order.
+    """
+
+    function = "ROW"
+    output_field = models.Field()
+
+
+class ACLRuleCursorPagination(OptionalLimitOffsetPagination):
+    """
+    Paginates ACL rules with a limit and an offset, or, when the cursor query parameter is given
+    (empty for the first page), with a cursor on (access_list_id, index). Cursor pages are read
+    with a seek on the unique index of these columns, however deep into the rules they are.
+    Cursor pages have no count and only link to the next page.
+    """
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        super().__init__()
+        self.cursor_mode = False
+        self.next_position = None
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode("{}:{}".format(*position).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        """
+        Return the (access_list_id, index) position a cursor points after, or None for the first page.
+        """
+        if not cursor:
+            return None
+        try:
+            access_list_id, index = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+            return int(access_list_id), int(index)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.cursor_mode = True
+        self.request = request
+        self.limit = self.get_limit(request)
+        position = self.decode_cursor(request.query_params[self.cursor_query_param])
+
+        queryset = queryset.order_by("access_list_id", "index")
+        if position is not None:
+            # A row comparison, rather than an equivalent OR of comparisons, lets the database seek the unique index.
+            queryset = queryset.alias(position=_Row(F("access_list_id"), F("index"))).filter(
+                position__gt=_Row(Value(position[0]), Value(position[1])),
+            )
+        if not self.limit:
+            return list(queryset)
+
+        page = list(queryset[: self.limit + 1])
+        if len(page) > self.limit:
+            page = page[: self.limit]
+            self.next_position = (page[-1].access_list_id, page[-1].index)
+        return page
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "results": data,
+            },
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *super().get_schema_operation_parameters(view),
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Page through the results with a cursor, starting with an empty value.",
+                "schema": {"type": "string"},
+            },
+        ]
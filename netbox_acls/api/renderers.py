@@ -0,0 +1,23 @@
+"""
+Renderers negotiating the format of the export endpoints.
+
+Exports are streamed by the views themselves; these renderers only render the errors of the
+export endpoints, as JSON.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+__all__ = [
+    "CSVExportRenderer",
+    "NDJSONExportRenderer",
+]
+
+
+class NDJSONExportRenderer(JSONRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class CSVExportRenderer(JSONRenderer):
+    media_type = "text/csv"
+    format = "csv"
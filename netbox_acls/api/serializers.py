@@ -3,6 +3,11 @@ Serializers control the translation of client data to and from Python objects,
 while Django itself handles the database abstraction.
 """
 
+import io
+import zipfile
+from functools import lru_cache
+
+from dcim.models import Interface
 from django.contrib.contenttypes.models import ContentType
 from drf_spectacular.utils import extend_schema_field
 from ipam.api.serializers import PrefixSerializer
@@ -10,21 +15,35 @@ from netbox.api.fields import ContentTypeField
 from netbox.api.serializers import NetBoxModelSerializer
 from rest_framework import serializers
 from utilities.api import get_serializer_for_model
+from virtualization.models import VMInterface
 
+from ..choices import ACLProtocolChoices, ACLRenderPlatformChoices, ACLRuleActionChoices, ACLRuleFindingChoices, ACLTypeChoices
 from ..constants import ACL_HOST_ASSIGNMENT_MODELS, ACL_INTERFACE_ASSIGNMENT_MODELS
+from ..engine import FlowBatch
+from ..engine.vectorized import FLOW_FIELDS
 from ..models import (
     AccessList,
     ACLExtendedRule,
     ACLInterfaceAssignment,
     ACLStandardRule,
 )
-from .nested_serializers import NestedAccessListSerializer
+from .nested_serializers import NestedAccessListSerializer, _get_pk
 
 __all__ = [
     "AccessListSerializer",
+    "ACLBatchVerdictSerializer",
+    "ACLFlowBatchSerializer",
+    "ACLFlowSerializer",
+    "ACLInterfaceAssignmentListSerializer",
     "ACLInterfaceAssignmentSerializer",
+    "ACLRenderSerializer",
+    "ACLRuleFindingSerializer",
+    "ACLRuleSetEntrySerializer",
+    "ACLRuleSetResultSerializer",
+    "ACLRuleSetSerializer",
     "ACLStandardRuleSerializer",
     "ACLExtendedRuleSerializer",
+    "ACLVerdictSerializer",
 ]
 
 # Sets a standard error message for ACL rules with an action of remark, but no remark set.
@@ -35,6 +54,29 @@ error_message_action_remark_source_prefix_set = "Action is set to remark, Source
 error_message_remark_without_action_remark = "CANNOT set remark unless action is set to remark."
 # Sets a standard error message for ACL rules no associated to an ACL of the same type.
 error_message_acl_type = "Provided parent Access List is not of right type."
+# Sets a standard error message for interfaces already assigned the Access List in the direction.
+error_message_duplicate_assignment = "An ACL with this name is already associated to this interface & direction."
+# Sets a standard error message for interfaces already assigned another Access List in the direction.
+error_message_interface_already_assigned = "Interfaces can only have 1 Access List assigned in each direction."
+
+
+@lru_cache(maxsize=None)
+def _get_nested_serializer(model):
+    """
+    Return the serializer of a model assigned objects may belong to, looked up once per model.
+    """
+    return get_serializer_for_model(model)
+
+
+def _serialize_assigned_object(obj, context):
+    """
+    Serialize the object an AccessList or ACLInterfaceAssignment is assigned to. The viewsets
+    prefetch assigned objects, grouped by content type, so that this does not query them one by one.
+    """
+    if obj.assigned_object is None:
+        return None
+    serializer = _get_nested_serializer(obj.assigned_object._meta.model)
+    return serializer(obj.assigned_object, nested=True, context={"request": context["request"]}).data
 
 
 class AccessListSerializer(NetBoxModelSerializer):
@@ -73,16 +115,14 @@ class AccessListSerializer(NetBoxModelSerializer):
             "created",
             "last_updated",
             "rule_count",
+            "standard_rule_count",
+            "extended_rule_count",
         )
         brief_fields = ("id", "url", "name", "display")
 
     @extend_schema_field(serializers.DictField())
     def get_assigned_object(self, obj):
-        serializer = get_serializer_for_model(
-            obj.assigned_object,
-        )
-        context = {"request": self.context["request"]}
-        return serializer(obj.assigned_object, nested=True, context=context).data
+        return _serialize_assigned_object(obj, self.context)
 
     def validate(self, data):
         """
@@ -104,6 +144,82 @@ class AccessListSerializer(NetBoxModelSerializer):
         return super().validate(data)
 
 
+class _InterfaceContentTypeField(ContentTypeField):
+    """
+    Looks up the content type of an interface in the ContentType cache instead of querying it for every object.
+    """
+
+    def to_internal_value(self, data):
+        try:
+            app_label, model = data.split(".")
+            content_type = ContentType.objects.get_by_natural_key(app_label, model)
+        except ContentType.DoesNotExist:
+            self.fail("does_not_exist", content_type=data)
+        except (AttributeError, TypeError, ValueError):
+            self.fail("invalid")
+        if content_type.model_class() not in (Interface, VMInterface):
+            self.fail("does_not_exist", content_type=data)
+        return content_type
+
+
+class _InterfaceAssignments:
+    """
+    The hosts and Access List assignments of a set of interfaces, each loaded with a single query.
+    Assignments validated along the way are added, so that a batch is also checked against itself.
+    """
+
+    host_fields = (
+        (Interface, "device"),
+        (VMInterface, "virtual_machine"),
+    )
+
+    def __init__(self, interface_ids, exclude=None):
+        self.hosts = {}
+        for model, host_field in self.host_fields:
+            content_type = ContentType.objects.get_for_model(model)
+            host_type = ContentType.objects.get_for_model(model._meta.get_field(host_field).related_model)
+            for pk, host_id in model.objects.filter(pk__in=interface_ids).values_list("pk", f"{host_field}_id"):
+                self.hosts[content_type.pk, pk] = (host_type.pk, host_id)
+
+        self.access_lists = {}
+        assignments = ACLInterfaceAssignment.objects.filter(assigned_object_id__in=interface_ids)
+        if exclude is not None:
+            assignments = assignments.exclude(pk=exclude.pk)
+        for values in assignments.values_list("assigned_object_type_id", "assigned_object_id", "direction", "access_list_id"):
+            self.add(*values)
+
+    def add(self, assigned_object_type_id, assigned_object_id, direction, access_list_id):
+        self.access_lists.setdefault((assigned_object_type_id, assigned_object_id, direction), set()).add(access_list_id)
+
+    def get_host(self, assigned_object_type_id, assigned_object_id):
+        """
+        Return the (content type ID, ID) of the host of an interface, or None if the interface does not exist.
+        """
+        return self.hosts.get((assigned_object_type_id, assigned_object_id))
+
+    def get_access_lists(self, assigned_object_type_id, assigned_object_id, direction):
+        """
+        Return the IDs of the Access Lists assigned to an interface in a direction.
+        """
+        return self.access_lists.get((assigned_object_type_id, assigned_object_id, direction), set())
+
+
+class ACLInterfaceAssignmentListSerializer(serializers.ListSerializer):
+    """
+    Defines the serializer for bulk creates of ACLInterfaceAssignments, preloading the Access Lists,
+    interface hosts and existing assignments the batch refers to with a few queries.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            items = [item for item in data if isinstance(item, dict)]
+            access_list_ids = {_get_pk(item.get("access_list")) for item in items}
+            interface_ids = {_get_pk(item.get("assigned_object_id")) for item in items}
+            self.context["access_lists"] = AccessList.objects.in_bulk(access_list_ids - {None})
+            self.context["interface_assignments"] = _InterfaceAssignments(interface_ids - {None})
+        return super().to_internal_value(data)
+
+
 class ACLInterfaceAssignmentSerializer(NetBoxModelSerializer):
     """
     Defines the serializer for the django ACLInterfaceAssignment model & associates it to a view.
@@ -113,7 +229,7 @@ class ACLInterfaceAssignmentSerializer(NetBoxModelSerializer):
         view_name="plugins-api:netbox_acls-api:aclinterfaceassignment-detail",
     )
     access_list = NestedAccessListSerializer()
-    assigned_object_type = ContentTypeField(
+    assigned_object_type = _InterfaceContentTypeField(
         queryset=ContentType.objects.filter(ACL_INTERFACE_ASSIGNMENT_MODELS),
     )
     assigned_object = serializers.SerializerMethodField(read_only=True)
@@ -139,39 +255,53 @@ class ACLInterfaceAssignmentSerializer(NetBoxModelSerializer):
             "last_updated",
         )
         brief_fields = ("id", "url", "access_list")
+        list_serializer_class = ACLInterfaceAssignmentListSerializer
 
     @extend_schema_field(serializers.DictField())
     def get_assigned_object(self, obj):
-        serializer = get_serializer_for_model(
-            obj.assigned_object
-        )
-        context = {"request": self.context["request"]}
-        return serializer(obj.assigned_object, nested=True, context=context).data
+        return _serialize_assigned_object(obj, self.context)
 
     def validate(self, data):
         """
-        Validate the AccessList django model's inputs before allowing it to update the instance.
+        Validate the ACLInterfaceAssignment django model's inputs before allowing it to update the instance.
           - Check that the GFK object is valid.
           - Check that the associated interface's parent host has the selected ACL defined.
+          - Check for duplicate entry. (Because of GFK)
+          - Check that the interface does not have an existing ACL applied in the direction already.
         """
         error_message = {}
-        acl_host = data["access_list"].assigned_object
-
-        if data["assigned_object_type"].model == "interface":
-            interface_host = data["assigned_object_type"].get_object_for_this_type(id=data["assigned_object_id"]).device
-        elif data["assigned_object_type"].model == "vminterface":
-            interface_host = data["assigned_object_type"].get_object_for_this_type(id=data["assigned_object_id"]).virtual_machine
-        else:
-            interface_host = None
+        access_list = data.get("access_list", getattr(self.instance, "access_list", None))
+        direction = data.get("direction", getattr(self.instance, "direction", None))
+        assigned_object_type = data.get("assigned_object_type", getattr(self.instance, "assigned_object_type", None))
+        assigned_object_id = data.get("assigned_object_id", getattr(self.instance, "assigned_object_id", None))
+
+        # Bulk creates share the objects preloaded by ACLInterfaceAssignmentListSerializer.
+        assignments = self.context.get("interface_assignments")
+        if assignments is None:
+            assignments = _InterfaceAssignments({assigned_object_id}, exclude=self.instance)
+
+        interface_host = assignments.get_host(assigned_object_type.pk, assigned_object_id)
+        if interface_host is None:
+            error_message["assigned_object_id"] = [f"Assigned object {assigned_object_id} does not exist."]
         # Check that the associated interface's parent host has the selected ACL defined.
-        if acl_host != interface_host:
+        elif (access_list.assigned_object_type_id, access_list.assigned_object_id) != interface_host:
             error_acl_not_assigned_to_host = "Access List not present on the selected interface's host."
             error_message["access_list"] = [error_acl_not_assigned_to_host]
             error_message["assigned_object_id"] = [error_acl_not_assigned_to_host]
 
+        # Check for duplicate entry and existing ACL in the direction.
+        access_list_ids = assignments.get_access_lists(assigned_object_type.pk, assigned_object_id, direction)
+        if access_list.pk in access_list_ids:
+            error_message["access_list"] = [error_message_duplicate_assignment]
+            error_message["direction"] = [error_message_duplicate_assignment]
+        elif access_list_ids:
+            error_message["direction"] = [error_message_interface_already_assigned]
+            error_message["assigned_object_id"] = [error_message_interface_already_assigned]
+
         if error_message:
             raise serializers.ValidationError(error_message)
 
+        assignments.add(assigned_object_type.pk, assigned_object_id, direction, access_list.pk)
         return super().validate(data)
 
 
@@ -288,6 +418,7 @@ class ACLExtendedRuleSerializer(NetBoxModelSerializer):
             "remark",
         )
         brief_fields = ("id", "url", "display")
+
     def validate(self, data):
         """
         Validate the ACLExtendedRule django model's inputs before allowing it to update the instance:
@@ -337,3 +468,262 @@ class ACLExtendedRuleSerializer(NetBoxModelSerializer):
             raise serializers.ValidationError(error_message)
 
         return super().validate(data)
+
+
+class ACLFlowSerializer(serializers.Serializer):
+    """
+    Defines the serializer for the packet to evaluate against an Access List.
+    """
+
+    source = serializers.IPAddressField()
+    destination = serializers.IPAddressField(
+        required=False,
+        allow_null=True,
+        default=None,
+    )
+    protocol = serializers.ChoiceField(
+        choices=ACLProtocolChoices,
+        required=False,
+        allow_blank=True,
+        default="",
+    )
+    source_port = serializers.IntegerField(
+        min_value=0,
+        max_value=65535,
+        required=False,
+        allow_null=True,
+        default=None,
+    )
+    destination_port = serializers.IntegerField(
+        min_value=0,
+        max_value=65535,
+        required=False,
+        allow_null=True,
+        default=None,
+    )
+
+    def validate(self, data):
+        """
+        Validate the packet's inputs:
+          - Check that the source and destination addresses are of the same IP version.
+        """
+        destination = data.get("destination")
+        if destination and (":" in destination) != (":" in data["source"]):
+            raise serializers.ValidationError(
+                {"destination": ["Source and destination addresses must be of the same IP version."]},
+            )
+
+        return super().validate(data)
+
+
+class ACLVerdictSerializer(serializers.Serializer):
+    """
+    Defines the serializer for the result of evaluating a packet against an Access List.
+    """
+
+    action = serializers.CharField(read_only=True)
+    default = serializers.BooleanField(read_only=True)
+    rule_id = serializers.IntegerField(read_only=True, allow_null=True)
+    index = serializers.IntegerField(read_only=True, allow_null=True)
+
+
+class ACLFlowBatchSerializer(serializers.Serializer):
+    """
+    Defines the serializer for a batch of packets to evaluate against an Access List.
+    The flows are given as a list of records, as CSV text, or as an uploaded CSV or NumPy (.npz) file.
+    """
+
+    flows = serializers.ListField(
+        child=serializers.ListField(min_length=1, max_length=5, allow_empty=False),
+        required=False,
+        help_text="Records of [source, destination, protocol, source_port, destination_port].",
+    )
+    csv = serializers.CharField(
+        required=False,
+        trim_whitespace=False,
+        help_text="CSV with a header naming the source, destination, protocol, source_port and destination_port columns.",
+    )
+    file = serializers.FileField(
+        required=False,
+        help_text="A CSV file, or a .npz file of IPv4 source, destination, protocol, source_port and destination_port arrays.",
+    )
+    verdicts = serializers.BooleanField(
+        default=False,
+        help_text="Include the index of the matching rule of every flow in the response.",
+    )
+
+    def validate(self, data):
+        """
+        Validate the batch's inputs:
+          - Check that exactly one source of flows is provided.
+          - Check that the flows can be parsed.
+        """
+        sources = [name for name in ("flows", "csv", "file") if data.get(name) is not None]
+        if len(sources) != 1:
+            raise serializers.ValidationError("Provide the flows as exactly one of flows, csv or file.")
+
+        try:
+            data["flow_batch"] = self._load_flow_batch(data)
+        except (KeyError, OSError, ValueError, zipfile.BadZipFile) as exc:
+            raise serializers.ValidationError({sources[0]: [str(exc)]})
+
+        return super().validate(data)
+
+    @staticmethod
+    def _load_flow_batch(data):
+        if data.get("flows") is not None:
+            return FlowBatch.from_records(tuple(flow) + (None,) * (5 - len(flow)) for flow in data["flows"])
+        if data.get("csv") is not None:
+            return FlowBatch.from_csv(io.StringIO(data["csv"]))
+        if data["file"].name.endswith(".npz"):
+            import numpy as np
+
+            with np.load(data["file"], allow_pickle=False) as arrays:
+                unknown = set(arrays.files).difference(FLOW_FIELDS)
+                if unknown or "source" not in arrays.files:
+                    raise ValueError(f"The .npz file must hold a source array, and only arrays named {', '.join(FLOW_FIELDS)}.")
+                return FlowBatch.from_arrays(**{name: arrays[name] for name in arrays.files})
+        return FlowBatch.from_csv(io.TextIOWrapper(data["file"], encoding="utf-8"))
+
+
+class ACLBatchVerdictSerializer(serializers.Serializer):
+    """
+    Defines the serializer for the result of evaluating a batch of packets against an Access List.
+    """
+
+    flows = serializers.IntegerField(read_only=True)
+    default = serializers.IntegerField(read_only=True)
+    actions = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+    rules = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+    verdicts = serializers.ListField(child=serializers.IntegerField(allow_null=True), read_only=True, required=False)
+
+
+class ACLRuleFindingSerializer(serializers.Serializer):
+    """
+    Defines the serializer for a rule of an Access List which never takes effect.
+    """
+
+    rule_id = serializers.IntegerField(source="rule.pk", read_only=True)
+    index = serializers.IntegerField(source="rule.index", read_only=True)
+    kind = serializers.ChoiceField(choices=ACLRuleFindingChoices, read_only=True)
+    related_rule_id = serializers.IntegerField(source="related_rule.pk", read_only=True, allow_null=True, default=None)
+    related_index = serializers.IntegerField(source="related_rule.index", read_only=True, allow_null=True, default=None)
+
+
+class ACLRenderSerializer(serializers.Serializer):
+    """
+    Defines the serializer for the configuration of an Access List rendered for a platform.
+    """
+
+    platform = serializers.ChoiceField(choices=ACLRenderPlatformChoices)
+    config = serializers.CharField(read_only=True)
+
+
+class ACLRuleSetEntrySerializer(serializers.Serializer):
+    """
+    Defines the serializer for one rule of the complete rule set of an Access List.
+    Prefixes are given by ID, and resolved for the whole rule set at once by ACLRuleSetSerializer.
+    """
+
+    index = serializers.IntegerField(min_value=0)
+    action = serializers.ChoiceField(choices=ACLRuleActionChoices)
+    remark = serializers.CharField(max_length=500, required=False, allow_blank=True, default="")
+    description = serializers.CharField(max_length=500, required=False, allow_blank=True, default="")
+    source_prefix = serializers.IntegerField(required=False, allow_null=True, default=None)
+    source_ports = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=65535),
+        required=False,
+        allow_null=True,
+        default=None,
+    )
+    destination_prefix = serializers.IntegerField(required=False, allow_null=True, default=None)
+    destination_ports = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=65535),
+        required=False,
+        allow_null=True,
+        default=None,
+    )
+    protocol = serializers.ChoiceField(choices=ACLProtocolChoices, required=False, allow_blank=True, default="")
+
+    def validate(self, data):
+        """
+        Validate a rule as ACLExtendedRuleSerializer does:
+          - Check if action set to remark, but no remark set.
+          - Check if action set to remark, but any other field set.
+          - Check if remark set, but action not set to remark.
+        """
+        error_message = {}
+
+        if data["action"] == ACLRuleActionChoices.ACTION_REMARK:
+            if not data["remark"]:
+                error_message["remark"] = [error_message_no_remark]
+            for field in ("source_prefix", "source_ports", "destination_prefix", "destination_ports", "protocol"):
+                if data[field]:
+                    error_message[field] = [f"Action is set to remark, {field.replace('_', ' ').title()} CANNOT be set."]
+        elif data["remark"]:
+            error_message["remark"] = [error_message_remark_without_action_remark]
+
+        if error_message:
+            raise serializers.ValidationError(error_message)
+
+        # Store empty port lists as NULL, as the rule forms do
+        data["source_ports"] = data["source_ports"] or None
+        data["destination_ports"] = data["destination_ports"] or None
+        return data
+
+
+class ACLRuleSetSerializer(serializers.ListSerializer):
+    """
+    Defines the serializer for the complete, ordered rule set of an Access List, given in the
+    context along with the queryset of the prefixes the rules may refer to.
+    """
+
+    child = ACLRuleSetEntrySerializer()
+
+    def to_internal_value(self, data):
+        """
+        Validate each rule, then the rule set as a whole, reporting errors per rule:
+          - Check that indexes are unique.
+          - Check that standard rules only set a source prefix.
+          - Check that every prefix exists, with a single query.
+        """
+        data = super().to_internal_value(data)
+        access_list = self.context["access_list"]
+        prefix_ids = {rule[field] for rule in data for field in ("source_prefix", "destination_prefix") if rule[field]}
+        prefixes = self.context["prefixes"].filter(pk__in=prefix_ids).values_list("pk", flat=True)
+        missing_prefix_ids = prefix_ids.difference(prefixes)
+        standard_only_fields = ("destination_prefix", "source_ports", "destination_ports", "protocol")
+
+        errors = []
+        indexes = set()
+        for rule in data:
+            error_message = {}
+            if rule["index"] in indexes:
+                error_message["index"] = [f"Index {rule['index']} is used by several rules."]
+            indexes.add(rule["index"])
+            if access_list.type == ACLTypeChoices.TYPE_STANDARD:
+                for field in standard_only_fields:
+                    if rule[field]:
+                        error_message[field] = [f"Rules of a standard Access List CANNOT set {field.replace('_', ' ').title()}."]
+            for field in ("source_prefix", "destination_prefix"):
+                if rule[field] in missing_prefix_ids:
+                    error_message[field] = [f"Prefix {rule[field]} does not exist."]
+            errors.append(error_message)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        if access_list.type == ACLTypeChoices.TYPE_STANDARD:
+            data = [{field: value for field, value in rule.items() if field not in standard_only_fields} for rule in data]
+        return data
+
+
+class ACLRuleSetResultSerializer(serializers.Serializer):
+    """
+    Defines the serializer for the outcome of replacing the rules of an Access List.
+    """
+
+    created = serializers.IntegerField(read_only=True)
+    updated = serializers.IntegerField(read_only=True)
+    deleted = serializers.IntegerField(read_only=True)
+    unchanged = serializers.IntegerField(read_only=True)
@@ -2,6 +2,7 @@
 Creates API endpoint URLs for the plugin.
 """
 
+from django.urls import path
 from netbox.api.routers import NetBoxRouter
 
 from . import views
@@ -14,4 +15,6 @@ router.register("interface-assignments", views.ACLInterfaceAssignmentViewSet)
 router.register("standard-acl-rules", views.ACLStandardRuleViewSet)
 router.register("extended-acl-rules", views.ACLExtendedRuleViewSet)
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path("hosts/<str:host_type>/<int:pk>/bundle/", views.HostBundleView.as_view(), name="host-bundle"),
+]
@@ -4,15 +4,51 @@ A view set is a single class that can handle the view, add, change,
 and delete operations which each require dedicated views under the UI.
 """
 
-from django.db.models import Count
+import hashlib
+
+from dcim.models import Device, Interface, VirtualChassis
+from django.contrib.contenttypes.prefetch import GenericPrefetch
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from ipam.models import Prefix
+from netbox.api.authentication import IsAuthenticatedOrLoginNotRequired
+from netbox.api.exceptions import ServiceUnavailable
 from netbox.api.viewsets import NetBoxModelViewSet
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from virtualization.models import VirtualMachine, VMInterface
 
 from .. import filtersets, models
+from ..bundles import HOST_INTERFACES, get_bundle_version, get_host_bundles, serialize_bundle
+from ..cache import get_or_set_host
+from ..engine import Flow, VectorizedAccessList, get_access_list_findings, get_compiled_access_list
+from ..exports import EXPORT_FORMATS, iter_export
+from ..renderers import render_access_list
+from .pagination import ACLRuleCursorPagination
+from .renderers import CSVExportRenderer, NDJSONExportRenderer
 from .serializers import (
     AccessListSerializer,
+    ACLBatchVerdictSerializer,
     ACLExtendedRuleSerializer,
+    ACLFlowBatchSerializer,
+    ACLFlowSerializer,
     ACLInterfaceAssignmentSerializer,
+    ACLRenderSerializer,
+    ACLRuleFindingSerializer,
+    ACLRuleSetEntrySerializer,
+    ACLRuleSetResultSerializer,
+    ACLRuleSetSerializer,
     ACLStandardRuleSerializer,
+    ACLVerdictSerializer,
 )
 
 __all__ = [
@@ -20,39 +56,283 @@ __all__ = [
     "ACLStandardRuleViewSet",
     "ACLInterfaceAssignmentViewSet",
     "ACLExtendedRuleViewSet",
+    "HostBundleView",
 ]
 
 
-class AccessListViewSet(NetBoxModelViewSet):
+class ExportMixin:
     """
-    Defines the view set for the django AccessList model & associates it to a view.
+    Adds an export endpoint to a view set, streaming every object matching the filters as NDJSON
+    (by default) or CSV, selected with the format query parameter or the Accept header.
+    """
+
+    @extend_schema(
+        responses={(200, media_type): str for media_type in EXPORT_FORMATS.values()},
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        renderer_classes=[NDJSONExportRenderer, CSVExportRenderer],
+    )
+    def export(self, request):
+        export_format = request.accepted_renderer.format
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            iter_export(queryset, export_format),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{queryset.model._meta.model_name}.{export_format}"'
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Adds an ETag to the list and detail responses of a view set, and a Last-Modified header to the
+    detail responses, and answers with 304 Not Modified, without serializing anything, when the
+    client's copy is still current.
+
+    Both are derived from the number of objects listed and the latest last_updated timestamp of the
+    objects and of the objects related through last_modified_related, computed in a single aggregate
+    query. Access Lists are bumped whenever one of their rules or prefixes changes. Deleting an object
+    does not change the timestamp of the others, so lists are validated by their ETag only.
     """
 
-    queryset = (
-        models.AccessList.objects.prefetch_related("tags")
-        .annotate(
-            rule_count=Count("aclextendedrules") + Count("aclstandardrules"),
+    last_modified_related = ()
+
+    def get_validators(self, request, queryset):
+        """
+        Return the ETag and the Last-Modified timestamp of the response listing the objects of a QuerySet.
+        """
+        fields = ("last_updated", *(f"{related}__last_updated" for related in self.last_modified_related))
+        aggregates = queryset.order_by().aggregate(
+            count=Count("pk"),
+            **{f"last_updated_{position}": Max(field) for position, field in enumerate(fields)},
+        )
+        count = aggregates.pop("count")
+        last_modified = max((value for value in aggregates.values() if value is not None), default=None)
+
+        # The representation also depends on the query parameters, the media type and the user's permissions
+        key = ":".join(
+            (
+                request.get_full_path(),
+                request.accepted_media_type or "",
+                str(request.user.pk),
+                str(count),
+                last_modified.isoformat() if last_modified else "",
+            ),
         )
-        .prefetch_related("tags")
+        etag = f'"{hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()}"'
+        return etag, int(last_modified.timestamp()) if last_modified else None
+
+    def get_conditional_response(self, request, queryset, get_response, detail=True):
+        """
+        Return a 304 response when the client's copy of the objects of a QuerySet is current, or the response
+        of get_response() otherwise, along with the validators. Last-Modified is only used for a single object.
+        """
+        etag, last_modified = self.get_validators(request, queryset)
+        if not detail:
+            last_modified = None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = get_response()
+        if 200 <= response.status_code < 300 or response.status_code == 304:
+            response.headers["ETag"] = etag
+            if last_modified is not None:
+                response.headers["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.get_conditional_response(
+            request,
+            queryset,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+            detail=False,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError):
+            raise NotFound()
+        return self.get_conditional_response(
+            request,
+            queryset,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
+
+
+class AccessListViewSet(ConditionalGetMixin, NetBoxModelViewSet):
+    """
+    Defines the view set for the django AccessList model & associates it to a view.
+    """
+
+    queryset = models.AccessList.objects.annotate_rule_counts().prefetch_related(
+        GenericPrefetch(
+            "assigned_object",
+            [
+                Device.objects.all(),
+                VirtualChassis.objects.all(),
+                VirtualMachine.objects.all(),
+            ],
+        ),
+        "tags",
     )
     serializer_class = AccessListSerializer
     filterset_class = filtersets.AccessListFilterSet
 
+    @extend_schema(parameters=[ACLFlowSerializer], responses=ACLVerdictSerializer)
+    @action(detail=True, methods=["get"])
+    def evaluate(self, request, pk):
+        """
+        Return the action the Access List takes on a packet, and the first rule which matches it.
+        """
+        access_list = self.get_object()
+        flow_serializer = ACLFlowSerializer(data=request.query_params)
+        flow_serializer.is_valid(raise_exception=True)
+
+        verdict = get_compiled_access_list(access_list).evaluate(Flow.from_values(**flow_serializer.validated_data))
 
-class ACLInterfaceAssignmentViewSet(NetBoxModelViewSet):
+        return Response(
+            ACLVerdictSerializer(
+                {
+                    "action": verdict.action,
+                    "default": verdict.is_default,
+                    "rule_id": verdict.rule.pk if verdict.rule else None,
+                    "index": verdict.rule.index if verdict.rule else None,
+                },
+            ).data,
+        )
+
+    @extend_schema(request=ACLFlowBatchSerializer, responses=ACLBatchVerdictSerializer)
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="evaluate-batch",
+        parser_classes=[JSONParser, MultiPartParser],
+        permission_classes=[IsAuthenticatedOrLoginNotRequired],
+    )
+    def evaluate_batch(self, request, pk):
+        """
+        Evaluate a batch of packets against the Access List and summarize the actions taken.
+        Evaluating packets does not change anything, so only view permission on the Access List is required.
+        """
+        access_list = get_object_or_404(models.AccessList.objects.restrict(request.user, "view"), pk=pk)
+        batch_serializer = ACLFlowBatchSerializer(data=request.data)
+        try:
+            batch_serializer.is_valid(raise_exception=True)
+            vectorized = VectorizedAccessList(get_compiled_access_list(access_list))
+        except ImportError as exc:
+            raise ServiceUnavailable(str(exc))
+
+        result = vectorized.evaluate(batch_serializer.validated_data["flow_batch"])
+        data = result.summary()
+        if batch_serializer.validated_data["verdicts"]:
+            data["verdicts"] = result.indexes()
+
+        return Response(ACLBatchVerdictSerializer(data).data)
+
+    @extend_schema(responses=ACLRuleFindingSerializer(many=True))
+    @action(detail=True, methods=["get"])
+    def analysis(self, request, pk):
+        """
+        Return the rules of the Access List which never take effect, being shadowed by earlier
+        rules or only repeating the default action.
+        """
+        access_list = self.get_object()
+        findings = get_access_list_findings(access_list)
+
+        return Response(ACLRuleFindingSerializer(findings, many=True).data)
+
+    @extend_schema(parameters=[ACLRenderSerializer], responses=ACLRenderSerializer)
+    @action(detail=True, methods=["get"], url_path="render")
+    def render_config(self, request, pk):
+        """
+        Return the configuration of the Access List and its interface assignments for a platform.
+        """
+        access_list = self.get_object()
+        render_serializer = ACLRenderSerializer(data=request.query_params)
+        render_serializer.is_valid(raise_exception=True)
+        platform = render_serializer.validated_data["platform"]
+
+        return Response(
+            ACLRenderSerializer(
+                {
+                    "platform": platform,
+                    "config": render_access_list(access_list, platform),
+                },
+            ).data,
+        )
+
+    @extend_schema(request=ACLRuleSetEntrySerializer(many=True), responses=ACLRuleSetResultSerializer)
+    @action(detail=True, methods=["put"], url_path="rules")
+    def replace_rules(self, request, pk):
+        """
+        Replace every rule of the Access List with the given, complete rule set. Rules are matched to the
+        existing ones by index and only those which differ are written, within a single transaction.
+        The change is recorded in the changelog of the Access List rather than of each rule.
+        """
+        access_list = self.get_object()
+        rule_set_serializer = ACLRuleSetSerializer(
+            child=ACLRuleSetEntrySerializer(),
+            data=request.data,
+            context={
+                "access_list": access_list,
+                "prefixes": Prefix.objects.restrict(request.user, "view"),
+            },
+        )
+        rule_set_serializer.is_valid(raise_exception=True)
+        rule_model = access_list.rule_model
+
+        with transaction.atomic():
+            changes = access_list.diff_rules(rule_set_serializer.validated_data)
+            self._check_rule_permissions(request.user, rule_model, changes["updated"], "change")
+            self._check_rule_permissions(request.user, rule_model, changes["deleted"], "delete")
+
+            if any(changes.values()):
+                access_list.snapshot()
+                access_list.apply_rule_changes(changes)
+                # Enforce the constraints of the user's permissions on the new rule values
+                self._check_rule_permissions(request.user, rule_model, changes["created"], "add")
+                self._check_rule_permissions(request.user, rule_model, changes["updated"], "change")
+                access_list.save()
+
+        data = {change: len(rules) for change, rules in changes.items()}
+        data["unchanged"] = len(rule_set_serializer.validated_data) - data["created"] - data["updated"]
+
+        return Response(ACLRuleSetResultSerializer(data).data)
+
+    @staticmethod
+    def _check_rule_permissions(user, rule_model, rules, action):
+        if not rules:
+            return
+        permitted = rule_model.objects.restrict(user, action).filter(pk__in=[rule.pk for rule in rules]).count()
+        if permitted != len(rules):
+            raise PermissionDenied(f"You do not have permission to {action} some of these rules.")
+
+
+class ACLInterfaceAssignmentViewSet(ExportMixin, NetBoxModelViewSet):
     """
     Defines the view set for the django ACLInterfaceAssignment model & associates it to a view.
     """
 
     queryset = models.ACLInterfaceAssignment.objects.prefetch_related(
         "access_list",
+        GenericPrefetch(
+            "assigned_object",
+            [
+                Interface.objects.select_related("device", "cable"),
+                VMInterface.objects.select_related("virtual_machine"),
+            ],
+        ),
         "tags",
     )
     serializer_class = ACLInterfaceAssignmentSerializer
     filterset_class = filtersets.ACLInterfaceAssignmentFilterSet
 
 
-class ACLStandardRuleViewSet(NetBoxModelViewSet):
+class ACLStandardRuleViewSet(ConditionalGetMixin, ExportMixin, NetBoxModelViewSet):
     """
     Defines the view set for the django ACLStandardRule model & associates it to a view.
     """
@@ -64,9 +344,11 @@ class ACLStandardRuleViewSet(NetBoxModelViewSet):
     )
     serializer_class = ACLStandardRuleSerializer
     filterset_class = filtersets.ACLStandardRuleFilterSet
+    pagination_class = ACLRuleCursorPagination
+    last_modified_related = ("access_list",)
 
 
-class ACLExtendedRuleViewSet(NetBoxModelViewSet):
+class ACLExtendedRuleViewSet(ConditionalGetMixin, ExportMixin, NetBoxModelViewSet):
     """
     Defines the view set for the django ACLExtendedRule model & associates it to a view.
     """
@@ -79,3 +361,43 @@ class ACLExtendedRuleViewSet(NetBoxModelViewSet):
     )
     serializer_class = ACLExtendedRuleSerializer
     filterset_class = filtersets.ACLExtendedRuleFilterSet
+    pagination_class = ACLRuleCursorPagination
+    last_modified_related = ("access_list",)
+
+
+class HostBundleView(APIView):
+    """
+    Defines the view returning the bundle of a device, virtual chassis or virtual machine.
+    """
+
+    permission_classes = [IsAuthenticatedOrLoginNotRequired]
+    host_models = {model._meta.label_lower: model for model in HOST_INTERFACES}
+
+    def get_view_name(self):
+        return "Host ACL Bundle"
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def get(self, request, host_type, pk):
+        """
+        Return every Access List of a host with its rules in index order and its interface assignments, in a single
+        denormalized document. Bundles are cached for the current version of the host's Access Lists and of the
+        user's permissions.
+        """
+        model = self.host_models.get(host_type)
+        if model is None:
+            raise NotFound(f"Unknown host type: {host_type}")
+        host = get_object_or_404(model.objects.restrict(request.user, "view"), pk=pk)
+
+        version = get_bundle_version(host, request.user)
+        etag = f'"{version}:{request.user.pk}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            data = get_or_set_host(
+                f"bundle:{request.user.pk}",
+                host,
+                version,
+                lambda instance: serialize_bundle(get_host_bundles(model.objects.filter(pk=instance.pk), request.user)[0]),
+            )
+            response = Response(data)
+        response.headers["ETag"] = etag
+        return response
@@ -0,0 +1,369 @@
+"""
+Gather the Access Lists of many hosts at once, with their rules and interface assignments.
+
+A bundle holds everything needed to generate the ACL configuration of a device or virtual
+machine. Bundles are built with a fixed number of set-based queries, however many hosts and
+Access Lists they cover, and related objects are attached to each other rather than queried
+again when they are read.
+
+The bundles of a whole fleet are written to a tarball by a pool of worker processes, each
+building the bundles of a chunk of hosts with its own database connection.
+"""
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import tarfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from dcim.models import Device, Interface, Region, VirtualChassis
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.contenttypes.prefetch import GenericPrefetch
+from django.core.cache import caches
+from django.db import connections
+from django.db.models import Count, F, Max, Model, Q
+from netbox.authentication import ObjectPermissionBackend
+from virtualization.models import VirtualMachine, VMInterface
+
+from .choices import ACLTypeChoices
+from .models import AccessList, ACLExtendedRule, ACLInterfaceAssignment, ACLStandardRule
+from .renderers import render_access_list
+
+__all__ = (
+    "HOST_INTERFACES",
+    "HostBundle",
+    "filter_hosts",
+    "get_bundle_files",
+    "get_bundle_version",
+    "get_host_bundles",
+    "serialize_bundle",
+    "write_bundle_archive",
+)
+
+# Number of hosts whose bundles are built at once by a worker process
+CHUNK_SIZE = 200
+
+# The interface model of each host model, and the lookup from interfaces to their host
+HOST_INTERFACES = {
+    Device: (Interface, "device"),
+    VirtualChassis: (Interface, "device__virtual_chassis"),
+    VirtualMachine: (VMInterface, "virtual_machine"),
+}
+
+
+@dataclass
+class HostBundle:
+    """
+    The Access Lists of a host with their rules in index order and their assignments to the host's
+    interfaces. The Access Lists of a device include those of its virtual chassis, and the Access
+    Lists of a virtual chassis those of its member devices.
+    """
+
+    host: Model
+    access_lists: list = field(default_factory=list)
+    standard_rules: list = field(default_factory=list)
+    extended_rules: list = field(default_factory=list)
+    interface_assignments: list = field(default_factory=list)
+
+
+def _restrict(queryset, user):
+    return queryset.restrict(user, "view") if user is not None else queryset
+
+
+def _get_assigned_hosts(model, hosts):
+    """
+    Return the primary keys of the hosts each object Access Lists may be assigned to belongs to, by the
+    (content type ID, ID) of the object, and a Q object selecting the Access Lists assigned to them.
+    """
+    hosts_of = defaultdict(list)
+    for host in hosts:
+        hosts_of[ContentType.objects.get_for_model(model).pk, host.pk].append(host.pk)
+    if model is Device:
+        chassis_type = ContentType.objects.get_for_model(VirtualChassis)
+        for host in hosts:
+            if host.virtual_chassis_id:
+                hosts_of[chassis_type.pk, host.virtual_chassis_id].append(host.pk)
+    elif model is VirtualChassis:
+        device_type = ContentType.objects.get_for_model(Device)
+        members = Device.objects.filter(virtual_chassis__in=[host.pk for host in hosts]).values_list("pk", "virtual_chassis_id")
+        for pk, virtual_chassis_id in members:
+            hosts_of[device_type.pk, pk].append(virtual_chassis_id)
+
+    assigned_object_ids = defaultdict(list)
+    for assigned_object_type_id, assigned_object_id in hosts_of:
+        assigned_object_ids[assigned_object_type_id].append(assigned_object_id)
+    query = Q(pk__in=[])
+    for assigned_object_type_id, ids in assigned_object_ids.items():
+        query |= Q(assigned_object_type_id=assigned_object_type_id, assigned_object_id__in=ids)
+    return hosts_of, query
+
+
+def _get_permissions(user):
+    """
+    Return the plugin's object permissions of a user, with their constraints, which restrict what the user's bundles hold.
+    """
+    if user is None or user.is_superuser:
+        return None
+    permissions = ObjectPermissionBackend().get_all_permissions(user)
+    permissions = {name: constraints for name, constraints in permissions.items() if name.startswith("netbox_acls.")}
+    return json.dumps(permissions, sort_keys=True, default=str)
+
+
+def get_bundle_version(host, user=None):
+    """
+    Return the version of the bundle of a host, which changes whenever the host, one of its Access Lists,
+    their rules or the prefixes these refer to, their interface assignments or the assigned interfaces change.
+    When a user is given, the version also changes with the user's permissions on the plugin's objects.
+    """
+    interface_model = HOST_INTERFACES[type(host)][0]
+    interface_lookup = f"aclinterfaceassignment__{interface_model._meta.model_name}__last_updated"
+    aggregates = AccessList.objects.filter(_get_assigned_hosts(type(host), [host])[1]).aggregate(
+        access_list_count=Count("pk", distinct=True),
+        access_list_updated=Max("last_updated"),
+        assignment_count=Count("aclinterfaceassignment", distinct=True),
+        assignment_updated=Max("aclinterfaceassignment__last_updated"),
+        interface_updated=Max(interface_lookup),
+    )
+    values = [host.last_updated, *aggregates.values(), _get_permissions(user)]
+    return hashlib.md5(repr(values).encode(), usedforsecurity=False).hexdigest()
+
+
+def get_host_bundles(hosts, user=None, max_rules=None):
+    """
+    Return a HostBundle for each host of a QuerySet of Devices, VirtualChassis or VirtualMachines, in the order
+    of the QuerySet. Access Lists, rules and interface assignments are restricted to those the user may view, when given.
+    Raises ValueError when max_rules is given and the Access Lists of the hosts have more rules.
+    """
+    interface_model, host_lookup = HOST_INTERFACES[hosts.model]
+    bundles = {host.pk: HostBundle(host) for host in hosts}
+    if not bundles:
+        return []
+
+    # Access Lists, by the hosts they are assigned to
+    host_type = ContentType.objects.get_for_model(hosts.model)
+    hosts_of, query = _get_assigned_hosts(hosts.model, [bundle.host for bundle in bundles.values()])
+    access_lists = {}
+    for access_list in _restrict(AccessList.objects.filter(query), user).order_by("name", "pk"):
+        access_lists[access_list.pk] = access_list
+        for pk in hosts_of[access_list.assigned_object_type_id, access_list.assigned_object_id]:
+            bundles[pk].access_lists.append(access_list)
+            if access_list.assigned_object_type_id == host_type.pk:
+                access_list.assigned_object = bundles[pk].host
+
+    # Rules, by Access List
+    rules = defaultdict(list)
+    rule_querysets = []
+    standard_ids = [pk for pk, access_list in access_lists.items() if access_list.type == ACLTypeChoices.TYPE_STANDARD]
+    extended_ids = [pk for pk, access_list in access_lists.items() if access_list.type == ACLTypeChoices.TYPE_EXTENDED]
+    if standard_ids:
+        rule_querysets.append(ACLStandardRule.objects.filter(access_list_id__in=standard_ids).select_related("source_prefix"))
+    if extended_ids:
+        rule_querysets.append(
+            ACLExtendedRule.objects.filter(access_list_id__in=extended_ids).select_related("source_prefix", "destination_prefix"),
+        )
+    rule_count = 0
+    for rule_queryset in rule_querysets:
+        rule_queryset = _restrict(rule_queryset, user).order_by("access_list_id", "index")
+        if max_rules is not None:
+            # One more rule than allowed is enough to tell the limit is exceeded
+            rule_queryset = rule_queryset[: max_rules - rule_count + 1]
+        for rule in rule_queryset:
+            rules[rule.access_list_id].append(rule)
+            rule_count += 1
+    if max_rules is not None and rule_count > max_rules:
+        raise ValueError(f"The Access Lists of these hosts have more than {max_rules} rules.")
+
+    for bundle in bundles.values():
+        for access_list in bundle.access_lists:
+            for rule in rules[access_list.pk]:
+                rule.access_list = access_list
+                if access_list.type == ACLTypeChoices.TYPE_STANDARD:
+                    bundle.standard_rules.append(rule)
+                else:
+                    bundle.extended_rules.append(rule)
+
+    # Interface assignments of the bundled Access Lists, by the host of their interface
+    interfaces = interface_model.objects.annotate(bundle_host_id=F(host_lookup))
+    if interface_model is Interface:
+        interfaces = interfaces.select_related("device")
+    assignments = ACLInterfaceAssignment.objects.filter(
+        access_list_id__in=list(access_lists),
+        assigned_object_type=ContentType.objects.get_for_model(interface_model),
+        assigned_object_id__in=interface_model.objects.filter(**{f"{host_lookup}__in": list(bundles)}).values("pk"),
+    ).prefetch_related(GenericPrefetch("assigned_object", [interfaces]))
+    for assignment in _restrict(assignments, user).order_by("access_list_id", "assigned_object_type_id", "assigned_object_id", "direction"):
+        if assignment.assigned_object is None:
+            continue
+        bundle = bundles[assignment.assigned_object.bundle_host_id]
+        assignment.access_list = access_lists[assignment.access_list_id]
+        if "__" not in host_lookup:
+            setattr(assignment.assigned_object, host_lookup, bundle.host)
+        bundle.interface_assignments.append(assignment)
+
+    return list(bundles.values())
+
+
+def _content_type_label(content_type_id):
+    content_type = ContentType.objects.get_for_id(content_type_id)
+    return f"{content_type.app_label}.{content_type.model}"
+
+
+def _serialize_rule(rule):
+    data = {
+        "id": rule.pk,
+        "index": rule.index,
+        "action": rule.action,
+        "remark": rule.remark,
+        "source_prefix": str(rule.source_prefix.prefix) if rule.source_prefix else None,
+    }
+    if isinstance(rule, ACLExtendedRule):
+        data.update(
+            protocol=rule.protocol,
+            source_ports=rule.source_ports,
+            destination_prefix=str(rule.destination_prefix.prefix) if rule.destination_prefix else None,
+            destination_ports=rule.destination_ports,
+        )
+    return data
+
+
+def _serialize_assignment(assignment):
+    interface = assignment.assigned_object
+    host = getattr(interface, "device", None) or interface.virtual_machine
+    return {
+        "id": assignment.pk,
+        "direction": assignment.direction,
+        "interface_type": _content_type_label(assignment.assigned_object_type_id),
+        "interface_id": interface.pk,
+        "interface": interface.name,
+        "host": host.name,
+    }
+
+
+def _group_by_access_list(objects):
+    groups = defaultdict(list)
+    for obj in objects:
+        groups[obj.access_list_id].append(obj)
+    return groups
+
+
+def serialize_bundle(bundle):
+    """
+    Return a HostBundle as a dictionary of primitive values, holding each Access List with its rules
+    and interface assignments, and prefixes and interfaces flattened to their names.
+    """
+    rules = _group_by_access_list(bundle.standard_rules + bundle.extended_rules)
+    assignments = _group_by_access_list(bundle.interface_assignments)
+
+    return {
+        "host": {
+            "type": bundle.host._meta.label_lower,
+            "id": bundle.host.pk,
+            "name": bundle.host.name,
+        },
+        "access_lists": [
+            {
+                "id": access_list.pk,
+                "name": access_list.name,
+                "type": access_list.type,
+                "default_action": access_list.default_action,
+                "assigned_object_type": _content_type_label(access_list.assigned_object_type_id),
+                "assigned_object_id": access_list.assigned_object_id,
+                "rules": [_serialize_rule(rule) for rule in rules[access_list.pk]],
+                "interface_assignments": [_serialize_assignment(assignment) for assignment in assignments[access_list.pk]],
+            }
+            for access_list in bundle.access_lists
+        ],
+    }
+
+
+def filter_hosts(model, site_ids=None, region_ids=None, role_ids=None):
+    """
+    Return the Devices or VirtualMachines of the given sites, regions (including their child regions) and roles.
+    """
+    hosts = model.objects.all()
+    if site_ids:
+        hosts = hosts.filter(site__in=site_ids)
+    if region_ids:
+        hosts = hosts.filter(site__region__in=Region.objects.filter(pk__in=region_ids).get_descendants(include_self=True))
+    if role_ids:
+        hosts = hosts.filter(role__in=role_ids)
+    return hosts
+
+
+def get_bundle_files(model_label, host_ids, platforms=()):
+    """
+    Return the files of the bundles of the hosts of a model, as (name, content) pairs: the bundle of each host
+    as JSON, and the configuration of its Access Lists for each platform, rendered from the bundle's rules and
+    interface assignments.
+    """
+    model = apps.get_model(model_label)
+    files = []
+    for bundle in get_host_bundles(model.objects.filter(pk__in=host_ids).order_by("pk")):
+        name = f"{model_label}/{bundle.host.pk}"
+        files.append((f"{name}.json", json.dumps(serialize_bundle(bundle), separators=(",", ":")).encode()))
+        rules = _group_by_access_list(bundle.standard_rules + bundle.extended_rules)
+        assignments = _group_by_access_list(bundle.interface_assignments)
+        for platform in platforms:
+            config = "".join(
+                render_access_list(access_list, platform, rules[access_list.pk], assignments[access_list.pk])
+                for access_list in bundle.access_lists
+            )
+            files.append((f"{name}.{platform}.txt", config.encode()))
+    return files
+
+
+def _get_chunk_files(chunk):
+    return get_bundle_files(*chunk)
+
+
+def _close_connections():
+    # Forked processes must not share the database and cache connections of their parent
+    connections.close_all()
+    caches.close_all()
+
+
+def _iter_chunk_files(chunks, workers):
+    if workers is not None and workers <= 1:
+        yield from map(_get_chunk_files, chunks)
+        return
+
+    _close_connections()
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_close_connections,
+    ) as executor:
+        yield from executor.map(_get_chunk_files, chunks)
+
+
+def write_bundle_archive(fileobj, hosts, platforms=(), workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Write the files of the bundles of the hosts of each QuerySet of Devices or VirtualMachines to a gzipped
+    tarball, and return the number of hosts written.
+
+    The hosts are split into chunks, whose bundles are built in parallel by worker processes, as many as
+    there are CPUs by default. With a single worker, they are built in the current process instead.
+    """
+    chunks = []
+    for queryset in hosts:
+        model_label = queryset.model._meta.label_lower
+        host_ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+        chunks.extend((model_label, host_ids[i : i + chunk_size], tuple(platforms)) for i in range(0, len(host_ids), chunk_size))
+
+    count = 0
+    mtime = time.time()
+    with tarfile.open(fileobj=fileobj, mode="w:gz") as archive:
+        for files in _iter_chunk_files(chunks, workers):
+            for name, content in files:
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                info.mtime = mtime
+                archive.addfile(info, io.BytesIO(content))
+                count += name.endswith(".json")
+    return count
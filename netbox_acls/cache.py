@@ -0,0 +1,112 @@
+"""
+Cache results derived from an Access List and its rules.
+
+Cache keys embed the Access List's last_updated timestamp, which is bumped whenever one of its
+rules or the prefixes they refer to change, so that stale entries are never read and simply expire.
+The compiled form of Access Lists, which every other result derives from, is also deleted by signal
+handlers as soon as it goes stale.
+
+Results derived from all the Access Lists of a host are cached for a version computed from the
+host, its Access Lists and their interface assignments.
+
+The number of Access Lists and ACL interface assignments of each object, shown as tab badges,
+are cached as well. They are deleted by signal handlers whenever an assignment changes.
+"""
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from netbox.context import current_request
+
+__all__ = (
+    "delete_assigned_counts",
+    "delete_compiled",
+    "get_assigned_count",
+    "get_cache_key",
+    "get_host_cache_key",
+    "get_or_set",
+    "get_or_set_host",
+)
+
+CACHE_TIMEOUT = 60 * 60 * 24
+COMPILED_NAMESPACE = "compiled"
+
+
+def _get_version_key(namespace, pk, last_updated):
+    version = last_updated.timestamp() if last_updated else "none"
+    return f"netbox_acls:{namespace}:{pk}:{version}"
+
+
+def get_cache_key(namespace, access_list):
+    """
+    Return the cache key of a namespace for the current version of an Access List.
+    """
+    return _get_version_key(namespace, access_list.pk, access_list.last_updated)
+
+
+def get_or_set(namespace, access_list, func):
+    """
+    Return the cached value of a namespace for an Access List, calling func(access_list) to compute it when missing.
+    """
+    return cache.get_or_set(get_cache_key(namespace, access_list), lambda: func(access_list), CACHE_TIMEOUT)
+
+
+def get_host_cache_key(namespace, host, version):
+    """
+    Return the cache key of a namespace for a version of the Access Lists of a host.
+    """
+    return f"netbox_acls:{namespace}:{host._meta.label_lower}:{host.pk}:{version}"
+
+
+def get_or_set_host(namespace, host, version, func):
+    """
+    Return the cached value of a namespace for a version of the Access Lists of a host, calling func(host) to compute it when missing.
+    """
+    return cache.get_or_set(get_host_cache_key(namespace, host, version), lambda: func(host), CACHE_TIMEOUT)
+
+
+def delete_compiled(versions):
+    """
+    Delete the cached compiled form of each (pk, last_updated) version of Access Lists.
+    """
+    cache.delete_many([_get_version_key(COMPILED_NAMESPACE, pk, last_updated) for pk, last_updated in versions])
+
+
+def get_assigned_count_key(model, assigned_object_type_id, assigned_object_id):
+    """
+    Return the cache key of the number of objects of a model assigned to an object.
+    """
+    return f"netbox_acls:count:{model._meta.model_name}:{assigned_object_type_id}:{assigned_object_id}"
+
+
+def get_assigned_count(model, assigned_object):
+    """
+    Return the number of objects of a model (AccessList or ACLInterfaceAssignment) assigned to an object.
+
+    Counts are cached, and memoized for the rest of the current request.
+    """
+    assigned_object_type = ContentType.objects.get_for_model(assigned_object)
+    key = get_assigned_count_key(model, assigned_object_type.pk, assigned_object.pk)
+
+    request = current_request.get()
+    counts = getattr(request, "_netbox_acls_counts", {})
+    if key not in counts:
+        counts[key] = cache.get_or_set(
+            key,
+            lambda: model.objects.filter(assigned_object_type=assigned_object_type, assigned_object_id=assigned_object.pk).count(),
+            CACHE_TIMEOUT,
+        )
+        if request is not None:
+            request._netbox_acls_counts = counts
+    return counts[key]
+
+
+def delete_assigned_counts(model, assigned_objects):
+    """
+    Delete the cached number of objects of a model assigned to each (content type ID, ID) of assigned_objects.
+    """
+    keys = [get_assigned_count_key(model, *assigned_object) for assigned_object in assigned_objects]
+    cache.delete_many(keys)
+
+    request = current_request.get()
+    for key in keys:
+        getattr(request, "_netbox_acls_counts", {}).pop(key, None)
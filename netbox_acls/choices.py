@@ -9,6 +9,8 @@ __all__ = (
     "ACLAssignmentDirectionChoices",
     "ACLProtocolChoices",
     "ACLRuleActionChoices",
+    "ACLRenderPlatformChoices",
+    "ACLRuleFindingChoices",
     "ACLTypeChoices",
     "ACLProtocolChoices",
 )
@@ -88,3 +90,39 @@ class ACLProtocolChoices(ChoiceSet):
         (PROTOCOL_TCP, "TCP", "blue"),
         (PROTOCOL_UDP, "UDP", "orange"),
     ]
+
+
+class ACLRuleFindingChoices(ChoiceSet):
+    """
+    Defines the kinds of issues the Access List analysis reports about ACL rules.
+    """
+
+    FINDING_SHADOWED = "shadowed"
+    FINDING_REDUNDANT = "redundant"
+    FINDING_DEFAULT_ACTION = "default-action"
+
+    CHOICES = [
+        (FINDING_SHADOWED, "Shadowed", "red"),
+        (FINDING_REDUNDANT, "Redundant", "orange"),
+        (FINDING_DEFAULT_ACTION, "Redundant with Default Action", "yellow"),
+    ]
+
+
+class ACLRenderPlatformChoices(ChoiceSet):
+    """
+    Defines the platforms whose configuration syntax Access Lists can be rendered into.
+    """
+
+    PLATFORM_CISCO_IOS = "cisco-ios"
+    PLATFORM_CISCO_NXOS = "cisco-nxos"
+    PLATFORM_ARISTA_EOS = "arista-eos"
+    PLATFORM_JUNIPER_JUNOS = "juniper-junos"
+    PLATFORM_NFTABLES = "nftables"
+
+    CHOICES = [
+        (PLATFORM_CISCO_IOS, "Cisco IOS"),
+        (PLATFORM_CISCO_NXOS, "Cisco NX-OS"),
+        (PLATFORM_ARISTA_EOS, "Arista EOS"),
+        (PLATFORM_JUNIPER_JUNOS, "Juniper Junos"),
+        (PLATFORM_NFTABLES, "Linux nftables"),
+    ]
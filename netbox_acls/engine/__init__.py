@@ -0,0 +1,8 @@
+# flake8: noqa
+"""
+Import each of the directory's scripts.
+"""
+
+from .analysis import *
+from .compiler import *
+from .vectorized import *
@@ -0,0 +1,247 @@
+"""
+Find ACL rules which never take effect: rules shadowed by earlier rules, and rules which only
+repeat the Access List's default action.
+
+Rules are indexed by their prefixes, protocol and ports instead of being compared pairwise.
+Prefixes containing a rule's prefix are found by masking its address to each prefix length in
+use, and prefixes contained in it by a range scan over the sorted network addresses. Port sets
+are found through the ports they list.
+"""
+
+from bisect import bisect_left, insort
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional
+
+from ..cache import get_or_set
+from ..choices import ACLRuleFindingChoices
+from .compiler import ADDRESS_BITS, CompiledRule, Protocol, get_compiled_access_list
+
+__all__ = (
+    "Finding",
+    "analyze_access_list",
+    "get_access_list_findings",
+)
+
+
+@dataclass(frozen=True)
+class Finding:
+    """
+    An issue about an ACL rule, along with the earlier rule causing it, if any.
+    """
+
+    rule: CompiledRule
+    kind: str
+    related_rule: Optional[CompiledRule] = None
+
+
+def _prefix_key(address_range):
+    """
+    Return the (version, network address, prefix length) of an address range, or None for any address.
+    """
+    if address_range is None:
+        return None
+    size = address_range.last - address_range.first + 1
+    return address_range.version, address_range.first, ADDRESS_BITS[address_range.version] - size.bit_length() + 1
+
+
+class _PrefixTree:
+    """
+    The distinct prefixes of one rule field, answering which of them contain or overlap a prefix.
+    """
+
+    def __init__(self):
+        self.keys = set()
+        self.lengths = defaultdict(set)
+        self.starts = defaultdict(list)
+
+    def add(self, key):
+        if key is None or key in self.keys:
+            return
+        version, first, length = key
+        self.keys.add(key)
+        self.lengths[version].add(length)
+        insort(self.starts[version], (first, length))
+
+    def containing(self, address_range):
+        """
+        Yield the keys of the prefixes containing or equal to an address range, starting with any address (None).
+        """
+        yield None
+        if address_range is None:
+            return
+        version, first, length = _prefix_key(address_range)
+        bits = ADDRESS_BITS[version]
+        for candidate in self.lengths[version]:
+            if candidate <= length:
+                key = (version, first >> (bits - candidate) << (bits - candidate), candidate)
+                if key in self.keys:
+                    yield key
+
+    def overlapping(self, address_range):
+        """
+        Yield the keys of the prefixes overlapping an address range other than any address.
+        """
+        yield from self.containing(address_range)
+        version, first, length = _prefix_key(address_range)
+        starts = self.starts[version]
+        for position in range(bisect_left(starts, (first, length + 1)), len(starts)):
+            start, candidate = starts[position]
+            if start > address_range.last:
+                break
+            yield version, start, candidate
+
+
+class _PortSets:
+    """
+    The distinct port sets of one rule field, answering which of them cover or overlap a port set.
+    Port sets are sorted tuples, the empty one matching any port.
+    """
+
+    def __init__(self):
+        self.by_port = defaultdict(set)
+
+    def add(self, ports):
+        for port in ports:
+            self.by_port[port].add(ports)
+
+    def covering(self, ports):
+        """
+        Yield the port sets listing every port of a port set, starting with any port.
+        """
+        yield ()
+        if ports:
+            for candidate in self.by_port.get(ports[0], ()):
+                if set(ports).issubset(candidate):
+                    yield candidate
+
+    def overlapping(self, ports):
+        """
+        Yield the port sets sharing a port with a port set other than any port, starting with any port.
+        """
+        yield ()
+        candidates = set()
+        for port in ports:
+            candidates.update(self.by_port.get(port, ()))
+        yield from candidates
+
+
+class _RuleIndex:
+    """
+    Rules indexed by their source and destination prefixes, protocol, and source and destination
+    ports, in a tree with a level per field whose leaves list the rules sharing all five values.
+
+    Lookups descend only into the branches whose values cover or overlap those of a rule, or into
+    every branch of a level where the rule matches any value, so that their work depends on the
+    number of matching branches rather than on the number of rules.
+    """
+
+    def __init__(self):
+        self.sources = _PrefixTree()
+        self.destinations = _PrefixTree()
+        self.source_ports = _PortSets()
+        self.destination_ports = _PortSets()
+        self.tree = {}
+
+    def add(self, position, rule):
+        key = (
+            _prefix_key(rule.source_range),
+            _prefix_key(rule.destination_range),
+            rule.protocol,
+            rule.source_ports,
+            rule.destination_ports,
+        )
+        self.sources.add(key[0])
+        self.destinations.add(key[1])
+        self.source_ports.add(rule.source_ports)
+        self.destination_ports.add(rule.destination_ports)
+
+        node = self.tree
+        for value in key[:-1]:
+            node = node.setdefault(value, {})
+        node.setdefault(key[-1], []).append((position, rule))
+
+    def find(self, node, lookups):
+        """
+        Yield the leaves reached by following, at each level, the keys looked up for that level, or
+        every key when the lookup is None.
+        """
+        keys, *lookups = lookups
+        for key in node if keys is None else keys:
+            child = node.get(key)
+            if child is None:
+                continue
+            if lookups:
+                yield from self.find(child, lookups)
+            else:
+                yield child
+
+    def first_covering(self, rule):
+        """
+        Return the indexed rule with the lowest position which matches every packet the rule matches.
+        """
+        lookups = (
+            list(self.sources.containing(rule.source_range)),
+            list(self.destinations.containing(rule.destination_range)),
+            {Protocol.ANY, rule.protocol},
+            list(self.source_ports.covering(rule.source_ports)),
+            list(self.destination_ports.covering(rule.destination_ports)),
+        )
+        # The rules of a leaf are listed in the order they were added, by ascending position
+        found = min((leaf[0] for leaf in self.find(self.tree, lookups)), default=None, key=lambda item: item[0])
+        return found[1] if found else None
+
+    def first_overlapping(self, rule):
+        """
+        Return any indexed rule matching some of the packets the rule matches.
+        """
+        lookups = (
+            None if rule.source_range is None else list(self.sources.overlapping(rule.source_range)),
+            None if rule.destination_range is None else list(self.destinations.overlapping(rule.destination_range)),
+            None if not rule.protocol else (Protocol.ANY, rule.protocol),
+            None if not rule.source_ports else list(self.source_ports.overlapping(rule.source_ports)),
+            None if not rule.destination_ports else list(self.destination_ports.overlapping(rule.destination_ports)),
+        )
+        for leaf in self.find(self.tree, lookups):
+            return leaf[0][1]
+        return None
+
+
+def analyze_access_list(access_list):
+    """
+    Return the Findings about the rules of a CompiledAccessList, in index order:
+      - A rule matching only packets an earlier rule already matches is redundant when both
+        rules share the same action, and shadowed otherwise.
+      - A rule whose action is the default action is redundant with it when no later rule
+        with another action matches any of its packets.
+    """
+    rules = [rule for rule in access_list.rules if not rule.is_remark]
+    findings = {}
+
+    earlier = _RuleIndex()
+    for position, rule in enumerate(rules):
+        covering = earlier.first_covering(rule)
+        if covering is None:
+            earlier.add(position, rule)
+        elif covering.action == rule.action:
+            findings[position] = Finding(rule, ACLRuleFindingChoices.FINDING_REDUNDANT, covering)
+        else:
+            findings[position] = Finding(rule, ACLRuleFindingChoices.FINDING_SHADOWED, covering)
+
+    later = _RuleIndex()
+    for position in reversed(range(len(rules))):
+        rule = rules[position]
+        # Shadowed rules are indexed too: removing the rule shadowing one would let it take effect
+        if rule.action != access_list.default_action:
+            later.add(position, rule)
+        elif position not in findings and later.first_overlapping(rule) is None:
+            findings[position] = Finding(rule, ACLRuleFindingChoices.FINDING_DEFAULT_ACTION)
+
+    return tuple(findings[position] for position in sorted(findings))
+
+
+def get_access_list_findings(access_list):
+    """
+    Return the Findings about the rules of an AccessList, cached for its current version.
+    """
+    return get_or_set("findings", access_list, lambda instance: analyze_access_list(get_compiled_access_list(instance)))
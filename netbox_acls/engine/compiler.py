@@ -0,0 +1,401 @@
+"""
+Compile Access Lists and their rules into immutable structures answering first-match lookups.
+"""
+
+import enum
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import NamedTuple, Optional
+
+import netaddr
+
+from ..cache import COMPILED_NAMESPACE, get_or_set
+from ..choices import ACLRuleActionChoices, ACLTypeChoices
+
+__all__ = (
+    "AddressRange",
+    "CompiledAccessList",
+    "CompiledRule",
+    "Flow",
+    "Protocol",
+    "Verdict",
+    "compile_access_list",
+    "compile_rule",
+    "get_compiled_access_list",
+)
+
+
+class Protocol(enum.IntEnum):
+    """
+    IANA protocol numbers of the protocols an ACL rule can match.
+    ANY stands for a rule without a protocol, which matches every protocol.
+    """
+
+    ANY = 0
+    ICMP = 1
+    TCP = 6
+    UDP = 17
+
+    @classmethod
+    def from_choice(cls, value):
+        """
+        Return the Protocol for an ACLProtocolChoices value. A blank value matches any protocol.
+        """
+        if not value:
+            return cls.ANY
+        return cls[value.upper()]
+
+
+class AddressRange(NamedTuple):
+    """
+    A prefix expressed as the inclusive integer range of the addresses it contains.
+    """
+
+    version: int
+    first: int
+    last: int
+
+    @classmethod
+    def from_prefix(cls, prefix):
+        network = netaddr.IPNetwork(prefix)
+        return cls(network.version, network.first, network.last)
+
+    def contains(self, version, address):
+        return self.version == version and self.first <= address <= self.last
+
+    def covers(self, other):
+        return self.version == other.version and self.first <= other.first and other.last <= self.last
+
+    def overlaps(self, other):
+        return self.version == other.version and self.first <= other.last and other.first <= self.last
+
+
+def _port_in(ports, port):
+    """
+    Check whether a port is part of a sorted tuple of ports. An empty tuple matches any port.
+    """
+    if not ports:
+        return True
+    if port is None:
+        return False
+    position = bisect_left(ports, port)
+    return position < len(ports) and ports[position] == port
+
+
+class Flow(NamedTuple):
+    """
+    The 5-tuple of a packet, with its addresses as integers.
+    """
+
+    version: int
+    source: int
+    destination: Optional[int]
+    protocol: int
+    source_port: Optional[int]
+    destination_port: Optional[int]
+
+    @classmethod
+    def from_values(cls, source, destination=None, protocol=None, source_port=None, destination_port=None):
+        """
+        Build a Flow from IP address strings and an ACLProtocolChoices value or protocol number.
+        """
+        try:
+            source = netaddr.IPAddress(source)
+            destination = netaddr.IPAddress(destination) if destination else None
+        except (netaddr.AddrFormatError, TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid IP address: {exc}") from exc
+        if destination is not None and destination.version != source.version:
+            raise ValueError("Source and destination addresses must be of the same IP version.")
+        if isinstance(protocol, str):
+            protocol = Protocol.from_choice(protocol)
+
+        return cls(
+            version=source.version,
+            source=int(source),
+            destination=int(destination) if destination is not None else None,
+            protocol=protocol or Protocol.ANY,
+            source_port=source_port,
+            destination_port=destination_port,
+        )
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """
+    An immutable ACL rule with its prefixes converted to address ranges and its ports sorted.
+    A rule without a prefix, ports or protocol matches any value for that field.
+    """
+
+    pk: Optional[int]
+    index: int
+    action: str
+    remark: str = ""
+    protocol: Protocol = Protocol.ANY
+    source: Optional[str] = None
+    source_range: Optional[AddressRange] = None
+    source_ports: tuple = ()
+    destination: Optional[str] = None
+    destination_range: Optional[AddressRange] = None
+    destination_ports: tuple = ()
+
+    @property
+    def is_remark(self):
+        return self.action == ACLRuleActionChoices.ACTION_REMARK
+
+    def matches(self, flow):
+        """
+        Check whether the rule matches a Flow.
+        """
+        if self.is_remark:
+            return False
+        if self.protocol and self.protocol != flow.protocol:
+            return False
+        if self.source_range and not self.source_range.contains(flow.version, flow.source):
+            return False
+        if self.destination_range and (
+            flow.destination is None or not self.destination_range.contains(flow.version, flow.destination)
+        ):
+            return False
+        return _port_in(self.source_ports, flow.source_port) and _port_in(self.destination_ports, flow.destination_port)
+
+
+ADDRESS_BITS = {4: 32, 6: 128}
+
+
+def _network(address, length, bits):
+    """
+    Return an address masked to a prefix length, or None for any address.
+    """
+    if length is None:
+        return None
+    return address >> (bits - length) << (bits - length)
+
+
+def _prefix(address_range, bits):
+    """
+    Return the (prefix length, network address) of an address range, or (None, None) for any address.
+    """
+    if address_range is None:
+        return None, None
+    return bits - (address_range.last - address_range.first + 1).bit_length() + 1, address_range.first
+
+
+class _RuleLookup:
+    """
+    The candidate rules of an IP version and protocol, indexed by their source and destination
+    prefixes, and then by their destination ports.
+
+    The rules which may match a flow are found by masking its addresses to each pair of source and
+    destination prefix lengths in use, and by looking up its destination port among the rules of the
+    prefixes found. The first of them matching the flow's source port in each is the earliest
+    candidate of that pair of prefixes.
+    """
+
+    def __init__(self, rules, version):
+        self.rules = rules
+        self.bits = ADDRESS_BITS[version]
+        # Prefix length pairs in use, and the positions of the rules by prefixes and destination port
+        self.lengths = set()
+        self.buckets = {}
+        for position, rule in enumerate(rules):
+            source_length, source = _prefix(rule.source_range, self.bits)
+            destination_length, destination = _prefix(rule.destination_range, self.bits)
+            self.lengths.add((source_length, destination_length))
+            bucket = self.buckets.setdefault((source_length, source, destination_length, destination), {})
+            for port in rule.destination_ports or (None,):
+                bucket.setdefault(port, []).append(position)
+
+    def _first(self, positions, flow):
+        for position in positions:
+            if _port_in(self.rules[position].source_ports, flow.source_port):
+                return position
+        return None
+
+    def first_match(self, flow):
+        """
+        Return the first rule matching a Flow, or None.
+        """
+        found = None
+        for source_length, destination_length in self.lengths:
+            # Rules with a destination prefix, even 0.0.0.0/0, do not match flows without a destination
+            if destination_length is not None and flow.destination is None:
+                continue
+            bucket = self.buckets.get(
+                (
+                    source_length,
+                    _network(flow.source, source_length, self.bits),
+                    destination_length,
+                    _network(flow.destination, destination_length, self.bits),
+                ),
+            )
+            if bucket is None:
+                continue
+            # Rules without destination ports are listed under None
+            ports = (None,) if flow.destination_port is None else (None, flow.destination_port)
+            for port in ports:
+                position = self._first(bucket.get(port, ()), flow)
+                if position is not None and (found is None or position < found):
+                    found = position
+        return self.rules[found] if found is not None else None
+
+
+class Verdict(NamedTuple):
+    """
+    The result of evaluating a Flow: the action taken and the rule which matched, if any.
+    """
+
+    action: str
+    rule: Optional[CompiledRule] = None
+
+    @property
+    def is_default(self):
+        return self.rule is None
+
+
+@dataclass(frozen=True)
+class CompiledAccessList:
+    """
+    An immutable, index-ordered representation of an Access List and its rules.
+    """
+
+    pk: Optional[int]
+    name: str
+    type: str
+    default_action: str
+    rules: tuple = ()
+    _lookups: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __getstate__(self):
+        # Leave the memoized lookups out of pickles, such as cached copies, to keep them compact.
+        return {**self.__dict__, "_lookups": {}}
+
+    def _lookup(self, version, protocol):
+        key = (version, protocol)
+        if key not in self._lookups:
+            self._lookups[key] = _RuleLookup(self.candidates(version, protocol), version)
+        return self._lookups[key]
+
+    def candidates(self, version, protocol):
+        """
+        Return the rules which may match flows of an IP version and protocol, in index order.
+        Remarks and rules for another IP version or protocol are left out.
+        """
+        return tuple(
+            rule
+            for rule in self.rules
+            if not rule.is_remark
+            and (not rule.protocol or rule.protocol == protocol)
+            and (rule.source_range is None or rule.source_range.version == version)
+            and (rule.destination_range is None or rule.destination_range.version == version)
+        )
+
+    def evaluate(self, flow):
+        """
+        Return the Verdict of the first rule matching a Flow, or the default action when none does.
+        The candidate rules of the flow's IP version and protocol are indexed on first use, so that
+        lookups do not scan the rules.
+        """
+        rule = self._lookup(flow.version, flow.protocol).first_match(flow)
+        if rule is not None:
+            return Verdict(rule.action, rule)
+        return Verdict(self.default_action)
+
+
+def compile_rule(
+    pk,
+    index,
+    action,
+    remark="",
+    protocol="",
+    source=None,
+    source_ports=None,
+    destination=None,
+    destination_ports=None,
+):
+    """
+    Build a CompiledRule from the field values of an ACLStandardRule or ACLExtendedRule.
+    """
+    return CompiledRule(
+        pk=pk,
+        index=index,
+        action=action,
+        remark=remark or "",
+        protocol=Protocol.from_choice(protocol),
+        source=str(source) if source else None,
+        source_range=AddressRange.from_prefix(source) if source else None,
+        source_ports=tuple(sorted(set(source_ports or ()))),
+        destination=str(destination) if destination else None,
+        destination_range=AddressRange.from_prefix(destination) if destination else None,
+        destination_ports=tuple(sorted(set(destination_ports or ()))),
+    )
+
+
+def _get_prefix(prefix):
+    return prefix.prefix if prefix is not None else None
+
+
+def compile_access_list(access_list, rules=None):
+    """
+    Compile an AccessList and its rules into a CompiledAccessList. The rules are queried, unless
+    every rule of the Access List is given, with its prefixes.
+    """
+    if rules is not None:
+        rules = sorted(rules, key=lambda rule: rule.index)
+    if access_list.type == ACLTypeChoices.TYPE_EXTENDED:
+        if rules is None:
+            rows = access_list.aclextendedrules.order_by("index").values_list(
+                "pk",
+                "index",
+                "action",
+                "remark",
+                "protocol",
+                "source_prefix__prefix",
+                "source_ports",
+                "destination_prefix__prefix",
+                "destination_ports",
+            )
+        else:
+            rows = [
+                (
+                    rule.pk,
+                    rule.index,
+                    rule.action,
+                    rule.remark,
+                    rule.protocol,
+                    _get_prefix(rule.source_prefix),
+                    rule.source_ports,
+                    _get_prefix(rule.destination_prefix),
+                    rule.destination_ports,
+                )
+                for rule in rules
+            ]
+        rules = tuple(compile_rule(*row) for row in rows)
+    else:
+        if rules is None:
+            rows = access_list.aclstandardrules.order_by("index").values_list(
+                "pk",
+                "index",
+                "action",
+                "remark",
+                "source_prefix__prefix",
+            )
+        else:
+            rows = [(rule.pk, rule.index, rule.action, rule.remark, _get_prefix(rule.source_prefix)) for rule in rules]
+        rules = tuple(compile_rule(pk, index, action, remark, source=source) for pk, index, action, remark, source in rows)
+
+    return CompiledAccessList(
+        pk=access_list.pk,
+        name=access_list.name,
+        type=access_list.type,
+        default_action=access_list.default_action,
+        rules=rules,
+    )
+
+
+def get_compiled_access_list(access_list, rules=None):
+    """
+    Return the CompiledAccessList of an AccessList, cached for its current version, so that
+    repeated reads of an Access List do not query its rules. When missing, it is compiled
+    from the given rules, if any.
+    """
+    return get_or_set(COMPILED_NAMESPACE, access_list, lambda instance: compile_access_list(instance, rules))
@@ -0,0 +1,376 @@
+"""
+Evaluate large batches of flows against a compiled Access List with NumPy array operations.
+
+NumPy is an optional dependency of the plugin; it is only required by this module.
+"""
+
+import csv
+import ipaddress
+from collections import Counter
+
+from .compiler import Protocol
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+__all__ = (
+    "BatchResult",
+    "FlowBatch",
+    "VectorizedAccessList",
+)
+
+# Number of (flow, rule) pairs compared at once. Bounds the size of the intermediate boolean matrices.
+BLOCK_SIZE = 2**21
+# Number of flows evaluated together against successive blocks of rules.
+FLOW_BLOCK_SIZE = 4096
+# Stride of the (rule, port) keys used for port lookups. One above the highest port, so that
+# "no port" (65536) never collides with the ports of the next rule.
+PORT_STRIDE = 65537
+NO_PORT = 65536
+MAX_PORT = 65535
+MAX_PROTOCOL = 255
+
+FLOW_FIELDS = ("source", "destination", "protocol", "source_port", "destination_port")
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy must be installed to evaluate flows in batches.")
+
+
+def _split_address(address):
+    """
+    Split an integer address into the high and low 64 bits.
+    """
+    return address >> 64, address & 0xFFFFFFFFFFFFFFFF
+
+
+def _check_range(name, value, maximum):
+    if not 0 <= value <= maximum:
+        raise ValueError(f"{name} {value} is out of the range 0-{maximum}")
+    return value
+
+
+def _parse_protocol(value):
+    if value in (None, ""):
+        return Protocol.ANY
+    if isinstance(value, str) and not value.isdigit():
+        return Protocol.from_choice(value)
+    return _check_range("protocol", int(value), MAX_PROTOCOL)
+
+
+def _parse_port(value):
+    if value in (None, ""):
+        return NO_PORT
+    return _check_range("port", int(value), MAX_PORT)
+
+
+def _check_array(name, values, size, minimum, maximum):
+    """
+    Return an array of integers as a NumPy array, checking its length and the range of its values.
+    """
+    values = np.asarray(values)
+    if values.ndim != 1 or len(values) != size:
+        raise ValueError(f"{name} must be a one-dimensional array of {size} values")
+    if size and not np.issubdtype(values.dtype, np.integer):
+        raise ValueError(f"{name} must be an array of integers")
+    if size and (values.min() < minimum or values.max() > maximum):
+        raise ValueError(f"{name} values must be in the range {minimum}-{maximum}")
+    return values
+
+
+class FlowBatch:
+    """
+    A columnar batch of flows. Addresses are held as the high and low 64 bits of their integer value.
+    """
+
+    def __init__(
+        self,
+        version,
+        source_hi,
+        source_lo,
+        destination_hi,
+        destination_lo,
+        has_destination,
+        protocol,
+        source_port,
+        destination_port,
+    ):
+        self.version = version
+        self.source_hi = source_hi
+        self.source_lo = source_lo
+        self.destination_hi = destination_hi
+        self.destination_lo = destination_lo
+        self.has_destination = has_destination
+        self.protocol = protocol
+        self.source_port = source_port
+        self.destination_port = destination_port
+
+    def __len__(self):
+        return len(self.version)
+
+    @property
+    def has_ipv6(self):
+        return bool((self.version == 6).any())
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build a FlowBatch from an iterable of (source, destination, protocol, source_port, destination_port)
+        records, with addresses as strings and the protocol as a name or number.
+        """
+        _require_numpy()
+        columns = [[] for _ in range(9)]
+        for line, (source, destination, protocol, source_port, destination_port) in enumerate(records, start=1):
+            try:
+                source = ipaddress.ip_address(source)
+                destination = ipaddress.ip_address(destination) if destination else None
+                if destination is not None and destination.version != source.version:
+                    raise ValueError("source and destination addresses must be of the same IP version")
+                values = (
+                    source.version,
+                    *_split_address(int(source)),
+                    *_split_address(int(destination) if destination is not None else 0),
+                    destination is not None,
+                    _parse_protocol(protocol),
+                    _parse_port(source_port),
+                    _parse_port(destination_port),
+                )
+            except (KeyError, ValueError) as exc:
+                raise ValueError(f"Invalid flow on line {line}: {exc}") from exc
+            for column, value in zip(columns, values):
+                column.append(value)
+
+        dtypes = (np.int8, np.uint64, np.uint64, np.uint64, np.uint64, np.bool_, np.int16, np.int32, np.int32)
+        return cls(*(np.array(column, dtype=dtype) for column, dtype in zip(columns, dtypes)))
+
+    @classmethod
+    def from_csv(cls, lines):
+        """
+        Build a FlowBatch from CSV lines with a header naming the source, destination, protocol,
+        source_port and destination_port columns. Only the source column is mandatory.
+        """
+        reader = csv.DictReader(lines)
+        if not reader.fieldnames or "source" not in reader.fieldnames:
+            raise ValueError("The CSV data must have a header with at least a source column.")
+        return cls.from_records(tuple(row.get(name) for name in FLOW_FIELDS) for row in reader)
+
+    @classmethod
+    def from_arrays(cls, source, destination=None, protocol=None, source_port=None, destination_port=None):
+        """
+        Build a FlowBatch of IPv4 flows from NumPy arrays of integer addresses, protocol numbers and ports.
+        Missing ports are expressed as negative values. Raises ValueError for arrays of another length than
+        the source addresses, or holding values out of range.
+        """
+        _require_numpy()
+        source = np.asarray(source)
+        if source.ndim != 1:
+            raise ValueError("source must be a one-dimensional array")
+        size = len(source)
+        source = _check_array("source", source, size, 0, 2**32 - 1).astype(np.uint64)
+        if destination is None:
+            destination = np.zeros(size, dtype=np.uint64)
+            has_destination = np.zeros(size, dtype=np.bool_)
+        else:
+            destination = _check_array("destination", destination, size, 0, 2**32 - 1).astype(np.uint64)
+            has_destination = np.ones(size, dtype=np.bool_)
+        if protocol is not None:
+            protocol = _check_array("protocol", protocol, size, 0, MAX_PROTOCOL)
+
+        def ports(name, values):
+            if values is None:
+                return np.full(size, NO_PORT, dtype=np.int32)
+            values = _check_array(name, values, size, -(2**31), MAX_PORT)
+            return np.where(values < 0, NO_PORT, values).astype(np.int32)
+
+        return cls(
+            version=np.full(size, 4, dtype=np.int8),
+            source_hi=np.zeros(size, dtype=np.uint64),
+            source_lo=source,
+            destination_hi=np.zeros(size, dtype=np.uint64),
+            destination_lo=destination,
+            has_destination=has_destination,
+            protocol=np.zeros(size, dtype=np.int16) if protocol is None else protocol.astype(np.int16),
+            source_port=ports("source_port", source_port),
+            destination_port=ports("destination_port", destination_port),
+        )
+
+
+class _RangeColumns:
+    """
+    The address ranges of a set of rules, split into NumPy columns.
+    """
+
+    def __init__(self, ranges):
+        self.any = np.array([r is None for r in ranges], dtype=np.bool_)
+        self.version = np.array([r.version if r else 0 for r in ranges], dtype=np.int8)
+        first = [_split_address(r.first if r else 0) for r in ranges]
+        last = [_split_address(r.last if r else 0) for r in ranges]
+        self.first_hi = np.array([hi for hi, _ in first], dtype=np.uint64)
+        self.first_lo = np.array([lo for _, lo in first], dtype=np.uint64)
+        self.last_hi = np.array([hi for hi, _ in last], dtype=np.uint64)
+        self.last_lo = np.array([lo for _, lo in last], dtype=np.uint64)
+
+    def match(self, rules, version, hi, lo, wide):
+        """
+        Return the (flows x rules) matrix of the flow addresses falling into the rule ranges.
+        """
+        lo = lo[:, None]
+        if wide:
+            hi = hi[:, None]
+            first_hi, last_hi = self.first_hi[rules], self.last_hi[rules]
+            above = (hi > first_hi) | ((hi == first_hi) & (lo >= self.first_lo[rules]))
+            below = (hi < last_hi) | ((hi == last_hi) & (lo <= self.last_lo[rules]))
+        else:
+            above = lo >= self.first_lo[rules]
+            below = lo <= self.last_lo[rules]
+        return self.any[rules] | ((version[:, None] == self.version[rules]) & above & below)
+
+
+class _PortColumns:
+    """
+    The ports of a set of rules, as a sorted array of (rule position, port) keys.
+    """
+
+    def __init__(self, port_lists):
+        self.any = np.array([not ports for ports in port_lists], dtype=np.bool_)
+        keys = [position * PORT_STRIDE + port for position, ports in enumerate(port_lists) for port in ports]
+        self.keys = np.array(sorted(keys), dtype=np.int64)
+
+    def match(self, rules, ports):
+        """
+        Return, for aligned arrays of rule positions and flow ports, whether each port is listed by its rule.
+        """
+        any_port = self.any[rules]
+        if any_port.all() or not len(self.keys):
+            return any_port
+        keys = rules.astype(np.int64) * PORT_STRIDE + ports.astype(np.int64)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return any_port | (self.keys[positions] == keys)
+
+
+class BatchResult:
+    """
+    The verdicts of a FlowBatch. rule_positions holds, for every flow, the position of the
+    matching rule within VectorizedAccessList.rules, or -1 when the default action applied.
+    """
+
+    def __init__(self, access_list, rule_positions):
+        self.access_list = access_list
+        self.rule_positions = rule_positions
+
+    def __len__(self):
+        return len(self.rule_positions)
+
+    def actions(self):
+        """
+        Return an array of the action taken on every flow.
+        """
+        actions = np.array([rule.action for rule in self.access_list.rules] + [self.access_list.default_action], dtype=object)
+        return actions[self.rule_positions]
+
+    def indexes(self):
+        """
+        Return the index of the rule matching every flow, None where the default action applied.
+        """
+        indexes = [rule.index for rule in self.access_list.rules] + [None]
+        return [indexes[position] for position in self.rule_positions.tolist()]
+
+    def summary(self):
+        """
+        Return the number of flows per action and per matching rule index.
+        """
+        positions, counts = np.unique(self.rule_positions, return_counts=True)
+        default = 0
+        actions = Counter()
+        rules = {}
+        for position, count in zip(positions.tolist(), counts.tolist()):
+            if position == -1:
+                default = count
+                actions[self.access_list.default_action] += count
+            else:
+                rule = self.access_list.rules[position]
+                actions[rule.action] += count
+                rules[rule.index] = count
+
+        return {
+            "flows": len(self),
+            "default": default,
+            "actions": dict(actions),
+            "rules": rules,
+        }
+
+
+class VectorizedAccessList:
+    """
+    The columnar form of a CompiledAccessList, evaluating whole FlowBatches at once.
+
+    Flows are compared to blocks of rules as boolean (flows x rules) matrices; the first
+    matching rule of each flow is found with argmax, and flows that matched are dropped
+    before moving on to the next block of rules.
+    """
+
+    def __init__(self, compiled):
+        _require_numpy()
+        self.compiled = compiled
+        self.default_action = compiled.default_action
+        self.rules = tuple(rule for rule in compiled.rules if not rule.is_remark)
+        self.protocol = np.array([rule.protocol for rule in self.rules], dtype=np.int16)
+        self.source = _RangeColumns([rule.source_range for rule in self.rules])
+        self.destination = _RangeColumns([rule.destination_range for rule in self.rules])
+        self.source_ports = _PortColumns([rule.source_ports for rule in self.rules])
+        self.destination_ports = _PortColumns([rule.destination_ports for rule in self.rules])
+        self.has_ipv6 = any(
+            r is not None and r.version == 6 for rule in self.rules for r in (rule.source_range, rule.destination_range)
+        )
+
+    def _match(self, flows, pending, rules, wide):
+        """
+        Return the (pending flows x rules) matrix of matches.
+
+        Protocols and addresses are compared for every pair; ports are only looked up for
+        the few pairs still matching after that.
+        """
+        protocol = self.protocol[rules]
+        matches = (protocol == Protocol.ANY) | (flows.protocol[pending][:, None] == protocol)
+        matches &= self.source.match(rules, flows.version[pending], flows.source_hi[pending], flows.source_lo[pending], wide)
+        matches &= self.destination.match(
+            rules,
+            flows.version[pending],
+            flows.destination_hi[pending],
+            flows.destination_lo[pending],
+            wide,
+        ) & (self.destination.any[rules] | flows.has_destination[pending][:, None])
+
+        flow_positions, rule_positions = np.nonzero(matches)
+        if len(flow_positions):
+            candidates = rules[rule_positions]
+            flow_ids = pending[flow_positions]
+            ports_match = self.source_ports.match(candidates, flows.source_port[flow_ids])
+            ports_match &= self.destination_ports.match(candidates, flows.destination_port[flow_ids])
+            matches[flow_positions[~ports_match], rule_positions[~ports_match]] = False
+        return matches
+
+    def evaluate(self, flows):
+        """
+        Evaluate a FlowBatch and return its BatchResult.
+        """
+        rule_positions = np.full(len(flows), -1, dtype=np.int64)
+        wide = self.has_ipv6 or flows.has_ipv6
+        rule_block = max(1, BLOCK_SIZE // FLOW_BLOCK_SIZE)
+
+        for flow_start in range(0, len(flows), FLOW_BLOCK_SIZE):
+            pending = np.arange(flow_start, min(flow_start + FLOW_BLOCK_SIZE, len(flows)))
+            for rule_start in range(0, len(self.rules), rule_block):
+                if not len(pending):
+                    break
+                rules = np.arange(rule_start, min(rule_start + rule_block, len(self.rules)))
+                matches = self._match(flows, pending, rules, wide)
+                matched = matches.any(axis=1)
+                if matched.any():
+                    rule_positions[pending[matched]] = rule_start + matches[matched].argmax(axis=1)
+                    pending = pending[~matched]
+
+        return BatchResult(self, rule_positions)
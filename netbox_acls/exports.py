@@ -0,0 +1,197 @@
+"""
+Stream Access Lists, ACL rules and interface assignments as NDJSON or CSV, one chunk of rows at a time.
+
+Rows are read with a server-side cursor as flat tuples, without instantiating models, so that
+exports use constant memory however many rows they hold. Prefixes are flattened to their CIDR
+notation, and related objects to their ID and name.
+"""
+
+import csv
+import io
+import json
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+from dcim.models import Device, Interface, VirtualChassis
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Case, CharField, Expression, OuterRef, Subquery, Value, When
+from django.db.models.functions import Concat
+from virtualization.models import VirtualMachine, VMInterface
+
+from .models import AccessList, ACLExtendedRule, ACLInterfaceAssignment, ACLStandardRule
+
+__all__ = (
+    "EXPORT_FORMATS",
+    "ExportColumn",
+    "get_export_columns",
+    "iter_export",
+    "iter_export_rows",
+)
+
+# Number of rows fetched from the server-side cursor at once.
+CHUNK_SIZE = 2000
+# Size of the output buffered before being yielded.
+BUFFER_SIZE = 64 * 1024
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _to_string(value):
+    return str(value) if value is not None else None
+
+
+@dataclass(frozen=True)
+class ExportColumn:
+    """
+    A column of an export, read from a field lookup or an expression and optionally converted.
+    """
+
+    name: str
+    lookup: Union[str, Expression]
+    convert: Optional[Callable] = None
+
+
+def _rule_columns(model):
+    columns = [
+        ExportColumn("id", "id"),
+        ExportColumn("access_list_id", "access_list_id"),
+        ExportColumn("access_list", "access_list__name"),
+        ExportColumn("index", "index"),
+        ExportColumn("action", "action"),
+        ExportColumn("remark", "remark"),
+        ExportColumn("description", "description"),
+        ExportColumn("source_prefix", "source_prefix__prefix", _to_string),
+    ]
+    if model is ACLExtendedRule:
+        columns += [
+            ExportColumn("source_ports", "source_ports"),
+            ExportColumn("destination_prefix", "destination_prefix__prefix", _to_string),
+            ExportColumn("destination_ports", "destination_ports"),
+            ExportColumn("protocol", "protocol"),
+        ]
+    return columns
+
+
+def _assigned_object_lookup(*fields):
+    """
+    Return an expression looking up a field of the object an Access List or assignment is assigned to,
+    given the (model, field) pairs of each model it may be assigned to.
+    """
+    return Case(
+        *(
+            When(
+                assigned_object_type=ContentType.objects.get_for_model(model),
+                then=Subquery(model.objects.filter(pk=OuterRef("assigned_object_id")).values(field)[:1]),
+            )
+            for model, field in fields
+        ),
+        output_field=CharField(),
+    )
+
+
+def _assigned_object_type():
+    return Concat("assigned_object_type__app_label", Value("."), "assigned_object_type__model", output_field=CharField())
+
+
+def _access_list_columns():
+    return [
+        ExportColumn("id", "id"),
+        ExportColumn("name", "name"),
+        ExportColumn("type", "type"),
+        ExportColumn("default_action", "default_action"),
+        ExportColumn("assigned_object_type", _assigned_object_type()),
+        ExportColumn("assigned_object_id", "assigned_object_id"),
+        ExportColumn("host", _assigned_object_lookup((Device, "name"), (VirtualChassis, "name"), (VirtualMachine, "name"))),
+        ExportColumn("standard_rule_count", "standard_rule_count"),
+        ExportColumn("extended_rule_count", "extended_rule_count"),
+    ]
+
+
+def _assignment_columns():
+    return [
+        ExportColumn("id", "id"),
+        ExportColumn("access_list_id", "access_list_id"),
+        ExportColumn("access_list", "access_list__name"),
+        ExportColumn("direction", "direction"),
+        ExportColumn("assigned_object_type", _assigned_object_type()),
+        ExportColumn("assigned_object_id", "assigned_object_id"),
+        ExportColumn("assigned_object", _assigned_object_lookup((Interface, "name"), (VMInterface, "name"))),
+        ExportColumn("host", _assigned_object_lookup((Interface, "device__name"), (VMInterface, "virtual_machine__name"))),
+    ]
+
+
+def get_export_columns(model):
+    """
+    Return the ExportColumns of a model.
+    """
+    if model is AccessList:
+        return _access_list_columns()
+    if model in (ACLStandardRule, ACLExtendedRule):
+        return _rule_columns(model)
+    if model is ACLInterfaceAssignment:
+        return _assignment_columns()
+    raise ValueError(f"{model._meta.verbose_name_plural} cannot be exported.")
+
+
+def iter_export_rows(queryset, columns, chunk_size=CHUNK_SIZE):
+    """
+    Yield a tuple of the column values of every object of a QuerySet, in (access_list_id, index)
+    order for rules and in primary key order otherwise, using a server-side cursor.
+    """
+    expressions = {f"export_{column.name}": column.lookup for column in columns if not isinstance(column.lookup, str)}
+    lookups = [column.lookup if isinstance(column.lookup, str) else f"export_{column.name}" for column in columns]
+    ordering = ("access_list_id", "index") if queryset.model in (ACLStandardRule, ACLExtendedRule) else ("pk",)
+    queryset = queryset.prefetch_related(None).annotate(**expressions).order_by(*ordering).values_list(*lookups)
+
+    converters = [(position, column.convert) for position, column in enumerate(columns) if column.convert]
+    for row in queryset.iterator(chunk_size=chunk_size):
+        if converters:
+            row = list(row)
+            for position, convert in converters:
+                row[position] = convert(row[position])
+        yield row
+
+
+def _iter_ndjson(names, rows):
+    buffer = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(names, row)), separators=(",", ":"))
+        buffer.append(line)
+        size += len(line) + 1
+        if size >= BUFFER_SIZE:
+            yield "\n".join(buffer) + "\n"
+            buffer, size = [], 0
+    if buffer:
+        yield "\n".join(buffer) + "\n"
+
+
+def _iter_csv(names, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for row in rows:
+        writer.writerow(",".join(map(str, value)) if isinstance(value, list) else value for value in row)
+        if buffer.tell() >= BUFFER_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_export(queryset, export_format, chunk_size=CHUNK_SIZE):
+    """
+    Yield the objects of a QuerySet of Access Lists, ACL rules or interface assignments as chunks of NDJSON or CSV text.
+    In CSV, port lists are joined with commas.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    columns = get_export_columns(queryset.model)
+    names = [column.name for column in columns]
+    rows = iter_export_rows(queryset, columns, chunk_size)
+    if export_format == "csv":
+        return _iter_csv(names, rows)
+    return _iter_ndjson(names, rows)
@@ -3,9 +3,12 @@ Filters enable users to request only a specific subset of objects matching a que
 when filtering the sites list by status or region, for instance.
 """
 import django_filters
+import netaddr
 from dcim.models import Device, Interface, Region, Site, SiteGroup, VirtualChassis
 from django.db.models import Q
+from ipam.models import Prefix
 from netbox.filtersets import NetBoxModelFilterSet
+from utilities.filters import MultiValueNumberFilter
 from virtualization.models import VirtualMachine, VMInterface
 
 from .models import AccessList, ACLExtendedRule, ACLInterfaceAssignment, ACLStandardRule
@@ -95,21 +98,16 @@ class AccessListFilterSet(NetBoxModelFilterSet):
             "site",
             "site_group",
             "region",
+            "standard_rule_count",
+            "extended_rule_count",
         )
 
     def search(self, queryset, name, value):
         """
-        Override the default search behavior for the django model.
+        Override the default search behavior for the django model, matching only the name and the comments,
+        which the trigram indexes of the model back.
         """
-        query = (
-                Q(name__icontains=value)
-                | Q(device__name__icontains=value)
-                | Q(virtual_chassis__name__icontains=value)
-                | Q(virtual_machine__name__icontains=value)
-                | Q(type__icontains=value)
-                | Q(default_action__icontains=value)
-                | Q(comments__icontains=value)
-        )
+        query = Q(name__icontains=value) | Q(comments__icontains=value)
         return queryset.filter(query)
 
 
@@ -170,11 +168,70 @@ class ACLInterfaceAssignmentFilterSet(NetBoxModelFilterSet):
         return queryset.filter(query)
 
 
-class ACLStandardRuleFilterSet(NetBoxModelFilterSet):
+def _get_prefixes(value, *lookups):
+    """
+    Return the prefixes matching an IP address or CIDR network with any of the given network lookups,
+    or None if the value is not a valid network.
+    """
+    try:
+        network = str(netaddr.IPNetwork(value.strip()).cidr)
+    except (netaddr.AddrFormatError, ValueError):
+        return None
+    query = Q()
+    for lookup in lookups:
+        query |= Q(**{f"prefix__{lookup}": network})
+    return Prefix.objects.filter(query).values("pk")
+
+
+class ACLRulePrefixFilterMixin:
+    """
+    Define the filter methods of the prefixes of ACL rules, given an IP address or a CIDR network.
+
+    The matching prefixes are selected first, with the >>= and <<= network operators, and the rules are then
+    filtered on their foreign keys. The prefixes are looked up with the indexes NetBox declares on them, as
+    the plugin does not index core tables. Rules without a prefix, matching any address, are included.
+    """
+
+    prefix_fields = ("source_prefix",)
+
+    def filter_prefix_contains(self, queryset, name, value):
+        """
+        Filter the rules whose prefix contains or equals the network.
+        """
+        prefixes = _get_prefixes(value, "net_contains_or_equals")
+        if prefixes is None:
+            return queryset.none()
+        return queryset.filter(Q(**{f"{name}__in": prefixes}) | Q(**{f"{name}__isnull": True}))
+
+    def filter_prefix_overlaps(self, queryset, name, value):
+        """
+        Filter the rules whose source or destination prefix overlaps the network. As CIDR networks are
+        either nested or disjoint, they overlap when either one contains the other.
+        """
+        prefixes = _get_prefixes(value, "net_contains_or_equals", "net_contained_or_equal")
+        if prefixes is None:
+            return queryset.none()
+        query = Q()
+        for field in self.prefix_fields:
+            query |= Q(**{f"{field}__in": prefixes}) | Q(**{f"{field}__isnull": True})
+        return queryset.filter(query)
+
+
+class ACLStandardRuleFilterSet(ACLRulePrefixFilterMixin, NetBoxModelFilterSet):
     """
     Define the filter set for the django model ACLStandardRule.
     """
 
+    source_contains = django_filters.CharFilter(
+        field_name="source_prefix",
+        method="filter_prefix_contains",
+        label="Source prefix contains",
+    )
+    overlaps = django_filters.CharFilter(
+        method="filter_prefix_overlaps",
+        label="Source prefix overlaps",
+    )
+
     class Meta:
         """
         Associates the django model ACLStandardRule & fields to the filter set.
@@ -185,21 +242,46 @@ class ACLStandardRuleFilterSet(NetBoxModelFilterSet):
 
     def search(self, queryset, name, value):
         """
-        Override the default search behavior for the django model.
+        Override the default search behavior for the django model, matching only the names of the Access Lists,
+        which are looked up with their trigram index before the rules of the matching Access Lists.
         """
-        query = (
-            Q(access_list__name__icontains=value)
-            | Q(index__icontains=value)
-            | Q(action__icontains=value)
-        )
+        query = Q(access_list__in=AccessList.objects.filter(name__icontains=value).values("pk"))
         return queryset.filter(query)
 
 
-class ACLExtendedRuleFilterSet(NetBoxModelFilterSet):
+class ACLExtendedRuleFilterSet(ACLRulePrefixFilterMixin, NetBoxModelFilterSet):
     """
     Define the filter set for the django model ACLExtendedRule.
     """
 
+    prefix_fields = ("source_prefix", "destination_prefix")
+
+    source_contains = django_filters.CharFilter(
+        field_name="source_prefix",
+        method="filter_prefix_contains",
+        label="Source prefix contains",
+    )
+    destination_contains = django_filters.CharFilter(
+        field_name="destination_prefix",
+        method="filter_prefix_contains",
+        label="Destination prefix contains",
+    )
+    overlaps = django_filters.CharFilter(
+        method="filter_prefix_overlaps",
+        label="Source or destination prefix overlaps",
+    )
+
+    source_port = MultiValueNumberFilter(
+        field_name="source_ports",
+        method="filter_ports",
+        label="Source Port",
+    )
+    destination_port = MultiValueNumberFilter(
+        field_name="destination_ports",
+        method="filter_ports",
+        label="Destination Port",
+    )
+
     class Meta:
         """
         Associates the django model ACLExtendedRule & fields to the filter set.
@@ -210,12 +292,17 @@ class ACLExtendedRuleFilterSet(NetBoxModelFilterSet):
 
     def search(self, queryset, name, value):
         """
-        Override the default search behavior for the django model.
+        Override the default search behavior for the django model, matching only the names of the Access Lists,
+        which are looked up with their trigram index before the rules of the matching Access Lists.
         """
-        query = (
-                Q(access_list__name__icontains=value)
-                | Q(index__icontains=value)
-                | Q(action__icontains=value)
-                | Q(protocol__icontains=value)
-        )
+        query = Q(access_list__in=AccessList.objects.filter(name__icontains=value).values("pk"))
         return queryset.filter(query)
+
+    def filter_ports(self, queryset, name, value):
+        """
+        Filter the rules listing any of the given ports, with an array overlap, which the GIN indexes of the port arrays back.
+        Rules without ports, matching any port, are not included.
+        """
+        if not value:
+            return queryset
+        return queryset.filter(**{f"{name}__overlap": value})
@@ -185,9 +185,14 @@ class ACLStandardRuleFilterForm(NetBoxModelFilterSetForm):
         choices=add_blank_choice(ACLRuleActionChoices),
         required=False,
     )
+    overlaps = forms.CharField(
+        required=False,
+        label="Overlapping Network",
+        help_text="IP address or CIDR network",
+    )
 
     fieldsets = (
-        FieldSet("access_list", "action", "source_prefix", name=_('Rule Details')),
+        FieldSet("access_list", "action", "source_prefix", "overlaps", name=_('Rule Details')),
         FieldSet("q", "tag",name=None)
     )
 class ACLExtendedRuleFilterForm(NetBoxModelFilterSetForm):
@@ -222,8 +227,35 @@ class ACLExtendedRuleFilterForm(NetBoxModelFilterSetForm):
         choices=add_blank_choice(ACLProtocolChoices),
         required=False,
     )
+    source_port = forms.IntegerField(
+        min_value=0,
+        max_value=65535,
+        required=False,
+        label="Source Port",
+    )
+    destination_port = forms.IntegerField(
+        min_value=0,
+        max_value=65535,
+        required=False,
+        label="Destination Port",
+    )
+    overlaps = forms.CharField(
+        required=False,
+        label="Overlapping Network",
+        help_text="IP address or CIDR network",
+    )
 
     fieldsets = (
-        FieldSet("access_list", "action", "source_prefix", "desintation_prefix", "protocol", name=_('Rule Details')),
+        FieldSet(
+            "access_list",
+            "action",
+            "source_prefix",
+            "desintation_prefix",
+            "protocol",
+            "source_port",
+            "destination_port",
+            "overlaps",
+            name=_('Rule Details'),
+        ),
         FieldSet("q", "tag",name=None)
     )
@@ -0,0 +1,158 @@
+"""
+Guard the list fields of the graphql api against queries returning or selecting too much.
+
+Like the page size of the REST API, list fields return at most graphql_max_results objects,
+nested lists included; larger lists are read page by page with their pagination argument.
+Before a list field is resolved, the cost of its query is scored as the number of objects it
+may return times the number of fields selected for each, nested objects included, the fields
+of nested lists counting once for each object these may return. Queries scoring more than
+graphql_max_cost are rejected. The cost of every query, and the rejected queries, are exported
+as Prometheus metrics.
+"""
+
+import logging
+
+import strawberry_django
+from graphql import FieldNode, FragmentSpreadNode, GraphQLError, get_named_type, get_nullable_type, is_list_type, value_from_ast_untyped
+from netbox.plugins.utils import get_plugin_config
+from prometheus_client import Counter, Histogram
+from strawberry.extensions import FieldExtension
+from strawberry_django.fields.field import StrawberryDjangoField
+from strawberry_django.pagination import OffsetPaginationInput
+
+__all__ = (
+    "ListField",
+    "QueryCostExtension",
+    "get_selection_cost",
+    "list_field",
+    "related_list_field",
+)
+
+logger = logging.getLogger("netbox_acls.graphql")
+
+QUERY_COST = Histogram(
+    "netbox_acls_graphql_query_cost",
+    "Cost of the queries of the list fields of the netbox_acls GraphQL API",
+    ["field"],
+    buckets=(10, 100, 1000, 10000, 100000, 1000000),
+)
+REJECTED_QUERIES = Counter(
+    "netbox_acls_graphql_rejected_queries",
+    "Queries of the list fields of the netbox_acls GraphQL API rejected for their cost",
+    ["field"],
+)
+
+
+def _get_max_results():
+    return get_plugin_config("netbox_acls", "graphql_max_results")
+
+
+def _get_list_rows(field_node, variables):
+    """
+    Return the number of objects a nested list may return: the limit of its pagination argument, if any,
+    or graphql_max_results.
+    """
+    max_results = _get_max_results()
+    for argument in field_node.arguments:
+        if argument.name.value == "pagination":
+            limit = (value_from_ast_untyped(argument.value, variables) or {}).get("limit")
+            if isinstance(limit, int) and limit > 0:
+                return min(limit, max_results)
+    return max_results
+
+
+def get_selection_cost(selection_set, parent_type, info):
+    """
+    Return the number of fields selected on an object of a GraphQL type, counting the fields of nested objects
+    and fragments. The fields selected on the objects of a nested list count once for each object it may return.
+    """
+    if selection_set is None:
+        return 0
+    cost = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            field = getattr(parent_type, "fields", {}).get(selection.name.value)
+            field_type = get_nullable_type(field.type) if field is not None else None
+            nested_cost = get_selection_cost(selection.selection_set, get_named_type(field_type), info)
+            if is_list_type(field_type):
+                nested_cost *= _get_list_rows(selection, info.variable_values)
+            cost += 1 + nested_cost
+        else:
+            if isinstance(selection, FragmentSpreadNode):
+                selection = info.fragments[selection.name.value]
+            type_condition = selection.type_condition
+            fragment_type = info.schema.get_type(type_condition.name.value) if type_condition is not None else parent_type
+            cost += get_selection_cost(selection.selection_set, fragment_type, info)
+    return cost
+
+
+class QueryCostExtension(FieldExtension):
+    """
+    Rejects the queries of a list field whose cost exceeds graphql_max_cost. The number of objects the
+    field may return is given by its pagination argument, or by the length of its rows_argument list.
+    """
+
+    def __init__(self, rows_argument=None):
+        self.rows_argument = rows_argument
+
+    def get_rows(self, kwargs):
+        max_results = _get_max_results()
+        if self.rows_argument is not None:
+            return min(len(kwargs[self.rows_argument]), max_results)
+        limit = getattr(kwargs.get("pagination"), "limit", None)
+        return min(limit, max_results) if isinstance(limit, int) and limit > 0 else max_results
+
+    def resolve(self, next_, source, info, **kwargs):
+        raw_info = info._raw_info
+        selection_cost = get_selection_cost(raw_info.field_nodes[0].selection_set, get_named_type(raw_info.return_type), raw_info)
+        cost = self.get_rows(kwargs) * max(selection_cost, 1)
+
+        QUERY_COST.labels(info.field_name).observe(cost)
+        max_cost = get_plugin_config("netbox_acls", "graphql_max_cost")
+        if cost > max_cost:
+            REJECTED_QUERIES.labels(info.field_name).inc()
+            logger.warning(f"Rejected a query of {info.field_name} costing {cost}")
+            raise GraphQLError(
+                f"The cost of this query ({cost}) exceeds the limit of {max_cost}. Select fewer fields, "
+                f"or read fewer objects at once with the pagination argument.",
+            )
+        return next_(source, info, **kwargs)
+
+
+class ListField(StrawberryDjangoField):
+    """
+    A list field returning at most graphql_max_results objects, once filtered and ordered. Its pagination
+    limit is lowered to graphql_max_results, so that nested lists are limited for each object they are
+    selected on, whether they are prefetched or not.
+    """
+
+    def get_queryset(self, queryset, info, pagination=None, **kwargs):
+        max_results = _get_max_results()
+        limit = getattr(pagination, "limit", -1)
+        if not isinstance(limit, int) or not 0 <= limit <= max_results:
+            pagination = OffsetPaginationInput(offset=getattr(pagination, "offset", 0), limit=max_results)
+        return super().get_queryset(queryset, info, pagination=pagination, **kwargs)
+
+
+def list_field(**kwargs):
+    """
+    Return a paginated list field, limited in size and cost.
+    """
+    return strawberry_django.field(
+        field_cls=ListField,
+        pagination=True,
+        extensions=[QueryCostExtension()],
+        **kwargs,
+    )
+
+
+def related_list_field(**kwargs):
+    """
+    Return a paginated list of related objects, limited in size. Its cost is scored with the query of the list field
+    it is selected from.
+    """
+    return strawberry_django.field(
+        field_cls=ListField,
+        pagination=True,
+        **kwargs,
+    )
@@ -1,20 +1,88 @@
 import strawberry
 import strawberry_django
+from dcim.models import Device
+from django.db.models import prefetch_related_objects
+from graphql import GraphQLError, get_named_type
+from graphql.execution.collect_fields import collect_sub_fields
+from netbox.plugins.utils import get_plugin_config
+from strawberry.types import Info
+from strawberry_django.optimizer import optimize
+from .limits import QueryCostExtension, list_field
 from .types import *
+from ..bundles import get_host_bundles
 from ..models import *
 from typing import List
 
+
+def _get_select_related_lookups(select_related, prefix=""):
+    lookups = []
+    if isinstance(select_related, dict):
+        for name, nested in select_related.items():
+            lookups.append(f"{prefix}{name}")
+            lookups.extend(_get_select_related_lookups(nested, f"{prefix}{name}__"))
+    return lookups
+
+
+def _prefetch_bundle_selections(info, bundles):
+    """
+    Prefetch the related objects selected on the devices and lists of the bundles, for all the bundles at once, with
+    the joins and prefetches the query optimizer would apply to a QuerySet of each list.
+    """
+    raw_info = info._raw_info
+    bundle_type = get_named_type(raw_info.return_type)
+    selections = collect_sub_fields(raw_info.schema, raw_info.fragments, raw_info.variable_values, bundle_type, raw_info.field_nodes)
+    for field_nodes in selections.values():
+        field_name = field_nodes[0].name.value
+        if field_name == "device":
+            objects = [bundle.host for bundle in bundles]
+        elif field_name in ("access_lists", "standard_rules", "extended_rules", "interface_assignments"):
+            objects = [obj for bundle in bundles for obj in getattr(bundle, field_name)]
+        else:
+            continue
+        if not objects:
+            continue
+        field_info = raw_info._replace(
+            field_name=field_name,
+            field_nodes=field_nodes,
+            return_type=bundle_type.fields[field_name].type,
+            parent_type=bundle_type,
+        )
+        queryset = optimize(type(objects[0]).objects.all(), field_info)
+        prefetch_related_objects(objects, *_get_select_related_lookups(queryset.query.select_related), *queryset._prefetch_related_lookups)
+
+
 @strawberry.type(name="Query")
 class NetBoxACLSQuery:
     """
     Defines the queries available to this plugin via the graphql api.
     """
     access_list: AccessListType = strawberry_django.field()
-    access_list_list: List[AccessListType] = strawberry_django.field()
+    access_list_list: List[AccessListType] = list_field()
 
     acl_extended_rule: ACLExtendedRuleType = strawberry_django.field()
-    acl_extended_rule_list: List[ACLExtendedRuleType] = strawberry_django.field()
+    acl_extended_rule_list: List[ACLExtendedRuleType] = list_field()
 
     acl_standard_rule: ACLStandardRuleType = strawberry_django.field()
-    acl_standard_rule_list: List[ACLStandardRuleType] = strawberry_django.field()
+    acl_standard_rule_list: List[ACLStandardRuleType] = list_field()
+
+    acl_interface_assignment: ACLInterfaceAssignmentType = strawberry_django.field()
+    acl_interface_assignment_list: List[ACLInterfaceAssignmentType] = list_field()
 
+    @strawberry.field(extensions=[QueryCostExtension(rows_argument="device_ids")])
+    def device_acl_bundle(self, info: Info, device_ids: List[strawberry.ID]) -> List[DeviceACLBundleType]:
+        """
+        Return the Access Lists of each of the given devices, with their rules and interface assignments,
+        loaded with a fixed number of queries. At most graphql_max_results devices and rules are returned.
+        The objects selected on the bundles are prefetched for all the devices at once.
+        """
+        max_results = get_plugin_config("netbox_acls", "graphql_max_results")
+        if len(device_ids) > max_results:
+            raise GraphQLError(f"At most {max_results} devices can be requested at once.")
+        user = info.context.request.user
+        devices = Device.objects.restrict(user, "view").filter(pk__in=device_ids).order_by("pk")
+        try:
+            bundles = get_host_bundles(devices, user, max_rules=max_results)
+        except ValueError as exc:
+            raise GraphQLError(f"{exc} Request fewer devices at once.")
+        _prefetch_bundle_selections(info, bundles)
+        return bundles
@@ -1,5 +1,9 @@
 """
 Define the object types and queries availble via the graphql api.
+
+Foreign keys are joined or prefetched by the query optimizer of strawberry_django. The objects
+Access Lists and interface assignments are assigned to are prefetched by content type, with
+the optimizer hints of their fields, so that lists are resolved with a constant number of queries.
 """
 
 import strawberry
@@ -7,10 +11,34 @@ import strawberry_django
 
 
 from typing import Annotated, List, Union
+from dcim.models import Device, Interface, VirtualChassis
+from django.contrib.contenttypes.prefetch import GenericPrefetch
+from virtualization.models import VirtualMachine, VMInterface
+from netbox.plugins.utils import get_plugin_config
 from .filters import *
+from .limits import related_list_field
 from .. import models
 from netbox.graphql.types import OrganizationalObjectType
 
+
+def _prefetch_access_list_hosts(info):
+    return GenericPrefetch(
+        "assigned_object",
+        [Device.objects.all(), VirtualChassis.objects.all(), VirtualMachine.objects.all()],
+    )
+
+
+def _prefetch_assigned_interfaces(info):
+    return GenericPrefetch(
+        "assigned_object",
+        [Interface.objects.select_related("device"), VMInterface.objects.select_related("virtual_machine")],
+    )
+
+
+def _limit_results(objects):
+    return objects[: get_plugin_config("netbox_acls", "graphql_max_results")]
+
+
 @strawberry_django.type(
     models.AccessList,
     fields='__all__',
@@ -23,10 +51,22 @@ class AccessListType(OrganizationalObjectType):
     Defines the object type for the django model AccessList.
     """
     assigned_object_type: Annotated["ContentTypeType", strawberry.lazy("netbox.graphql.types")]
-    assigned_object: Annotated[Union[
+    aclstandardrules: List[Annotated["ACLStandardRuleType", strawberry.lazy("netbox_acls.graphql.types")]] = related_list_field()
+    aclextendedrules: List[Annotated["ACLExtendedRuleType", strawberry.lazy("netbox_acls.graphql.types")]] = related_list_field()
+    aclinterfaceassignment_set: List[
+        Annotated["ACLInterfaceAssignmentType", strawberry.lazy("netbox_acls.graphql.types")]
+    ] = related_list_field()
+
+    @strawberry_django.field(
+        only=["assigned_object_type", "assigned_object_id"],
+        prefetch_related=[_prefetch_access_list_hosts],
+    )
+    def assigned_object(self) -> Annotated[Union[
         Annotated["DeviceType", strawberry.lazy('dcim.graphql.types')],
+        Annotated["VirtualChassisType", strawberry.lazy('dcim.graphql.types')],
         Annotated["VirtualMachineType", strawberry.lazy('virtualization.graphql.types')],
-    ], strawberry.union("ACLAssignmentType")]
+    ], strawberry.union("ACLAssignmentType")]:
+        return self.assigned_object
 
 
     class Meta:
@@ -49,10 +89,16 @@ class ACLInterfaceAssignmentType(OrganizationalObjectType):
     """
     access_list: Annotated["AccessListType", strawberry.lazy("netbox_acls.graphql.types")]
     assigned_object_type: Annotated["ContentTypeType", strawberry.lazy("netbox.graphql.types")]
-    assigned_object: Annotated[Union[
+
+    @strawberry_django.field(
+        only=["assigned_object_type", "assigned_object_id"],
+        prefetch_related=[_prefetch_assigned_interfaces],
+    )
+    def assigned_object(self) -> Annotated[Union[
         Annotated["InterfaceType", strawberry.lazy('dcim.graphql.types')],
         Annotated["VMInterfaceType", strawberry.lazy('virtualization.graphql.types')],
-    ], strawberry.union("ACLInterfaceAssignmentType")]
+    ], strawberry.union("ACLAssignedInterfaceType")]:
+        return self.assigned_object
 
     
 
@@ -75,11 +121,11 @@ class ACLExtendedRuleType(OrganizationalObjectType):
     """
     Defines the object type for the django model ACLExtendedRule.
     """
-    source_ports: List[int]
-    destination_ports: List[int]
+    source_ports: List[int] | None
+    destination_ports: List[int] | None
     access_list: Annotated["AccessListType", strawberry.lazy("netbox_acls.graphql.types")]
-    destination_prefix: Annotated["PrefixType", strawberry.lazy("ipam.graphql.types")]
-    source_prefix: Annotated["PrefixType", strawberry.lazy("ipam.graphql.types")]
+    destination_prefix: Annotated["PrefixType", strawberry.lazy("ipam.graphql.types")] | None
+    source_prefix: Annotated["PrefixType", strawberry.lazy("ipam.graphql.types")] | None
 
     class Meta:
         """
@@ -101,7 +147,7 @@ class ACLStandardRuleType(OrganizationalObjectType):
     Defines the object type for the django model ACLStandardRule.
     """
     access_list: Annotated["AccessListType", strawberry.lazy("netbox_acls.graphql.types")]
-    source_prefix: Annotated["PrefixType", strawberry.lazy("ipam.graphql.types")]
+    source_prefix: Annotated["PrefixType", strawberry.lazy("ipam.graphql.types")] | None
 
     class Meta:
         """
@@ -111,3 +157,29 @@ class ACLStandardRuleType(OrganizationalObjectType):
         def aclstandardrules(self) -> List[Annotated["ACLStandardRule", strawberry.lazy('aclstandardrule.graphql.types')]]:
             return self.aclstandardrules.all()
 
+
+@strawberry.type
+class DeviceACLBundleType:
+    """
+    Defines the Access Lists of a device, with their rules and interface assignments, at most graphql_max_results of each.
+    """
+
+    @strawberry.field
+    def access_lists(self) -> List[AccessListType]:
+        return _limit_results(self.access_lists)
+
+    @strawberry.field
+    def standard_rules(self) -> List[ACLStandardRuleType]:
+        return _limit_results(self.standard_rules)
+
+    @strawberry.field
+    def extended_rules(self) -> List[ACLExtendedRuleType]:
+        return _limit_results(self.extended_rules)
+
+    @strawberry.field
+    def interface_assignments(self) -> List[ACLInterfaceAssignmentType]:
+        return _limit_results(self.interface_assignments)
+
+    @strawberry.field
+    def device(self) -> Annotated["DeviceType", strawberry.lazy('dcim.graphql.types')]:
+        return self.host
@@ -0,0 +1,677 @@
+"""
+Import Access Lists from the running configuration of Cisco IOS, Cisco NX-OS and Arista EOS hosts.
+
+Configurations are parsed line by line, so that only the Access List being read is held in memory.
+Access Lists and their rules are then created in batches, and the prefixes they refer to are
+resolved with one query per batch through an in-memory index.
+"""
+
+import re
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+import netaddr
+from core.choices import ObjectChangeActionChoices
+from core.models import ObjectChange
+from dcim.models import Device, Interface, VirtualChassis
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from extras.models import CustomField
+from ipam.models import Prefix
+from ipam.utils import rebuild_prefixes
+from netbox.search.backends import search_backend
+from virtualization.models import VirtualMachine, VMInterface
+
+from .cache import delete_assigned_counts
+from .choices import ACLActionChoices, ACLAssignmentDirectionChoices, ACLProtocolChoices, ACLRuleActionChoices, ACLTypeChoices
+from .models import AccessList, ACLExtendedRule, ACLInterfaceAssignment, ACLStandardRule
+
+__all__ = (
+    "ACLConfigImporter",
+    "ACLConfigParser",
+    "ParsedAccessList",
+    "ParsedAssignment",
+    "ParsedRule",
+    "PrefixIndex",
+)
+
+# Ranges of ports are expanded into lists of ports, up to this size
+MAX_RANGE_PORTS = 1024
+# Step between the indexes given to entries without a sequence number
+INDEX_STEP = 10
+
+ACL_HEADER = re.compile(r"^(?P<family>ip|ipv6) access-list (?:(?P<type>standard|extended) )?(?P<name>\S+)\s*$")
+NUMBERED_ACL = re.compile(r"^access-list (?P<number>\d+) (?P<entry>.+)$")
+WILDCARD_MASK = re.compile(r"^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$")
+INTERFACE = re.compile(r"^interface (?P<name>\S+)\s*$")
+ACCESS_GROUP = re.compile(
+    r"^(?:ip access-group|ipv6 access-group|ipv6 traffic-filter) (?P<name>\S+) (?P<direction>in|out)\s*$",
+)
+
+PROTOCOLS = {
+    "ip": "",
+    "ipv6": "",
+    "0": "",
+    "icmp": ACLProtocolChoices.PROTOCOL_ICMP,
+    "icmpv6": ACLProtocolChoices.PROTOCOL_ICMP,
+    "1": ACLProtocolChoices.PROTOCOL_ICMP,
+    "58": ACLProtocolChoices.PROTOCOL_ICMP,
+    "tcp": ACLProtocolChoices.PROTOCOL_TCP,
+    "6": ACLProtocolChoices.PROTOCOL_TCP,
+    "udp": ACLProtocolChoices.PROTOCOL_UDP,
+    "17": ACLProtocolChoices.PROTOCOL_UDP,
+}
+
+# Port names shown in place of numbers by the Cisco and Arista CLIs
+PORT_NAMES = {
+    "bgp": 179,
+    "bootpc": 68,
+    "bootps": 67,
+    "cmd": 514,
+    "domain": 53,
+    "echo": 7,
+    "ftp": 21,
+    "ftp-data": 20,
+    "https": 443,
+    "isakmp": 500,
+    "ldap": 389,
+    "ldaps": 636,
+    "lpd": 515,
+    "netbios-dgm": 138,
+    "netbios-ns": 137,
+    "netbios-ss": 139,
+    "non500-isakmp": 4500,
+    "ntp": 123,
+    "pop3": 110,
+    "radius": 1812,
+    "smtp": 25,
+    "snmp": 161,
+    "snmptrap": 162,
+    "ssh": 22,
+    "syslog": 514,
+    "tacacs": 49,
+    "telnet": 23,
+    "tftp": 69,
+    "www": 80,
+}
+
+# Trailing keywords which do not change which packets an entry matches
+IGNORED_OPTIONS = {"log", "log-input"}
+
+
+class UnsupportedEntry(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class ParsedRule:
+    """
+    An Access List entry, with its prefixes in CIDR notation.
+    """
+
+    index: int
+    action: str
+    remark: str = ""
+    protocol: str = ""
+    source_prefix: Optional[str] = None
+    source_ports: Optional[tuple] = None
+    destination_prefix: Optional[str] = None
+    destination_ports: Optional[tuple] = None
+
+
+@dataclass
+class ParsedAccessList:
+    """
+    An Access List and its entries, in configuration order.
+    """
+
+    name: str
+    type: str
+    rules: list = field(default_factory=list)
+    # Index of the last entry read, including skipped entries
+    last_index: int = 0
+    # IPv4 and IPv6 Access Lists have separate namespaces
+    family: int = 4
+
+
+@dataclass(frozen=True)
+class ParsedAssignment:
+    """
+    An Access List applied to an interface.
+    """
+
+    interface: str
+    access_list: str
+    direction: str
+    family: int = 4
+
+
+@lru_cache(maxsize=65536)
+def _to_prefix(address, wildcard=None):
+    """
+    Return the CIDR notation of a prefix, of a host address, or of an IPv4 address with a wildcard mask.
+    Results are cached, as configurations repeat the same addresses over and over.
+    """
+    try:
+        network = netaddr.IPNetwork(address)
+        hostmask = int(netaddr.IPAddress(wildcard, 4)) if wildcard else None
+    except (netaddr.AddrFormatError, TypeError, ValueError) as exc:
+        raise UnsupportedEntry(f"invalid address ({exc})")
+    if hostmask is None:
+        return str(network.cidr)
+
+    # Wildcard masks must select a contiguous block of addresses to be expressed as a prefix
+    if hostmask & (hostmask + 1):
+        raise UnsupportedEntry(f"non-contiguous wildcard mask {wildcard}")
+    return str(netaddr.IPNetwork(f"{network.ip}/{32 - hostmask.bit_length()}").cidr)
+
+
+def _parse_port(token):
+    if token.isdigit() and int(token) <= 65535:
+        return int(token)
+    return PORT_NAMES.get(token)
+
+
+class ACLConfigParser:
+    """
+    Parse the Access Lists and their interface assignments out of a running configuration.
+
+    parse() yields ParsedAccessList and ParsedAssignment objects as soon as they are read. Entries
+    which cannot be represented by the plugin's rules are skipped, and reported in warnings.
+    """
+
+    def __init__(self):
+        self.warnings = []
+
+    def warn(self, line_number, line, message):
+        self.warnings.append(f"Line {line_number}: {message}: {line.strip()}")
+
+    def parse(self, lines):
+        access_list = None
+        interface = None
+
+        for line_number, line in enumerate(lines, start=1):
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.lstrip().startswith("!"):
+                continue
+
+            # Entries and interface settings are indented under their section
+            if line[0].isspace():
+                if access_list is not None:
+                    self.parse_entry(access_list, line, line_number)
+                elif interface is not None and (match := ACCESS_GROUP.match(line.strip())):
+                    yield ParsedAssignment(
+                        interface=interface,
+                        access_list=match.group("name"),
+                        direction=(
+                            ACLAssignmentDirectionChoices.DIRECTION_INGRESS
+                            if match.group("direction") == "in"
+                            else ACLAssignmentDirectionChoices.DIRECTION_EGRESS
+                        ),
+                        family=6 if line.strip().startswith("ipv6") else 4,
+                    )
+                continue
+
+            # Numbered Access Lists are defined one entry per line
+            if match := NUMBERED_ACL.match(line):
+                name = match.group("number")
+                if access_list is None or access_list.name != name:
+                    if access_list is not None:
+                        yield access_list
+                    access_list = ParsedAccessList(name=name, type=self.numbered_type(int(name)))
+                self.parse_entry(access_list, match.group("entry"), line_number)
+                interface = None
+                continue
+
+            if access_list is not None:
+                yield access_list
+            access_list = interface = None
+
+            if match := ACL_HEADER.match(line):
+                access_list = ParsedAccessList(
+                    name=match.group("name"),
+                    type=ACLTypeChoices.TYPE_STANDARD if match.group("type") == "standard" else ACLTypeChoices.TYPE_EXTENDED,
+                    family=6 if match.group("family") == "ipv6" else 4,
+                )
+            elif match := INTERFACE.match(line):
+                interface = match.group("name")
+
+        if access_list is not None:
+            yield access_list
+
+    @staticmethod
+    def numbered_type(number):
+        if 1 <= number <= 99 or 1300 <= number <= 1999:
+            return ACLTypeChoices.TYPE_STANDARD
+        return ACLTypeChoices.TYPE_EXTENDED
+
+    def parse_entry(self, access_list, line, line_number):
+        tokens = line.split()
+        index = None
+        if tokens[0] == "sequence" and len(tokens) > 1 and tokens[1].isdigit():
+            index, tokens = int(tokens[1]), tokens[2:]
+        elif tokens[0].isdigit():
+            index, tokens = int(tokens[0]), tokens[1:]
+        if not tokens or tokens[0] not in ("permit", "deny", "remark"):
+            # Settings such as "statistics per-entry" or "counters per-entry"
+            return
+        if index is None:
+            index = access_list.last_index + INDEX_STEP
+        access_list.last_index = index
+
+        if tokens[0] == "remark":
+            remark = line.split("remark", 1)[1].strip()
+            access_list.rules.append(ParsedRule(index=index, action=ACLRuleActionChoices.ACTION_REMARK, remark=remark))
+            return
+
+        try:
+            if access_list.type == ACLTypeChoices.TYPE_STANDARD:
+                rule = self.parse_standard_entry(index, tokens)
+            else:
+                rule = self.parse_extended_entry(index, tokens)
+        except UnsupportedEntry as exc:
+            self.warn(line_number, line, f"Skipped entry of {access_list.name} ({exc})")
+        else:
+            access_list.rules.append(rule)
+
+    def parse_standard_entry(self, index, tokens):
+        action = tokens[0]
+        source, position = self.parse_address(tokens, 1, wildcard_optional=True)
+        self.check_options(tokens[position:])
+        return ParsedRule(index=index, action=action, source_prefix=source)
+
+    def parse_extended_entry(self, index, tokens):
+        action = tokens[0]
+        if len(tokens) < 2 or tokens[1] not in PROTOCOLS:
+            raise UnsupportedEntry(f"unsupported protocol {tokens[1] if len(tokens) > 1 else ''!r}")
+        protocol = PROTOCOLS[tokens[1]]
+        source, position = self.parse_address(tokens, 2)
+        source_ports, position = self.parse_ports(tokens, position)
+        destination, position = self.parse_address(tokens, position)
+        destination_ports, position = self.parse_ports(tokens, position)
+        self.check_options(tokens[position:])
+        if (source_ports or destination_ports) and protocol not in (ACLProtocolChoices.PROTOCOL_TCP, ACLProtocolChoices.PROTOCOL_UDP):
+            raise UnsupportedEntry("ports without a TCP or UDP protocol")
+
+        return ParsedRule(
+            index=index,
+            action=action,
+            protocol=protocol,
+            source_prefix=source,
+            source_ports=source_ports,
+            destination_prefix=destination,
+            destination_ports=destination_ports,
+        )
+
+    @staticmethod
+    def parse_address(tokens, position, wildcard_optional=False):
+        """
+        Parse the address at a position, returning its prefix (None for any address) and the next position.
+        """
+        if position >= len(tokens):
+            raise UnsupportedEntry("missing address")
+        token = tokens[position]
+        if token in ("any", "any4", "any6"):
+            return None, position + 1
+        if token == "host":
+            if position + 1 >= len(tokens):
+                raise UnsupportedEntry("missing address")
+            return _to_prefix(tokens[position + 1]), position + 2
+        if "/" in token:
+            return _to_prefix(token), position + 1
+
+        wildcard = tokens[position + 1] if position + 1 < len(tokens) else None
+        if wildcard is not None and WILDCARD_MASK.match(wildcard):
+            return _to_prefix(token, wildcard), position + 2
+        if not wildcard_optional:
+            raise UnsupportedEntry(f"missing wildcard mask after {token}")
+        return _to_prefix(token), position + 1
+
+    @staticmethod
+    def parse_ports(tokens, position):
+        """
+        Parse the port operator at a position, if any, returning the sorted ports and the next position.
+        """
+        if position >= len(tokens) or tokens[position] not in ("eq", "range", "lt", "gt", "neq"):
+            return None, position
+        operator = tokens[position]
+        position += 1
+
+        if operator == "eq":
+            ports = []
+            while position < len(tokens) and (port := _parse_port(tokens[position])) is not None:
+                ports.append(port)
+                position += 1
+            if not ports:
+                raise UnsupportedEntry("unknown port")
+            return tuple(sorted(set(ports))), position
+
+        if operator == "range" and position + 1 < len(tokens):
+            first, last = _parse_port(tokens[position]), _parse_port(tokens[position + 1])
+            if first is not None and last is not None and 0 <= last - first < MAX_RANGE_PORTS:
+                return tuple(range(first, last + 1)), position + 2
+            raise UnsupportedEntry(f"port range larger than {MAX_RANGE_PORTS} ports")
+
+        raise UnsupportedEntry(f"unsupported port operator {operator!r}")
+
+    @staticmethod
+    def check_options(tokens):
+        unsupported = [token for token in tokens if token not in IGNORED_OPTIONS]
+        if unsupported:
+            raise UnsupportedEntry(f"unsupported option {unsupported[0]!r}")
+
+
+class PrefixIndex:
+    """
+    The IDs of the prefixes referred to by imported rules, keyed by their CIDR notation.
+
+    Unknown prefixes are looked up in a single query per call to resolve(). Prefixes in the global
+    table are preferred over those of a VRF, and prefixes which do not exist are created in the global
+    table if allowed. They are created in bulk, which skips their tags, the counters and the search
+    cache updated by signals: the search cache and the prefix hierarchy are updated afterwards.
+    """
+
+    def __init__(self, create=True):
+        self.create = create
+        self.prefixes = {}
+        # Prefixes created, in order
+        self.created = []
+        self.custom_field_defaults = {
+            custom_field.name: custom_field.default for custom_field in CustomField.objects.get_for_model(Prefix)
+        }
+
+    def resolve(self, prefixes):
+        """
+        Make sure the given prefixes are indexed, returning those which do not exist.
+        """
+        unknown = set(prefixes).difference(self.prefixes)
+        if not unknown:
+            return set()
+
+        for pk, prefix, vrf_id in Prefix.objects.filter(prefix__in=unknown).values_list("pk", "prefix", "vrf_id").order_by("pk"):
+            key = str(prefix)
+            if vrf_id is None or key not in self.prefixes:
+                self.prefixes[key] = pk
+        unknown.difference_update(self.prefixes)
+
+        if self.create:
+            created = Prefix.objects.bulk_create(
+                Prefix(prefix=prefix, custom_field_data=dict(self.custom_field_defaults)) for prefix in sorted(unknown)
+            )
+            for prefix in created:
+                self.prefixes[str(prefix.prefix)] = prefix.pk
+            rebuild_prefixes(None)
+            search_backend.cache(created, remove_existing=False)
+            self.created.extend(created)
+            return set()
+        return unknown
+
+    def get(self, prefix):
+        return self.prefixes.get(prefix) if prefix else None
+
+
+class ACLConfigImporter:
+    """
+    Import the Access Lists of a host, along with their rules and interface assignments, from its
+    running configuration. Access Lists which already exist on the host are skipped, or have their
+    rules replaced when replace is set.
+
+    Access Lists share a single namespace per host, whereas IPv4 and IPv6 Access Lists have separate
+    ones on the hosts: of an IPv4 and an IPv6 Access List of the same name, the second one read and
+    its interface assignments are skipped, with a warning. So are assignments to interfaces already
+    assigned another Access List in the same direction.
+
+    Objects are created in bulk, which bypasses the changelog: a single change summarizing the import is
+    recorded on the host instead, when the user importing is given. Callers should run imports within a
+    transaction.
+    """
+
+    def __init__(self, host, batch_size=1000, prefix_index=None, replace=False, user=None):
+        self.host = host
+        self.user = user
+        self.host_type = ContentType.objects.get_for_model(host)
+        self.batch_size = batch_size
+        self.prefix_index = prefix_index or PrefixIndex()
+        self.replace = replace
+        self.stats = Counter()
+        self.warnings = []
+        self.existing = {}
+        self.pending = []
+        # Family of the Access Lists read from the configuration, by name
+        self.families = {}
+        self.custom_field_defaults = {
+            model: {custom_field.name: custom_field.default for custom_field in CustomField.objects.get_for_model(model)}
+            for model in (AccessList, ACLStandardRule, ACLExtendedRule, ACLInterfaceAssignment)
+        }
+
+    def import_config(self, lines):
+        """
+        Import the Access Lists of a running configuration, given as an iterable of lines.
+        Returns the number of objects created, skipped and replaced.
+        """
+        parser = ACLConfigParser()
+        assignments = []
+        self.existing = {
+            access_list.name: access_list
+            for access_list in AccessList.objects.filter(assigned_object_type=self.host_type, assigned_object_id=self.host.pk)
+        }
+
+        created_prefixes = len(self.prefix_index.created)
+
+        for item in parser.parse(lines):
+            if isinstance(item, ParsedAssignment):
+                assignments.append(item)
+            else:
+                self.add_access_list(item)
+        self.flush()
+        self.create_assignments(assignments)
+
+        self.stats["prefixes"] = len(self.prefix_index.created) - created_prefixes
+        self.warnings.extend(parser.warnings)
+        self.stats["warnings"] = len(self.warnings)
+        self.log_change(self.prefix_index.created[created_prefixes:])
+        return dict(self.stats)
+
+    def log_change(self, prefixes):
+        """
+        Record the objects created or replaced by the import in a single change of the host.
+        """
+        if self.user is None:
+            return
+        changes = {key: count for key, count in self.stats.items() if key != "warnings" and count}
+        if not changes:
+            return
+        ObjectChange.objects.create(
+            user=self.user,
+            user_name=self.user.username,
+            request_id=uuid.uuid4(),
+            action=ObjectChangeActionChoices.ACTION_UPDATE,
+            changed_object=self.host,
+            object_repr=str(self.host)[:200],
+            postchange_data={
+                "access_list_import": changes,
+                "created_prefixes": [str(prefix.prefix) for prefix in prefixes],
+            },
+        )
+
+    def add_access_list(self, parsed):
+        try:
+            AccessList._meta.get_field("name").run_validators(parsed.name)
+        except ValidationError as exc:
+            self.warnings.append(f"Skipped Access List {parsed.name}: {' '.join(exc.messages)}")
+            return
+
+        if parsed.name in self.families:
+            self.warnings.append(
+                f"Skipped IPv{parsed.family} Access List {parsed.name}: "
+                f"an IPv{self.families[parsed.name]} Access List of the same name was already read",
+            )
+            return
+        self.families[parsed.name] = parsed.family
+
+        if parsed.name in self.existing:
+            if self.replace:
+                self.replace_rules(self.existing[parsed.name], parsed)
+            else:
+                self.stats["access_lists_skipped"] += 1
+            return
+
+        self.pending.append(parsed)
+        if sum(len(access_list.rules) for access_list in self.pending) >= self.batch_size:
+            self.flush()
+
+    def rule_values(self, access_list, parsed):
+        """
+        Return the field values of a parsed rule, for a rule of the given Access List.
+        """
+        values = {
+            "index": parsed.index,
+            "action": parsed.action,
+            "remark": parsed.remark,
+            "source_prefix_id": self.prefix_index.get(parsed.source_prefix),
+        }
+        if access_list.type == ACLTypeChoices.TYPE_EXTENDED:
+            values.update(
+                protocol=parsed.protocol,
+                source_ports=list(parsed.source_ports) if parsed.source_ports else None,
+                destination_prefix_id=self.prefix_index.get(parsed.destination_prefix),
+                destination_ports=list(parsed.destination_ports) if parsed.destination_ports else None,
+            )
+        return values
+
+    def resolve_prefixes(self, parsed_access_lists):
+        missing = self.prefix_index.resolve(
+            prefix
+            for parsed in parsed_access_lists
+            for rule in parsed.rules
+            for prefix in (rule.source_prefix, rule.destination_prefix)
+            if prefix
+        )
+        if not missing:
+            return
+        for parsed in parsed_access_lists:
+            rules = [rule for rule in parsed.rules if not {rule.source_prefix, rule.destination_prefix} & missing]
+            if len(rules) != len(parsed.rules):
+                self.warnings.append(f"Skipped {len(parsed.rules) - len(rules)} rules of {parsed.name} referring to unknown prefixes")
+                parsed.rules = rules
+
+    def flush(self):
+        """
+        Create the pending Access Lists and their rules.
+        """
+        if not self.pending:
+            return
+        self.resolve_prefixes(self.pending)
+
+        access_lists = AccessList.objects.bulk_create(
+            AccessList(
+                name=parsed.name,
+                assigned_object_type=self.host_type,
+                assigned_object_id=self.host.pk,
+                type=parsed.type,
+                default_action=ACLActionChoices.ACTION_DENY,
+                custom_field_data=dict(self.custom_field_defaults[AccessList]),
+            )
+            for parsed in self.pending
+        )
+        rules = {ACLStandardRule: [], ACLExtendedRule: []}
+        for access_list, parsed in zip(access_lists, self.pending):
+            self.existing[access_list.name] = access_list
+            rule_model = access_list.rule_model
+            rules[rule_model].extend(
+                rule_model(
+                    access_list=access_list,
+                    custom_field_data=dict(self.custom_field_defaults[rule_model]),
+                    **self.rule_values(access_list, rule),
+                )
+                for rule in parsed.rules
+            )
+        for rule_model, model_rules in rules.items():
+            rule_model.objects.bulk_create(model_rules, batch_size=self.batch_size)
+            self.stats["rules"] += len(model_rules)
+
+        AccessList.objects.filter(pk__in=[access_list.pk for access_list in access_lists]).update_rule_counts()
+        # Bulk creates send no signals
+        delete_assigned_counts(AccessList, {(self.host_type.pk, self.host.pk)})
+        self.stats["access_lists"] += len(access_lists)
+        self.pending = []
+
+    def replace_rules(self, access_list, parsed):
+        if access_list.type != parsed.type:
+            self.warnings.append(f"Skipped Access List {parsed.name}: its type differs from the existing one")
+            return
+        self.resolve_prefixes([parsed])
+        access_list.snapshot()
+        changes = access_list.diff_rules(self.rule_values(access_list, rule) for rule in parsed.rules)
+        if any(changes.values()):
+            access_list.apply_rule_changes(changes)
+            access_list.save()
+        self.stats["access_lists_replaced"] += 1
+
+    def get_interfaces(self):
+        if isinstance(self.host, Device):
+            interfaces = Interface.objects.filter(device=self.host)
+        elif isinstance(self.host, VirtualChassis):
+            interfaces = Interface.objects.filter(device__virtual_chassis=self.host)
+        elif isinstance(self.host, VirtualMachine):
+            interfaces = VMInterface.objects.filter(virtual_machine=self.host)
+        else:
+            return {}
+        return {interface.name: interface for interface in interfaces}
+
+    def create_assignments(self, assignments):
+        if not assignments:
+            return
+        interfaces = self.get_interfaces()
+        interface_type = ContentType.objects.get_for_model(VMInterface if isinstance(self.host, VirtualMachine) else Interface)
+        # The Access List assigned to each interface in each direction
+        assigned = {
+            (interface_id, direction): access_list_id
+            for interface_id, direction, access_list_id in ACLInterfaceAssignment.objects.filter(
+                assigned_object_type=interface_type,
+                assigned_object_id__in=[interface.pk for interface in interfaces.values()],
+            ).values_list("assigned_object_id", "direction", "access_list")
+        }
+
+        new_assignments = []
+        for parsed in assignments:
+            interface = interfaces.get(parsed.interface)
+            access_list = self.existing.get(parsed.access_list)
+            if interface is None or access_list is None:
+                missing = f"interface {parsed.interface}" if interface is None else f"Access List {parsed.access_list}"
+                self.warnings.append(f"Skipped assignment of {parsed.access_list} to {parsed.interface}: unknown {missing}")
+                continue
+            if self.families.get(parsed.access_list, parsed.family) != parsed.family:
+                self.warnings.append(
+                    f"Skipped assignment of IPv{parsed.family} Access List {parsed.access_list} to {parsed.interface}: "
+                    f"the Access List of this name is an IPv{self.families[parsed.access_list]} one",
+                )
+                continue
+            key = (interface.pk, parsed.direction)
+            if key in assigned:
+                if assigned[key] != access_list.pk:
+                    self.warnings.append(
+                        f"Skipped assignment of {parsed.access_list} to {parsed.interface}: "
+                        f"the interface already has an Access List assigned in this direction",
+                    )
+                continue
+            assigned[key] = access_list.pk
+            new_assignments.append(
+                ACLInterfaceAssignment(
+                    access_list=access_list,
+                    direction=parsed.direction,
+                    assigned_object_type=interface_type,
+                    assigned_object_id=interface.pk,
+                    custom_field_data=dict(self.custom_field_defaults[ACLInterfaceAssignment]),
+                ),
+            )
+
+        ACLInterfaceAssignment.objects.bulk_create(new_assignments, batch_size=self.batch_size)
+        delete_assigned_counts(
+            ACLInterfaceAssignment,
+            {(assignment.assigned_object_type_id, assignment.assigned_object_id) for assignment in new_assignments},
+        )
+        self.stats["assignments"] += len(new_assignments)
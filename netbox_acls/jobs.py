@@ -0,0 +1,94 @@
+"""
+Background jobs of the plugin.
+"""
+
+import tempfile
+from pathlib import Path
+
+from dcim.models import Device
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from netbox.jobs import JobRunner
+from virtualization.models import VirtualMachine
+
+from .bundles import filter_hosts, write_bundle_archive
+from .importers import ACLConfigImporter, PrefixIndex
+from .snapshots import write_snapshot
+
+__all__ = (
+    "ACLBundleExportJob",
+    "ACLConfigImportJob",
+    "ACLSnapshotJob",
+)
+
+
+class ACLConfigImportJob(JobRunner):
+    """
+    Import the Access Lists of the job's host from its running configuration.
+    The numbers of objects created and the warnings raised are stored in the job data.
+    """
+
+    class Meta:
+        name = "Access List configuration import"
+
+    def run(self, config, replace=False, create_prefixes=True, *args, **kwargs):
+        importer = ACLConfigImporter(
+            self.job.object,
+            prefix_index=PrefixIndex(create=create_prefixes),
+            replace=replace,
+            user=self.job.user,
+        )
+        with transaction.atomic():
+            stats = importer.import_config(config.splitlines())
+        self.job.data = {
+            "stats": stats,
+            "warnings": importer.warnings,
+        }
+
+
+class ACLSnapshotJob(JobRunner):
+    """
+    Write a columnar snapshot of every Access List, rule and interface assignment to the default
+    storage, under netbox_acls/snapshots/<job ID>/. The paths of the files and their numbers of
+    rows are stored in the job data.
+    """
+
+    class Meta:
+        name = "Access List snapshot"
+
+    def run(self, snapshot_format="parquet", *args, **kwargs):
+        files = []
+        with tempfile.TemporaryDirectory() as directory:
+            rows = write_snapshot(directory, snapshot_format)
+            for path in sorted(Path(directory).iterdir()):
+                with path.open("rb") as snapshot:
+                    files.append(default_storage.save(f"netbox_acls/snapshots/{self.job.pk}/{path.name}", File(snapshot)))
+        self.job.data = {
+            "files": files,
+            "rows": rows,
+        }
+
+
+class ACLBundleExportJob(JobRunner):
+    """
+    Write the ACL bundles of the devices and virtual machines of the given sites, regions and roles
+    to a gzipped tarball in the default storage, under netbox_acls/bundles/<job ID>/. The bundle of
+    each host is written as JSON, along with its configuration for each of the given platforms.
+    Bundles are built in parallel by a pool of worker processes. The path of the tarball and the
+    number of hosts are stored in the job data.
+    """
+
+    class Meta:
+        name = "Access List bundle export"
+
+    def run(self, site_ids=None, region_ids=None, role_ids=None, platforms=(), workers=None, *args, **kwargs):
+        hosts = [filter_hosts(model, site_ids, region_ids, role_ids) for model in (Device, VirtualMachine)]
+        with tempfile.TemporaryFile() as archive:
+            count = write_bundle_archive(archive, hosts, platforms, workers)
+            archive.seek(0)
+            path = default_storage.save(f"netbox_acls/bundles/{self.job.pk}/bundles.tar.gz", File(archive))
+        self.job.data = {
+            "file": path,
+            "hosts": count,
+        }
@@ -0,0 +1,121 @@
+"""
+Benchmark the batch evaluation of flows against synthetic Access Lists.
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from netbox_acls.choices import ACLActionChoices, ACLProtocolChoices, ACLRuleActionChoices, ACLTypeChoices
+from netbox_acls.engine import CompiledAccessList, Flow, FlowBatch, VectorizedAccessList, compile_rule
+
+
+class Command(BaseCommand):
+    help = "Report the flows per second evaluated against synthetic extended Access Lists of various sizes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rules",
+            nargs="+",
+            type=int,
+            default=[1000, 10000, 100000],
+            help="Sizes of the Access Lists to benchmark (default: 1000 10000 100000)",
+        )
+        parser.add_argument(
+            "--flows",
+            type=int,
+            default=10000,
+            help="Number of flows to evaluate against each Access List (default: 10000)",
+        )
+        parser.add_argument(
+            "--scalar-flows",
+            type=int,
+            default=200,
+            help="Number of flows evaluated one at a time, for comparison (default: 200, 0 to skip)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+        )
+
+    @staticmethod
+    def synthetic_access_list(size, rng):
+        protocols = (ACLProtocolChoices.PROTOCOL_TCP, ACLProtocolChoices.PROTOCOL_UDP)
+        rules = tuple(
+            compile_rule(
+                pk=None,
+                index=index * 10,
+                action=rng.choice((ACLRuleActionChoices.ACTION_PERMIT, ACLRuleActionChoices.ACTION_DENY)),
+                protocol=rng.choice(protocols),
+                source=f"10.{rng.randrange(256)}.{rng.randrange(256)}.0/24",
+                destination=f"172.{rng.randrange(16, 32)}.0.0/16",
+                destination_ports=rng.sample(range(1, 1024), rng.randint(1, 4)),
+            )
+            for index in range(size)
+        )
+        return CompiledAccessList(
+            pk=None,
+            name=f"benchmark-{size}",
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+            rules=rules,
+        )
+
+    @staticmethod
+    def synthetic_flows(access_list, count, rng):
+        """
+        Generate flows of which about half are aimed at a random rule, the rest being random traffic.
+        """
+        flows = []
+        for _ in range(count):
+            if rng.random() < 0.5:
+                rule = rng.choice(access_list.rules)
+                source = rule.source_range.first + rng.randrange(256)
+                destination = rule.destination_range.first + rng.randrange(65536)
+                protocol, port = rule.protocol.name.lower(), rng.choice(rule.destination_ports)
+            else:
+                source = (10 << 24) + rng.randrange(2**24)
+                destination = (172 << 24) + rng.randrange(2**20)
+                protocol, port = rng.choice(("tcp", "udp")), rng.randrange(1, 65536)
+            flows.append(
+                (
+                    f"{source >> 24}.{source >> 16 & 255}.{source >> 8 & 255}.{source & 255}",
+                    f"{destination >> 24}.{destination >> 16 & 255}.{destination >> 8 & 255}.{destination & 255}",
+                    protocol,
+                    rng.randrange(1024, 65536),
+                    port,
+                ),
+            )
+        return flows
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        for size in options["rules"]:
+            access_list = self.synthetic_access_list(size, rng)
+            records = self.synthetic_flows(access_list, options["flows"], rng)
+
+            try:
+                start = time.perf_counter()
+                vectorized = VectorizedAccessList(access_list)
+                batch = FlowBatch.from_records(records)
+                prepared = time.perf_counter()
+                result = vectorized.evaluate(batch)
+                evaluated = time.perf_counter()
+            except ImportError as exc:
+                raise CommandError(str(exc))
+
+            self.stdout.write(
+                f"{size} rules, {len(batch)} flows: {len(batch) / (evaluated - prepared):,.0f} flows/s "
+                f"(preparation {prepared - start:.2f}s, {result.summary()['default']} flows hit the default action)"
+            )
+
+            if options["scalar_flows"]:
+                flows = [Flow.from_values(*record) for record in records[: options["scalar_flows"]]]
+                start = time.perf_counter()
+                for flow in flows:
+                    access_list.evaluate(flow)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"  one flow at a time: {len(flows) / elapsed:,.0f} flows/s")
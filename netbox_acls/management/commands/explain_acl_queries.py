@@ -0,0 +1,87 @@
+"""
+Show the query plans of the plugin's main filter and search paths, with and without its indexes.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from netbox_acls.choices import ACLProtocolChoices, ACLRuleActionChoices
+from netbox_acls.filtersets import AccessListFilterSet, ACLExtendedRuleFilterSet, ACLStandardRuleFilterSet
+from netbox_acls.models import AccessList, ACLExtendedRule, ACLStandardRule
+
+# The prefix filters rely on the indexes NetBox declares on its prefixes, which are left in place.
+INDEXED_MODELS = (AccessList, ACLStandardRule, ACLExtendedRule)
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the query plans of the Access List and ACL rule searches and filters. With --compare, the plans "
+        "are printed again with the plugin's indexes dropped in a transaction which is rolled back, which locks "
+        "the plugin's tables meanwhile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--search",
+            default="web",
+            help="Value searched for (default: web)",
+        )
+        parser.add_argument(
+            "--port",
+            type=int,
+            default=443,
+            help="Destination port filtered on (default: 443)",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="10.0.0.0/8",
+            help="Network whose overlapping rules are filtered (default: 10.0.0.0/8)",
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Run the queries, to report their actual timings",
+        )
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Also print the plans without the plugin's indexes",
+        )
+
+    def get_queries(self, options):
+        access_list = AccessList.objects.order_by("pk").first()
+        queries = {
+            "Access List search": AccessListFilterSet({"q": options["search"]}).qs,
+            "Standard rule search": ACLStandardRuleFilterSet({"q": options["search"]}).qs,
+            "Extended rule search": ACLExtendedRuleFilterSet({"q": options["search"]}).qs,
+            "Extended rules by protocol": ACLExtendedRule.objects.filter(protocol=ACLProtocolChoices.PROTOCOL_UDP),
+            "Extended rules by destination port": ACLExtendedRuleFilterSet({"destination_port": [options["port"]]}).qs,
+            "Extended rules overlapping a prefix": ACLExtendedRuleFilterSet({"overlaps": options["prefix"]}).qs,
+        }
+        if access_list is not None:
+            queries["Extended rules of an Access List by action"] = ACLExtendedRule.objects.filter(
+                access_list=access_list,
+                action=ACLRuleActionChoices.ACTION_DENY,
+            )
+        return queries
+
+    def explain(self, options):
+        for title, queryset in self.get_queries(options).items():
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(queryset.explain(analyze=options["analyze"]))
+            self.stdout.write("")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS("With the plugin's indexes"))
+        self.explain(options)
+        if not options["compare"]:
+            return
+
+        self.stdout.write(self.style.SUCCESS("Without the plugin's indexes"))
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for model in INDEXED_MODELS:
+                    for index in model._meta.indexes:
+                        cursor.execute(f"DROP INDEX IF EXISTS {connection.ops.quote_name(index.name)}")
+            self.explain(options)
+            transaction.set_rollback(True)
@@ -0,0 +1,103 @@
+"""
+Write the ACL bundles of a set of hosts to a tarball.
+"""
+
+from dcim.models import Device, DeviceRole, Region, Site
+from django.core.management.base import BaseCommand, CommandError
+from virtualization.models import VirtualMachine
+
+from netbox_acls.bundles import CHUNK_SIZE, filter_hosts, write_bundle_archive
+from netbox_acls.choices import ACLRenderPlatformChoices
+from netbox_acls.jobs import ACLBundleExportJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the ACL bundles of the devices and virtual machines of the given sites, regions and roles to a "
+        "gzipped tarball, as JSON and optionally as configuration, building them in parallel in worker processes, "
+        "or schedule a background job writing the tarball to the default storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            help="Path of the tarball to write",
+        )
+        parser.add_argument(
+            "--site",
+            action="append",
+            default=[],
+            help="Slug of a site whose hosts are exported (may be repeated)",
+        )
+        parser.add_argument(
+            "--region",
+            action="append",
+            default=[],
+            help="Slug of a region whose hosts are exported, including its child regions (may be repeated)",
+        )
+        parser.add_argument(
+            "--role",
+            action="append",
+            default=[],
+            help="Slug of a device role whose hosts are exported (may be repeated)",
+        )
+        parser.add_argument(
+            "--platform",
+            action="append",
+            default=[],
+            choices=ACLRenderPlatformChoices.values(),
+            help="Platform whose configuration is also written for each host (may be repeated)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Number of worker processes (default: the number of CPUs)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help=f"Number of hosts handed to a worker process at once (default: {CHUNK_SIZE})",
+        )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Enqueue a background job writing the tarball to the default storage instead",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            help="With --background, repeat the job every given number of minutes",
+        )
+
+    def get_ids(self, model, slugs):
+        ids = list(model.objects.filter(slug__in=slugs).values_list("pk", flat=True))
+        if len(ids) != len(set(slugs)):
+            raise CommandError(f"Unknown {model._meta.verbose_name} in: {', '.join(slugs)}")
+        return ids
+
+    def handle(self, *args, **options):
+        filters = {
+            "site_ids": self.get_ids(Site, options["site"]),
+            "region_ids": self.get_ids(Region, options["region"]),
+            "role_ids": self.get_ids(DeviceRole, options["role"]),
+        }
+        if options["background"]:
+            filters.update(platforms=options["platform"], workers=options["workers"])
+            # enqueue_once() matches a pending job by name only, so it is reserved to the recurring job
+            if options["interval"]:
+                job = ACLBundleExportJob.enqueue_once(interval=options["interval"], **filters)
+            else:
+                job = ACLBundleExportJob.enqueue(**filters)
+            self.stdout.write(f"Enqueued job {job.pk}")
+            return
+        if not options["path"]:
+            raise CommandError("A path is required, unless --background is given.")
+        if options["interval"]:
+            raise CommandError("--interval requires --background.")
+
+        hosts = [filter_hosts(model, **filters) for model in (Device, VirtualMachine)]
+        with open(options["path"], "wb") as archive:
+            count = write_bundle_archive(archive, hosts, options["platform"], options["workers"], options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote the bundles of {count} hosts to {options['path']}"))
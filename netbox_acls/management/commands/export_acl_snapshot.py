@@ -0,0 +1,68 @@
+"""
+Write columnar snapshots of the Access Lists, their rules and interface assignments.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from netbox_acls.jobs import ACLSnapshotJob
+from netbox_acls.snapshots import BATCH_SIZE, SNAPSHOT_FORMATS, write_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every Access List, ACL rule and interface assignment to a directory as Parquet or Arrow IPC files, "
+        "one per table, or schedule a background job writing them to the default storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "directory",
+            nargs="?",
+            help="Directory to write the files to",
+        )
+        parser.add_argument(
+            "--format",
+            choices=SNAPSHOT_FORMATS,
+            default="parquet",
+            dest="snapshot_format",
+            help="Format of the files (default: parquet)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help=f"Number of rows written at once (default: {BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Enqueue a background job writing the files to the default storage instead",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            help="With --background, repeat the job every given number of minutes",
+        )
+
+    def handle(self, *args, **options):
+        if options["background"]:
+            # enqueue_once() matches a pending job by name only, so it is reserved to the recurring job
+            if options["interval"]:
+                job = ACLSnapshotJob.enqueue_once(interval=options["interval"], snapshot_format=options["snapshot_format"])
+            else:
+                job = ACLSnapshotJob.enqueue(snapshot_format=options["snapshot_format"])
+            self.stdout.write(f"Enqueued job {job.pk}")
+            return
+        if not options["directory"]:
+            raise CommandError("A directory is required, unless --background is given.")
+        if options["interval"]:
+            raise CommandError("--interval requires --background.")
+
+        try:
+            rows = write_snapshot(options["directory"], options["snapshot_format"], options["batch_size"])
+        except ImportError as exc:
+            raise CommandError(str(exc))
+
+        for table, count in rows.items():
+            self.stdout.write(f"{table}: {count} rows")
+        self.stdout.write(self.style.SUCCESS(f"Wrote the snapshot to {options['directory']}"))
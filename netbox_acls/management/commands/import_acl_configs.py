@@ -0,0 +1,119 @@
+"""
+Import the Access Lists of hosts from their running configurations.
+"""
+
+from pathlib import Path
+
+from dcim.models import Device
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from virtualization.models import VirtualMachine
+
+from netbox_acls.importers import ACLConfigImporter, PrefixIndex
+from netbox_acls.jobs import ACLConfigImportJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the Access Lists, rules and interface assignments of Cisco IOS, Cisco NX-OS and Arista EOS hosts "
+        "from their running configurations. Each file is imported for the device named after it, unless a host is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="+",
+            help="Running configuration files, named after their device (e.g. router1.cfg)",
+        )
+        host = parser.add_mutually_exclusive_group()
+        host.add_argument(
+            "--device",
+            help="Name of the device to import every file for",
+        )
+        host.add_argument(
+            "--virtual-machine",
+            help="Name of the virtual machine to import every file for",
+        )
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Replace the rules of the Access Lists which already exist, instead of skipping them",
+        )
+        parser.add_argument(
+            "--no-create-prefixes",
+            action="store_false",
+            dest="create_prefixes",
+            help="Skip the rules referring to prefixes which do not exist, instead of creating them",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rules created at once (default: 1000)",
+        )
+        parser.add_argument(
+            "--user",
+            help="Name of the user the import is recorded for in the changelog of each host",
+        )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Enqueue a background job per file instead of importing them right away",
+        )
+
+    def get_host(self, path, options):
+        try:
+            if options["virtual_machine"]:
+                return VirtualMachine.objects.get(name=options["virtual_machine"])
+            return Device.objects.get(name=options["device"] or path.stem)
+        except (Device.DoesNotExist, Device.MultipleObjectsReturned) as exc:
+            raise CommandError(f"{path}: {exc}")
+        except (VirtualMachine.DoesNotExist, VirtualMachine.MultipleObjectsReturned) as exc:
+            raise CommandError(f"{path}: {exc}")
+
+    def get_user(self, options):
+        if not options["user"]:
+            return None
+        try:
+            return get_user_model().objects.get(username=options["user"])
+        except get_user_model().DoesNotExist as exc:
+            raise CommandError(f"{options['user']}: {exc}")
+
+    def handle(self, *args, **options):
+        prefix_index = PrefixIndex(create=options["create_prefixes"])
+        user = self.get_user(options)
+
+        for path in map(Path, options["paths"]):
+            host = self.get_host(path, options)
+
+            if options["background"]:
+                job = ACLConfigImportJob.enqueue(
+                    instance=host,
+                    config=path.read_text(),
+                    replace=options["replace"],
+                    create_prefixes=options["create_prefixes"],
+                    user=user,
+                )
+                self.stdout.write(f"{path}: enqueued job {job.pk} for {host}")
+                continue
+
+            importer = ACLConfigImporter(
+                host,
+                batch_size=options["batch_size"],
+                prefix_index=prefix_index,
+                replace=options["replace"],
+                user=user,
+            )
+            with transaction.atomic(), path.open() as lines:
+                stats = importer.import_config(lines)
+
+            for warning in importer.warnings:
+                self.stderr.write(f"{path}: {warning}")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{path}: imported {stats.get('access_lists', 0)} Access Lists, {stats.get('rules', 0)} rules, "
+                    f"{stats.get('assignments', 0)} assignments and {stats.get('prefixes', 0)} prefixes for {host} "
+                    f"({stats.get('access_lists_skipped', 0)} skipped, {stats.get('access_lists_replaced', 0)} replaced)"
+                ),
+            )
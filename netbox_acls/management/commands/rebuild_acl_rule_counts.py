@@ -0,0 +1,27 @@
+"""
+Rebuild the cached rule counts of Access Lists.
+"""
+
+from django.core.management.base import BaseCommand
+
+from netbox_acls.models import AccessList
+
+
+class Command(BaseCommand):
+    help = "Recalculate the cached standard and extended rule counts of Access Lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "access_lists",
+            nargs="*",
+            type=int,
+            help="IDs of the Access Lists to recalculate (default: all)",
+        )
+
+    def handle(self, *args, **options):
+        access_lists = AccessList.objects.all()
+        if options["access_lists"]:
+            access_lists = access_lists.filter(pk__in=options["access_lists"])
+
+        count = access_lists.update_rule_counts()
+        self.stdout.write(self.style.SUCCESS(f"Recalculated rule counts for {count} Access Lists."))
@@ -0,0 +1,67 @@
+# Generated by Django 5.0.9 on 2026-10-17 09:00
+
+import utilities.fields
+from django.db import migrations, models
+from django.db.models import F, Func, OuterRef, Subquery
+
+
+def populate_rule_counts(apps, schema_editor):
+    AccessList = apps.get_model("netbox_acls", "AccessList")
+    ACLStandardRule = apps.get_model("netbox_acls", "ACLStandardRule")
+    ACLExtendedRule = apps.get_model("netbox_acls", "ACLExtendedRule")
+
+    def count_rules(rule_model):
+        rules = (
+            rule_model.objects.filter(access_list=OuterRef("pk"))
+            .order_by()
+            .annotate(count=Func(F("pk"), function="COUNT"))
+            .values("count")
+        )
+        return Subquery(rules, output_field=models.BigIntegerField())
+
+    AccessList.objects.update(
+        standard_rule_count=count_rules(ACLStandardRule),
+        extended_rule_count=count_rules(ACLExtendedRule),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_acls", "0004_netbox_acls"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accesslist",
+            name="standard_rule_count",
+            field=utilities.fields.CounterCacheField(
+                db_index=True,
+                default=0,
+                to_field="access_list",
+                to_model="netbox_acls.ACLStandardRule",
+                verbose_name="Standard Rule Count",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accesslist",
+            name="extended_rule_count",
+            field=utilities.fields.CounterCacheField(
+                db_index=True,
+                default=0,
+                to_field="access_list",
+                to_model="netbox_acls.ACLExtendedRule",
+                verbose_name="Extended Rule Count",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="accesslist",
+            index=models.Index(
+                models.F("standard_rule_count") + models.F("extended_rule_count"),
+                name="acl_accesslist_rule_count",
+            ),
+        ),
+        migrations.RunPython(
+            code=populate_rule_counts,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
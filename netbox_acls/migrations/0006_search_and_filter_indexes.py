@@ -0,0 +1,50 @@
+# Generated by Django 5.0.9 on 2026-10-17 12:00
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_acls", "0005_accesslist_rule_counts"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="accesslist",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper("name"), name="gin_trgm_ops"),
+                name="acl_accesslist_name_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="accesslist",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper("comments"), name="gin_trgm_ops"),
+                name="acl_accesslist_comments_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="aclstandardrule",
+            index=models.Index(fields=["access_list", "action"], name="acl_stdrule_action"),
+        ),
+        migrations.AddIndex(
+            model_name="aclextendedrule",
+            index=models.Index(fields=["access_list", "action"], name="acl_extrule_action"),
+        ),
+        migrations.AddIndex(
+            model_name="aclextendedrule",
+            index=models.Index(fields=["protocol"], name="acl_extrule_protocol"),
+        ),
+        migrations.AddIndex(
+            model_name="aclextendedrule",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["source_ports"], name="acl_extrule_src_ports"),
+        ),
+        migrations.AddIndex(
+            model_name="aclextendedrule",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["destination_ports"], name="acl_extrule_dst_ports"),
+        ),
+    ]
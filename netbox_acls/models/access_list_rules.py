@@ -4,9 +4,11 @@ Define the django models for this plugin.
 
 from django.apps import apps
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.urls import reverse
 from netbox.models import NetBoxModel
+from utilities.tracking import TrackingModelMixin
 
 from ..choices import ACLProtocolChoices, ACLRuleActionChoices, ACLTypeChoices
 from .access_lists import AccessList
@@ -18,7 +20,7 @@ __all__ = (
 )
 
 
-class ACLRule(NetBoxModel):
+class ACLRule(NetBoxModel, TrackingModelMixin):
     """
     Abstract model for ACL Rules.
     Inherrited by both ACLStandardRule and ACLExtendedRule.
@@ -107,8 +109,12 @@ class ACLStandardRule(ACLRule):
           - default_related_name for any FK relationships
           - verbose name (for displaying in the GUI)
           - verbose name plural (for displaying in the GUI)
+          - indexes backing the filters of the rules
         """
 
+        indexes = [
+            models.Index(fields=["access_list", "action"], name="acl_stdrule_action"),
+        ]
         verbose_name = "ACL Standard Rule"
         verbose_name_plural = "ACL Standard Rules"
 
@@ -172,7 +178,14 @@ class ACLExtendedRule(ACLRule):
           - default_related_name for any FK relationships
           - verbose name (for displaying in the GUI)
           - verbose name plural (for displaying in the GUI)
+          - indexes backing the filters of the rules
         """
 
+        indexes = [
+            models.Index(fields=["access_list", "action"], name="acl_extrule_action"),
+            models.Index(fields=["protocol"], name="acl_extrule_protocol"),
+            GinIndex(fields=["source_ports"], name="acl_extrule_src_ports"),
+            GinIndex(fields=["destination_ports"], name="acl_extrule_dst_ports"),
+        ]
         verbose_name = "ACL Extended Rule"
         verbose_name_plural = "ACL Extended Rules"
@@ -3,12 +3,20 @@ Define the django models for this plugin.
 """
 
 from dcim.models import Device, Interface, VirtualChassis
+from django.apps import apps
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models import F, Func, OuterRef, Subquery
+from django.db.models.functions import Upper
 from django.urls import reverse
+from django.utils import timezone
+from extras.models import CustomField
 from netbox.models import NetBoxModel
+from utilities.fields import CounterCacheField
+from utilities.querysets import RestrictedQuerySet
 from virtualization.models import VirtualMachine, VMInterface
 
 from ..choices import ACLActionChoices, ACLAssignmentDirectionChoices, ACLTypeChoices
@@ -16,6 +24,7 @@ from ..constants import ACL_HOST_ASSIGNMENT_MODELS, ACL_INTERFACE_ASSIGNMENT_MOD
 
 __all__ = (
     "AccessList",
+    "AccessListQuerySet",
     "ACLInterfaceAssignment",
 )
 
@@ -26,6 +35,44 @@ alphanumeric_plus = RegexValidator(
 )
 
 
+class AccessListQuerySet(RestrictedQuerySet):
+    """
+    QuerySet for the AccessList model.
+    """
+
+    def annotate_rule_counts(self):
+        """
+        Annotate each AccessList with rule_count, the sum of its cached standard and extended rule counts.
+        """
+        return self.annotate(
+            rule_count=F("standard_rule_count") + F("extended_rule_count"),
+        )
+
+    def update_rule_counts(self):
+        """
+        Recalculate the cached rule counters of every AccessList in the QuerySet.
+
+        Each rule type is counted by its own correlated subquery. Joining both rule tables
+        in a single Count() multiplies the rows of one by the other, which is both slow and
+        wrong as soon as an Access List has rules of both types.
+        """
+        return self.update(
+            standard_rule_count=self._rule_count_subquery("ACLStandardRule"),
+            extended_rule_count=self._rule_count_subquery("ACLExtendedRule"),
+        )
+
+    @staticmethod
+    def _rule_count_subquery(model_name):
+        rule_model = apps.get_model("netbox_acls", model_name)
+        rules = (
+            rule_model.objects.filter(access_list=OuterRef("pk"))
+            .order_by()
+            .annotate(count=Func(F("pk"), function="COUNT"))
+            .values("count")
+        )
+        return Subquery(rules, output_field=models.BigIntegerField())
+
+
 class AccessList(NetBoxModel):
     """
     Model defintion for Access Lists.
@@ -59,14 +106,39 @@ class AccessList(NetBoxModel):
         blank=True,
     )
 
+    # Cached rule counts, maintained by the counter signal handlers
+    standard_rule_count = CounterCacheField(
+        to_model="netbox_acls.ACLStandardRule",
+        to_field="access_list",
+        db_index=True,
+        verbose_name="Standard Rule Count",
+    )
+    extended_rule_count = CounterCacheField(
+        to_model="netbox_acls.ACLExtendedRule",
+        to_field="access_list",
+        db_index=True,
+        verbose_name="Extended Rule Count",
+    )
+
     clone_fields = (
         "type",
         "default_action",
     )
 
+    objects = AccessListQuerySet.as_manager()
+
     class Meta:
         unique_together = ["assigned_object_type", "assigned_object_id", "name"]
         ordering = ["assigned_object_type", "assigned_object_id", "name"]
+        indexes = [
+            models.Index(
+                F("standard_rule_count") + F("extended_rule_count"),
+                name="acl_accesslist_rule_count",
+            ),
+            # Trigram indexes backing the case-insensitive search, which compares upper-cased values
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="acl_accesslist_name_trgm"),
+            GinIndex(OpClass(Upper("comments"), name="gin_trgm_ops"), name="acl_accesslist_comments_trgm"),
+        ]
         verbose_name = "Access List"
         verbose_name_plural = "Access Lists"
 
@@ -83,6 +155,78 @@ class AccessList(NetBoxModel):
     def get_default_action_color(self):
         return ACLActionChoices.colors.get(self.default_action)
 
+    @property
+    def rule_model(self):
+        """
+        Return the model of the rules of the Access List, according to its type.
+        """
+        if self.type == ACLTypeChoices.TYPE_EXTENDED:
+            return apps.get_model("netbox_acls", "ACLExtendedRule")
+        return apps.get_model("netbox_acls", "ACLStandardRule")
+
+    def diff_rules(self, rules):
+        """
+        Compare rules, an iterable of dicts of rule field values including their index, to the rules
+        of the Access List. Rules are matched by index; returns the rules to create, the rules to update
+        with their new values set, and the rules to delete, in a dict.
+        """
+        rule_model = self.rule_model
+        existing = {rule.index: rule for rule in rule_model.objects.filter(access_list=self)}
+        custom_field_defaults = {field.name: field.default for field in CustomField.objects.get_for_model(rule_model)}
+        now = timezone.now()
+        created, updated = [], []
+
+        for values in rules:
+            values = {rule_model._meta.get_field(name).attname: value for name, value in values.items()}
+            rule = existing.pop(values["index"], None)
+            if rule is None:
+                created.append(rule_model(access_list=self, custom_field_data=dict(custom_field_defaults), **values))
+            elif any(getattr(rule, name) != value for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(rule, name, value)
+                rule.last_updated = now
+                updated.append(rule)
+
+        return {
+            "created": created,
+            "updated": updated,
+            "deleted": list(existing.values()),
+        }
+
+    def apply_rule_changes(self, changes):
+        """
+        Write the rule changes returned by diff_rules(), creating and updating rules in bulk, and
+        refresh the rule counters of the Access List.
+
+        Rules are written without the model signals, so that the rule counters are refreshed and the
+        Access List touched once rather than per rule: callers must run this within a transaction and
+        then save the Access List, which records the change of its rules in its own changelog and bumps
+        its last_updated timestamp. The tags and other generic relations of deleted rules are deleted
+        along with them.
+        """
+        rule_model = self.rule_model
+        fields = [
+            field.attname
+            for field in rule_model._meta.concrete_fields
+            if field.name not in ("id", "access_list", "index", "created", "custom_field_data")
+        ]
+
+        if changes["deleted"]:
+            deleted = rule_model.objects.filter(pk__in=[rule.pk for rule in changes["deleted"]])
+            # Tags, journal entries and other generic relations, which the database does not cascade
+            for field in rule_model._meta.get_fields():
+                if hasattr(field, "bulk_related_objects"):
+                    field.bulk_related_objects(changes["deleted"]).delete()
+            # A single DELETE query, which sends no signals
+            deleted._raw_delete(deleted.db)
+        if changes["updated"]:
+            rule_model.objects.bulk_update(changes["updated"], fields=fields, batch_size=1000)
+        if changes["created"]:
+            rule_model.objects.bulk_create(changes["created"], batch_size=1000)
+
+        AccessList.objects.filter(pk=self.pk).update_rule_counts()
+        self.refresh_from_db(fields=("standard_rule_count", "extended_rule_count"))
+
     def get_type_color(self):
         return ACLTypeChoices.colors.get(self.type)
 
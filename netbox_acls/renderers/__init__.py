@@ -0,0 +1,9 @@
+# flake8: noqa
+"""
+Import each of the directory's scripts.
+"""
+
+from .base import *
+from .cisco import *
+from .junos import *
+from .nftables import *
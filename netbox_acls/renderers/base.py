@@ -0,0 +1,123 @@
+"""
+Render Access Lists and their interface assignments into the configuration syntax of network platforms.
+
+Rendering the rules of an Access List is the costly part, so it is cached for the Access List's
+current version; interface assignments are rendered on every call, being few and cheap to query.
+Callers which already loaded the rules and assignments of Access Lists may pass them instead.
+"""
+
+from ..cache import get_or_set
+from ..choices import ACLActionChoices, ACLAssignmentDirectionChoices, ACLRuleActionChoices
+from ..engine import get_compiled_access_list
+
+__all__ = (
+    "Renderer",
+    "get_renderer",
+    "register_renderer",
+    "render_access_list",
+)
+
+RENDERERS = {}
+
+
+def register_renderer(cls):
+    """
+    Register a Renderer class for its platform.
+    """
+    RENDERERS[cls.platform] = cls
+    return cls
+
+
+def get_renderer(platform):
+    """
+    Return the Renderer for an ACLRenderPlatformChoices value.
+    """
+    try:
+        return RENDERERS[platform]()
+    except KeyError:
+        raise ValueError(f"No renderer available for platform {platform!r}.")
+
+
+def render_access_list(access_list, platform, rules=None, assignments=None):
+    """
+    Return the configuration of an AccessList and its interface assignments for a platform.
+    """
+    return get_renderer(platform).render(access_list, rules, assignments)
+
+
+class Renderer:
+    """
+    Base class of the platform renderers. Subclasses implement render_rules() and render_assignments().
+    """
+
+    platform = None
+    # The keywords of the rule actions, and of the default actions of Access Lists
+    actions = {
+        ACLRuleActionChoices.ACTION_PERMIT: "permit",
+        ACLRuleActionChoices.ACTION_DENY: "deny",
+    }
+    default_actions = {
+        ACLActionChoices.ACTION_PERMIT: "permit",
+        ACLActionChoices.ACTION_DENY: "deny",
+        ACLActionChoices.ACTION_REJECT: "deny",
+    }
+    directions = {
+        ACLAssignmentDirectionChoices.DIRECTION_INGRESS: "in",
+        ACLAssignmentDirectionChoices.DIRECTION_EGRESS: "out",
+    }
+
+    def render(self, access_list, rules=None, assignments=None):
+        """
+        Return the configuration of an AccessList and its interface assignments. Unless given, the
+        assignments are queried, and so are the rules when their rendering is not cached; given rules
+        must be every rule of the Access List, with its prefixes.
+        """
+        versions, config = get_or_set(f"render:{self.platform}", access_list, lambda instance: self._render_rules(instance, rules))
+        if assignments is None:
+            assignments = access_list.aclinterfaceassignment_set.prefetch_related("assigned_object")
+        lines = self.render_assignments(access_list, assignments, versions)
+        return config + "".join(f"{line}\n" for line in lines)
+
+    def _render_rules(self, access_list, rules=None):
+        compiled = get_compiled_access_list(access_list, rules)
+        return self.families(compiled), self.render_rules(compiled)
+
+    def render_rules(self, compiled):
+        """
+        Return the configuration of a CompiledAccessList and its rules, ending with a newline.
+        """
+        raise NotImplementedError
+
+    def render_assignments(self, access_list, assignments, versions):
+        """
+        Return the configuration lines applying an AccessList, whose rules apply to the given
+        IP versions, to the interfaces it is assigned to.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def families(compiled):
+        """
+        Return the IP versions the rules of a CompiledAccessList apply to, IPv4 when none has a prefix.
+        """
+        versions = {
+            address_range.version
+            for rule in compiled.rules
+            for address_range in (rule.source_range, rule.destination_range)
+            if address_range is not None
+        }
+        return sorted(versions) or [4]
+
+    @staticmethod
+    def family_rules(compiled, version):
+        """
+        Return the rules of a CompiledAccessList applying to an IP version, including remarks and rules without prefixes.
+        """
+        return [
+            rule
+            for rule in compiled.rules
+            if all(
+                address_range is None or address_range.version == version
+                for address_range in (rule.source_range, rule.destination_range)
+            )
+        ]
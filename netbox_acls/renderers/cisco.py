@@ -0,0 +1,167 @@
+"""
+Render Access Lists for Cisco IOS, Cisco NX-OS and Arista EOS, which share most of their syntax.
+"""
+
+from itertools import product
+
+import netaddr
+
+from ..choices import ACLRenderPlatformChoices, ACLTypeChoices
+from .base import Renderer, register_renderer
+
+__all__ = (
+    "AristaEOSRenderer",
+    "CiscoIOSRenderer",
+    "CiscoNXOSRenderer",
+)
+
+
+def _chunks(ports, size):
+    """
+    Split ports into groups of at most size ports. No ports make a single empty group.
+    """
+    if not ports:
+        return [()]
+    return [ports[start : start + size] for start in range(0, len(ports), size)]
+
+
+class CiscoRenderer(Renderer):
+    """
+    Base class of the renderers of Cisco-like syntax. Attributes are keyed by IP version.
+
+    Entries are numbered after the rule indexes, unless a rule lists more ports than a single
+    entry can hold; all entries of the list are then left for the platform to number in order.
+    """
+
+    # Access List headers; None when the platform has no standard Access Lists for the IP version
+    standard_headers = {4: None, 6: None}
+    extended_headers = {4: "ip access-list", 6: "ipv6 access-list"}
+    access_groups = {4: "ip access-group", 6: "ipv6 access-group"}
+    any_protocol = {4: "ip", 6: "ipv6"}
+    icmp = {4: "icmp", 6: "icmp"}
+    sequence_formats = {4: "{index} ", 6: "{index} "}
+    # Maximum number of ports matched by a single "eq" operator
+    max_ports = {4: 10, 6: 10}
+    host_keyword = True
+    wildcard_masks = False
+
+    def address(self, prefix, version):
+        if prefix is None:
+            return "any"
+        network = netaddr.IPNetwork(prefix)
+        if self.host_keyword and network.size == 1:
+            return f"host {network.ip}"
+        if self.wildcard_masks and version == 4:
+            return f"{network.network} {network.hostmask}"
+        return str(network.cidr)
+
+    def protocol(self, rule, version):
+        if not rule.protocol:
+            return self.any_protocol[version]
+        if rule.protocol.name == "ICMP":
+            return self.icmp[version]
+        return rule.protocol.name.lower()
+
+    @staticmethod
+    def ports(ports):
+        return f" eq {' '.join(map(str, ports))}" if ports else ""
+
+    def entries(self, rule, version, standard):
+        """
+        Return the entries rendering a rule, without their sequence numbers.
+        """
+        if rule.is_remark:
+            return [f"remark {rule.remark}"]
+
+        action = self.actions[rule.action]
+        source = self.address(rule.source, version)
+        if standard:
+            return [f"{action} {source}"]
+
+        # Ports can only be matched along with a protocol, so rules with ports but no protocol
+        # are rendered as a TCP and a UDP entry
+        if not rule.protocol and (rule.source_ports or rule.destination_ports):
+            protocols = ("tcp", "udp")
+        else:
+            protocols = (self.protocol(rule, version),)
+        destination = self.address(rule.destination, version)
+        return [
+            f"{action} {protocol} {source}{self.ports(source_ports)} {destination}{self.ports(destination_ports)}"
+            for protocol, source_ports, destination_ports in product(
+                protocols,
+                _chunks(rule.source_ports, self.max_ports[version]),
+                _chunks(rule.destination_ports, self.max_ports[version]),
+            )
+        ]
+
+    def render_rules(self, compiled):
+        lines = []
+        for version in self.families(compiled):
+            standard = compiled.type == ACLTypeChoices.TYPE_STANDARD and self.standard_headers[version] is not None
+            header = self.standard_headers[version] if standard else self.extended_headers[version]
+            rules = [
+                (rule, self.entries(rule, version, standard)) for rule in self.family_rules(compiled, version)
+            ]
+            numbered = all(len(entries) == 1 for _, entries in rules)
+
+            lines.append(f"{header} {compiled.name}")
+            for rule, entries in rules:
+                sequence = self.sequence_formats[version].format(index=rule.index) if numbered else ""
+                lines.extend(f" {sequence}{entry}" for entry in entries)
+
+            default_action = self.default_actions[compiled.default_action]
+            if standard:
+                lines.append(f" {default_action} any")
+            else:
+                lines.append(f" {default_action} {self.any_protocol[version]} any any")
+
+        return "".join(f"{line}\n" for line in lines)
+
+    def render_assignments(self, access_list, assignments, versions):
+        lines = []
+        for assignment in assignments:
+            if assignment.assigned_object is None:
+                continue
+            lines.append(f"interface {assignment.assigned_object.name}")
+            for version in versions:
+                lines.append(f" {self.access_groups[version]} {access_list.name} {self.directions[assignment.direction]}")
+        return lines
+
+
+@register_renderer
+class CiscoIOSRenderer(CiscoRenderer):
+    """
+    Cisco IOS and IOS XE. IPv6 Access Lists match a single port per entry and number their entries
+    with the sequence keyword.
+    """
+
+    platform = ACLRenderPlatformChoices.PLATFORM_CISCO_IOS
+    standard_headers = {4: "ip access-list standard", 6: None}
+    extended_headers = {4: "ip access-list extended", 6: "ipv6 access-list"}
+    access_groups = {4: "ip access-group", 6: "ipv6 traffic-filter"}
+    sequence_formats = {4: "{index} ", 6: "sequence {index} "}
+    max_ports = {4: 10, 6: 1}
+    wildcard_masks = True
+
+
+@register_renderer
+class CiscoNXOSRenderer(CiscoRenderer):
+    """
+    Cisco NX-OS, which has no standard Access Lists and matches a single port per entry.
+    """
+
+    platform = ACLRenderPlatformChoices.PLATFORM_CISCO_NXOS
+    access_groups = {4: "ip access-group", 6: "ipv6 traffic-filter"}
+    max_ports = {4: 1, 6: 1}
+    host_keyword = False
+
+
+@register_renderer
+class AristaEOSRenderer(CiscoRenderer):
+    """
+    Arista EOS.
+    """
+
+    platform = ACLRenderPlatformChoices.PLATFORM_ARISTA_EOS
+    standard_headers = {4: "ip access-list standard", 6: "ipv6 access-list standard"}
+    icmp = {4: "icmp", 6: "icmpv6"}
@@ -0,0 +1,93 @@
+"""
+Render Access Lists as Juniper Junos firewall filters, in set commands.
+"""
+
+import re
+
+from ..choices import ACLActionChoices, ACLAssignmentDirectionChoices, ACLRenderPlatformChoices, ACLRuleActionChoices
+from .base import Renderer, register_renderer
+
+__all__ = ("JuniperJunosRenderer",)
+
+FAMILIES = {4: "inet", 6: "inet6"}
+
+
+def _quote(value):
+    """
+    Quote a value containing characters the Junos CLI would otherwise interpret.
+    """
+    if re.fullmatch(r"[\w.:/-]+", value):
+        return value
+    escaped = value.replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+@register_renderer
+class JuniperJunosRenderer(Renderer):
+    """
+    Juniper Junos. Each rule is a term named after its index; remarks become comments.
+    """
+
+    platform = ACLRenderPlatformChoices.PLATFORM_JUNIPER_JUNOS
+    actions = {
+        ACLRuleActionChoices.ACTION_PERMIT: "accept",
+        ACLRuleActionChoices.ACTION_DENY: "discard",
+    }
+    default_actions = {
+        ACLActionChoices.ACTION_PERMIT: "accept",
+        ACLActionChoices.ACTION_DENY: "discard",
+        ACLActionChoices.ACTION_REJECT: "reject",
+    }
+    directions = {
+        ACLAssignmentDirectionChoices.DIRECTION_INGRESS: "input",
+        ACLAssignmentDirectionChoices.DIRECTION_EGRESS: "output",
+    }
+
+    @staticmethod
+    def ports(ports):
+        if len(ports) == 1:
+            return str(ports[0])
+        return f"[ {' '.join(map(str, ports))} ]"
+
+    def protocol(self, rule, version):
+        protocol = rule.protocol.name.lower()
+        if version == 6:
+            return "next-header", "icmp6" if protocol == "icmp" else protocol
+        return "protocol", protocol
+
+    def render_rules(self, compiled):
+        lines = []
+        for version in self.families(compiled):
+            prefix = f"set firewall family {FAMILIES[version]} filter {_quote(compiled.name)}"
+            for rule in self.family_rules(compiled, version):
+                if rule.is_remark:
+                    lines.append(f"# {rule.remark}")
+                    continue
+                term = f"{prefix} term {rule.index}"
+                if rule.source:
+                    lines.append(f"{term} from source-address {rule.source}")
+                if rule.destination:
+                    lines.append(f"{term} from destination-address {rule.destination}")
+                if rule.protocol:
+                    lines.append(f"{term} from {' '.join(self.protocol(rule, version))}")
+                if rule.source_ports:
+                    lines.append(f"{term} from source-port {self.ports(rule.source_ports)}")
+                if rule.destination_ports:
+                    lines.append(f"{term} from destination-port {self.ports(rule.destination_ports)}")
+                lines.append(f"{term} then {self.actions[rule.action]}")
+            lines.append(f"{prefix} term default then {self.default_actions[compiled.default_action]}")
+
+        return "".join(f"{line}\n" for line in lines)
+
+    def render_assignments(self, access_list, assignments, versions):
+        lines = []
+        for assignment in assignments:
+            if assignment.assigned_object is None:
+                continue
+            name, _, unit = assignment.assigned_object.name.partition(".")
+            for version in versions:
+                lines.append(
+                    f"set interfaces {_quote(name)} unit {unit or 0} family {FAMILIES[version]} "
+                    f"filter {self.directions[assignment.direction]} {_quote(access_list.name)}"
+                )
+        return lines
@@ -0,0 +1,103 @@
+"""
+Render Access Lists as Linux nftables chains.
+"""
+
+import json
+
+from ..choices import ACLActionChoices, ACLAssignmentDirectionChoices, ACLRenderPlatformChoices, ACLRuleActionChoices
+from .base import Renderer, register_renderer
+
+__all__ = ("NftablesRenderer",)
+
+TABLE = "netbox_acls"
+ADDRESS_FAMILIES = {4: "ip", 6: "ip6"}
+ICMP = {4: "icmp", 6: "ipv6-icmp"}
+
+
+def _set(values):
+    values = list(map(str, values))
+    if len(values) == 1:
+        return values[0]
+    return f"{{ {', '.join(values)} }}"
+
+
+@register_renderer
+class NftablesRenderer(Renderer):
+    """
+    Linux nftables. Each Access List is a regular chain of an inet table, ending with its
+    default action, which base chains jump to for the interfaces it is assigned to.
+    """
+
+    platform = ACLRenderPlatformChoices.PLATFORM_NFTABLES
+    actions = {
+        ACLRuleActionChoices.ACTION_PERMIT: "accept",
+        ACLRuleActionChoices.ACTION_DENY: "drop",
+    }
+    default_actions = {
+        ACLActionChoices.ACTION_PERMIT: "accept",
+        ACLActionChoices.ACTION_DENY: "drop",
+        ACLActionChoices.ACTION_REJECT: "reject",
+    }
+    # The base chains an Access List is applied from, and the interface they match on
+    hooks = {
+        ACLAssignmentDirectionChoices.DIRECTION_INGRESS: (("input", "iifname"), ("forward", "iifname")),
+        ACLAssignmentDirectionChoices.DIRECTION_EGRESS: (("output", "oifname"), ("forward", "oifname")),
+    }
+
+    def statement(self, rule):
+        """
+        Return the statement rendering a rule.
+        """
+        matches = []
+        for keyword, address_range, prefix in (
+            ("saddr", rule.source_range, rule.source),
+            ("daddr", rule.destination_range, rule.destination),
+        ):
+            if address_range is not None:
+                matches.append(f"{ADDRESS_FAMILIES[address_range.version]} {keyword} {prefix}")
+
+        protocol = rule.protocol.name.lower() if rule.protocol else None
+        if protocol == "icmp":
+            versions = {r.version for r in (rule.source_range, rule.destination_range) if r is not None} or {4, 6}
+            matches.append(f"meta l4proto {_set(ICMP[version] for version in sorted(versions))}")
+        elif protocol and not (rule.source_ports or rule.destination_ports):
+            matches.append(f"meta l4proto {protocol}")
+        # Without a protocol, ports are matched on any transport header
+        if rule.source_ports:
+            matches.append(f"{protocol or 'th'} sport {_set(rule.source_ports)}")
+        if rule.destination_ports:
+            matches.append(f"{protocol or 'th'} dport {_set(rule.destination_ports)}")
+
+        return " ".join(matches + [self.actions[rule.action], f"comment {json.dumps(f'index {rule.index}')}"])
+
+    def render_rules(self, compiled):
+        lines = [f"table inet {TABLE} {{", f"\tchain {json.dumps(compiled.name)} {{"]
+        for rule in compiled.rules:
+            if rule.is_remark:
+                lines.append(f"\t\t# {rule.remark}")
+            else:
+                lines.append(f"\t\t{self.statement(rule)}")
+        lines.extend((f"\t\t{self.default_actions[compiled.default_action]}", "\t}", "}"))
+
+        return "".join(f"{line}\n" for line in lines)
+
+    def render_assignments(self, access_list, assignments, versions):
+        chains = {}
+        for assignment in assignments:
+            if assignment.assigned_object is None:
+                continue
+            for hook, keyword in self.hooks[assignment.direction]:
+                chains.setdefault(hook, []).append(
+                    f"{keyword} {json.dumps(assignment.assigned_object.name)} jump {json.dumps(access_list.name)}"
+                )
+        if not chains:
+            return []
+
+        lines = [f"table inet {TABLE} {{"]
+        for hook, statements in chains.items():
+            lines.append(f"\tchain {hook} {{")
+            lines.append(f"\t\ttype filter hook {hook} priority filter; policy accept;")
+            lines.extend(f"\t\t{statement}" for statement in statements)
+            lines.append("\t}")
+        lines.append("}")
+        return lines
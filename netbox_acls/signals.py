@@ -0,0 +1,106 @@
+"""
+Signal handlers keeping Access Lists up to date with changes to their rules and to the prefixes
+these refer to, the cached compiled Access Lists up to date with changes to Access Lists, and the
+cached assignment counts up to date with changes to Access Lists and ACL interface assignments.
+"""
+
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from ipam.models import Prefix
+
+from .cache import delete_assigned_counts, delete_compiled
+from .models import AccessList, ACLExtendedRule, ACLInterfaceAssignment, ACLStandardRule
+
+
+def touch_access_lists(access_lists):
+    """
+    Bump the last_updated timestamp of the Access Lists of a QuerySet and delete their cached
+    compiled form, so that results cached for their previous version are no longer used.
+    """
+    versions = list(access_lists.values_list("pk", "last_updated"))
+    if versions:
+        AccessList.objects.filter(pk__in=[pk for pk, _ in versions]).update(last_updated=timezone.now())
+        delete_compiled(versions)
+
+
+@receiver((post_save, post_delete), sender=ACLStandardRule)
+@receiver((post_save, post_delete), sender=ACLExtendedRule)
+def touch_access_list(sender, instance, **kwargs):
+    """
+    Bump the Access Lists a rule belongs or belonged to.
+    """
+    # Skip rules deleted along with their Access List
+    if isinstance(kwargs.get("origin"), AccessList):
+        return
+
+    access_list_ids = {instance.access_list_id}
+    if "access_list_id" in instance.tracker:
+        access_list_ids.add(instance.tracker.get("access_list_id"))
+
+    touch_access_lists(AccessList.objects.filter(pk__in=access_list_ids))
+
+
+@receiver(post_save, sender=Prefix)
+def touch_prefix_access_lists(sender, instance, created, **kwargs):
+    """
+    Bump the Access Lists with rules referring to a prefix whose network changed. Prefixes cannot
+    be deleted while rules refer to them.
+    """
+    if created or instance.prefix == getattr(instance, "_prefix", None):
+        return
+
+    touch_access_lists(
+        AccessList.objects.filter(
+            Q(pk__in=ACLStandardRule.objects.filter(source_prefix=instance).values("access_list_id"))
+            | Q(
+                pk__in=ACLExtendedRule.objects.filter(
+                    Q(source_prefix=instance) | Q(destination_prefix=instance),
+                ).values("access_list_id"),
+            ),
+        ),
+    )
+
+
+@receiver(pre_save, sender=AccessList)
+@receiver(pre_save, sender=ACLInterfaceAssignment)
+def remember_previous_state(sender, instance, **kwargs):
+    """
+    Remember the object an existing Access List or assignment was assigned to, and its version,
+    before being saved.
+    """
+    if instance._state.adding:
+        return
+    previous = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("assigned_object_type_id", "assigned_object_id", "last_updated")
+        .first()
+    )
+    if previous is not None:
+        instance._previous_assigned_object = previous[:2]
+        instance._previous_last_updated = previous[2]
+
+
+@receiver((post_save, post_delete), sender=AccessList)
+def delete_compiled_access_list(sender, instance, **kwargs):
+    """
+    Delete the cached compiled form of the previous version of a saved Access List, or of a deleted one.
+    """
+    if "_previous_last_updated" in instance.__dict__:
+        delete_compiled([(instance.pk, instance._previous_last_updated)])
+    if kwargs["signal"] is post_delete:
+        delete_compiled([(instance.pk, instance.last_updated)])
+
+
+@receiver((post_save, post_delete), sender=AccessList)
+@receiver((post_save, post_delete), sender=ACLInterfaceAssignment)
+def delete_cached_counts(sender, instance, **kwargs):
+    """
+    Delete the cached counts of the objects an Access List or assignment is or was assigned to.
+    """
+    assigned_objects = {(instance.assigned_object_type_id, instance.assigned_object_id)}
+    if previous := getattr(instance, "_previous_assigned_object", None):
+        assigned_objects.add(previous)
+
+    delete_assigned_counts(sender, assigned_objects)
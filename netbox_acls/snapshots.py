@@ -0,0 +1,134 @@
+"""
+Write columnar snapshots of every Access List, ACL rule and interface assignment as Parquet or
+Arrow IPC files, one file per table.
+
+Ports are stored as list columns. Besides their CIDR notation, prefixes are stored as their IP
+version and the high and low 64 bits of their first and last addresses, as expected by FlowBatch
+and VectorizedAccessList. Assignments are stored with the names of their interface and host.
+
+PyArrow is an optional dependency of the plugin; it is only required by this module.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+import netaddr
+
+from .exports import get_export_columns, iter_export_rows
+from .models import AccessList, ACLExtendedRule, ACLInterfaceAssignment, ACLStandardRule
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+__all__ = (
+    "SNAPSHOT_FORMATS",
+    "SNAPSHOT_TABLES",
+    "write_snapshot",
+)
+
+# Number of rows written at once, as a record batch.
+BATCH_SIZE = 65536
+
+SNAPSHOT_FORMATS = ("parquet", "arrow")
+
+SNAPSHOT_TABLES = {
+    "access_lists": AccessList,
+    "standard_rules": ACLStandardRule,
+    "extended_rules": ACLExtendedRule,
+    "interface_assignments": ACLInterfaceAssignment,
+}
+
+PREFIX_COLUMNS = ("source_prefix", "destination_prefix")
+PREFIX_BOUNDS = ("version", "first_hi", "first_lo", "last_hi", "last_lo")
+PORT_COLUMNS = ("source_ports", "destination_ports")
+INTEGER_COLUMNS = ("id", "index")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("PyArrow must be installed to write snapshots.")
+
+
+@lru_cache(maxsize=65536)
+def _prefix_bounds(prefix):
+    """
+    Return the IP version and the high and low 64 bits of the first and last addresses of a prefix.
+    """
+    if prefix is None:
+        return None, None, None, None, None
+    network = netaddr.IPNetwork(prefix)
+    return network.version, network.first >> 64, network.first & 0xFFFFFFFFFFFFFFFF, network.last >> 64, network.last & 0xFFFFFFFFFFFFFFFF
+
+
+def _get_schema(names):
+    fields = []
+    for name in names:
+        if name in PORT_COLUMNS:
+            fields.append(pa.field(name, pa.list_(pa.int32())))
+        elif name in INTEGER_COLUMNS or name.endswith(("_id", "_count")):
+            fields.append(pa.field(name, pa.int64()))
+        else:
+            fields.append(pa.field(name, pa.string()))
+        if name in PREFIX_COLUMNS:
+            base = name.removesuffix("_prefix")
+            fields.append(pa.field(f"{base}_version", pa.int8()))
+            fields.extend(pa.field(f"{base}_{bound}", pa.uint64()) for bound in PREFIX_BOUNDS[1:])
+    return pa.schema(fields)
+
+
+def _iter_batches(schema, names, rows, batch_size):
+    """
+    Yield the rows as record batches, adding the bounds of each prefix after its CIDR notation.
+    """
+    prefix_positions = [position for position, name in enumerate(names) if name in PREFIX_COLUMNS]
+    columns = [[] for _ in schema]
+    count = 0
+    for row in rows:
+        position = 0
+        for value_position, value in enumerate(row):
+            columns[position].append(value)
+            position += 1
+            if value_position in prefix_positions:
+                for bound in _prefix_bounds(value):
+                    columns[position].append(bound)
+                    position += 1
+        count += 1
+        if count == batch_size:
+            yield pa.RecordBatch.from_arrays([pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema)
+            columns = [[] for _ in schema]
+            count = 0
+    if count:
+        yield pa.RecordBatch.from_arrays([pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema)
+
+
+def _open_writer(path, schema, snapshot_format):
+    if snapshot_format == "parquet":
+        return pq.ParquetWriter(path, schema)
+    return pa.ipc.new_file(path, schema)
+
+
+def write_snapshot(directory, snapshot_format="parquet", batch_size=BATCH_SIZE):
+    """
+    Write a file per table of SNAPSHOT_TABLES to a directory, and return the number of rows of each table.
+    Rows are streamed from the database and written one record batch at a time.
+    """
+    _require_pyarrow()
+    if snapshot_format not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Unknown snapshot format: {snapshot_format}")
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    counts = {}
+    for table, model in SNAPSHOT_TABLES.items():
+        columns = get_export_columns(model)
+        names = [column.name for column in columns]
+        schema = _get_schema(names)
+        counts[table] = 0
+        with _open_writer(directory / f"{table}.{snapshot_format}", schema, snapshot_format) as writer:
+            for batch in _iter_batches(schema, names, iter_export_rows(model.objects.all(), columns), batch_size):
+                writer.write_batch(batch)
+                counts[table] += batch.num_rows
+    return counts
@@ -49,6 +49,12 @@ class AccessListTable(NetBoxTable):
     rule_count = tables.Column(
         verbose_name="Rule Count",
     )
+    standard_rule_count = tables.Column(
+        verbose_name="Standard Rules",
+    )
+    extended_rule_count = tables.Column(
+        verbose_name="Extended Rules",
+    )
     tags = columns.TagColumn(
         url_name="plugins:netbox_acls:accesslist_list",
     )
@@ -62,6 +68,8 @@ class AccessListTable(NetBoxTable):
             "assigned_object",
             "type",
             "rule_count",
+            "standard_rule_count",
+            "extended_rule_count",
             "default_action",
             "comments",
             "action",
@@ -1,11 +1,29 @@
-from dcim.models import Device, DeviceRole, DeviceType, Manufacturer, Site
+import csv
+import io
+import json
+import time
+from unittest import skipIf
+
+from core.models import ObjectChange
+from dcim.models import Device, Interface
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
+from extras.models import Tag, TaggedItem
+from ipam.models import Prefix
 from rest_framework import status
+from users.models import ObjectPermission
 from utilities.testing import APITestCase, APIViewTestCases
+from virtualization.models import Cluster, ClusterType, VirtualMachine, VMInterface
 
+from netbox_acls.api.serializers import ACLInterfaceAssignmentSerializer
 from netbox_acls.choices import *
+from netbox_acls.engine.vectorized import np
 from netbox_acls.models import *
+from netbox_acls.tests.utils import DeviceTestMixin
 
 
 class AppTest(APITestCase):
@@ -17,6 +35,7 @@ class AppTest(APITestCase):
 
 
 class ACLTestCase(
+    DeviceTestMixin,
     APIViewTestCases.APIViewTestCase,
 ):
     """Test the AccessList Test"""
@@ -27,25 +46,8 @@ class ACLTestCase(
 
     @classmethod
     def setUpTestData(cls):
-        site = Site.objects.create(name="Site 1", slug="site-1")
-        manufacturer = Manufacturer.objects.create(
-            name="Manufacturer 1",
-            slug="manufacturer-1",
-        )
-        devicetype = DeviceType.objects.create(
-            manufacturer=manufacturer,
-            model="Device Type 1",
-        )
-        devicerole = DeviceRole.objects.create(
-            name="Device Role 1",
-            slug="device-role-1",
-        )
-        device = Device.objects.create(
-            name="Device 1",
-            site=site,
-            device_type=devicetype,
-            role=devicerole,
-        )
+        cls.create_device_objects()
+        device = cls.create_test_device()
 
         access_lists = (
             AccessList(
@@ -95,3 +97,816 @@ class ACLTestCase(
                 "default_action": ACLActionChoices.ACTION_DENY,
             },
         ]
+
+
+class ACLReplaceRulesTestCase(DeviceTestMixin, APITestCase):
+    """Test replacing the complete rule set of an Access List"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        device = cls.create_test_device()
+        cls.prefix = Prefix.objects.create(prefix="10.0.0.0/8")
+
+        cls.access_list = AccessList.objects.create(
+            name="testacl1",
+            assigned_object_type=ContentType.objects.get_for_model(Device),
+            assigned_object_id=device.id,
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        for index, action in ((10, "permit"), (20, "deny"), (30, "permit")):
+            ACLExtendedRule.objects.create(access_list=cls.access_list, index=index, action=action)
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("plugins-api:netbox_acls-api:accesslist-replace-rules", kwargs={"pk": self.access_list.pk})
+        self.rules = [
+            {"index": 10, "action": ACLRuleActionChoices.ACTION_PERMIT},
+            {
+                "index": 20,
+                "action": ACLRuleActionChoices.ACTION_PERMIT,
+                "protocol": ACLProtocolChoices.PROTOCOL_TCP,
+                "source_prefix": self.prefix.pk,
+                "destination_ports": [443],
+            },
+            {"index": 40, "action": ACLRuleActionChoices.ACTION_REMARK, "remark": "Catch-all"},
+        ]
+
+    def test_replace_rules(self):
+        self.add_permissions(
+            "netbox_acls.change_accesslist",
+            "netbox_acls.add_aclextendedrule",
+            "netbox_acls.change_aclextendedrule",
+            "netbox_acls.delete_aclextendedrule",
+            "ipam.view_prefix",
+        )
+
+        response = self.client.put(self.url, self.rules, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"created": 1, "updated": 1, "deleted": 1, "unchanged": 1})
+
+        rules = {rule.index: rule for rule in ACLExtendedRule.objects.filter(access_list=self.access_list)}
+        self.assertEqual(sorted(rules), [10, 20, 40])
+        self.assertEqual(rules[20].source_prefix, self.prefix)
+        self.assertEqual(rules[20].destination_ports, [443])
+        self.assertEqual(rules[40].remark, "Catch-all")
+        self.access_list.refresh_from_db()
+        self.assertEqual(self.access_list.extended_rule_count, 3)
+        self.assertTrue(
+            ObjectChange.objects.filter(
+                changed_object_type=ContentType.objects.get_for_model(AccessList),
+                changed_object_id=self.access_list.pk,
+            ).exists(),
+        )
+
+        # Replacing the rules with the same rule set writes nothing
+        response = self.client.put(self.url, self.rules, format="json", **self.header)
+        self.assertEqual(response.data, {"created": 0, "updated": 0, "deleted": 0, "unchanged": 3})
+
+    def count_deletion_queries(self, count):
+        ACLExtendedRule.objects.bulk_create(
+            ACLExtendedRule(access_list=self.access_list, index=index, action=ACLRuleActionChoices.ACTION_DENY)
+            for index in range(100, 100 + count)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(self.url, self.rules, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"created": 0, "updated": 0, "deleted": count, "unchanged": 3})
+        return len(queries)
+
+    def test_delete_rules_queries(self):
+        self.add_permissions(
+            "netbox_acls.change_accesslist",
+            "netbox_acls.add_aclextendedrule",
+            "netbox_acls.change_aclextendedrule",
+            "netbox_acls.delete_aclextendedrule",
+            "ipam.view_prefix",
+        )
+        rule = ACLExtendedRule.objects.get(access_list=self.access_list, index=30)
+        rule.tags.add(Tag.objects.create(name="Tag 1", slug="tag-1"))
+        self.client.put(self.url, self.rules, format="json", **self.header)
+        # The tags of deleted rules are deleted along with them
+        self.assertFalse(TaggedItem.objects.filter(object_id=rule.pk).exists())
+        changes = ObjectChange.objects.count()
+
+        # Rules are deleted in bulk, with a single change recorded on the Access List
+        self.assertEqual(self.count_deletion_queries(50), self.count_deletion_queries(2))
+        self.assertEqual(ObjectChange.objects.count(), changes + 2)
+        self.access_list.refresh_from_db()
+        self.assertEqual(self.access_list.extended_rule_count, 3)
+
+    def test_replace_rules_invalid(self):
+        self.add_permissions("netbox_acls.change_accesslist", "ipam.view_prefix")
+        self.rules[2]["index"] = 20
+
+        response = self.client.put(self.url, self.rules, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("index", response.data[2])
+
+    def test_replace_rules_without_permission(self):
+        self.add_permissions(
+            "netbox_acls.change_accesslist",
+            "netbox_acls.add_aclextendedrule",
+            "netbox_acls.change_aclextendedrule",
+            "ipam.view_prefix",
+        )
+
+        response = self.client.put(self.url, self.rules, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(ACLExtendedRule.objects.filter(access_list=self.access_list).count(), 3)
+
+
+class AssignedObjectQueryCountTestCase(DeviceTestMixin, APITestCase):
+    """Test that assigned objects are serialized with a constant number of queries per page"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        clustertype = ClusterType.objects.create(name="Cluster Type 1", slug="cluster-type-1")
+        cls.cluster = Cluster.objects.create(name="Cluster 1", type=clustertype)
+
+    def create_objects(self, count):
+        """
+        Create count Access Lists assigned to devices and virtual machines, each applied to an interface.
+        """
+        offset = AccessList.objects.count()
+        for i in range(offset, offset + count):
+            if i % 2:
+                host = self.create_test_device(f"Device {i}")
+                interface = Interface.objects.create(device=host, name="eth0", type="1000base-t")
+            else:
+                host = VirtualMachine.objects.create(name=f"VM {i}", cluster=self.cluster)
+                interface = VMInterface.objects.create(virtual_machine=host, name="eth0")
+            access_list = AccessList.objects.create(
+                name=f"testacl{i}",
+                assigned_object=host,
+                type=ACLTypeChoices.TYPE_STANDARD,
+                default_action=ACLActionChoices.ACTION_DENY,
+            )
+            ACLInterfaceAssignment.objects.create(
+                access_list=access_list,
+                assigned_object=interface,
+                direction=ACLAssignmentDirectionChoices.DIRECTION_INGRESS,
+            )
+            ACLStandardRule.objects.create(
+                access_list=access_list,
+                index=10,
+                action=ACLRuleActionChoices.ACTION_PERMIT,
+                source_prefix=Prefix.objects.create(prefix=f"10.{i}.0.0/16"),
+            )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{url}?limit=100", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        return len(queries), response.data["count"]
+
+    def count_graphql_queries(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("graphql"), data={"query": query}, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertNotIn("errors", data)
+        return len(queries), len(next(iter(data["data"].values())))
+
+    def assertConstantQueries(self, count_queries, counts=(2, 22)):
+        self.create_objects(2)
+        # Warm up the caches filled by the first request
+        count_queries()
+        queries, count = count_queries()
+        self.assertEqual(count, counts[0])
+
+        self.create_objects(20)
+        self.assertEqual(count_queries(), (queries, counts[1]))
+
+    def test_access_list_queries(self):
+        self.add_permissions("netbox_acls.view_accesslist")
+        url = reverse("plugins-api:netbox_acls-api:accesslist-list")
+        self.assertConstantQueries(lambda: self.count_queries(url))
+
+    def test_interface_assignment_queries(self):
+        self.add_permissions("netbox_acls.view_aclinterfaceassignment")
+        url = reverse("plugins-api:netbox_acls-api:aclinterfaceassignment-list")
+        self.assertConstantQueries(lambda: self.count_queries(url))
+
+    def test_graphql_access_list_queries(self):
+        self.add_permissions("netbox_acls.view_accesslist", "dcim.view_device", "virtualization.view_virtualmachine")
+        query = """
+        {
+            access_list_list {
+                name
+                assigned_object {
+                    ... on DeviceType { name }
+                    ... on VirtualMachineType { name }
+                }
+            }
+        }
+        """
+        self.assertConstantQueries(lambda: self.count_graphql_queries(query))
+
+    def test_graphql_interface_assignment_queries(self):
+        self.add_permissions(
+            "netbox_acls.view_aclinterfaceassignment",
+            "netbox_acls.view_accesslist",
+            "dcim.view_interface",
+            "virtualization.view_vminterface",
+        )
+        query = """
+        {
+            acl_interface_assignment_list {
+                direction
+                access_list { name }
+                assigned_object {
+                    ... on InterfaceType { name device { name } }
+                    ... on VMInterfaceType { name virtual_machine { name } }
+                }
+            }
+        }
+        """
+        self.assertConstantQueries(lambda: self.count_graphql_queries(query))
+
+    def test_graphql_device_acl_bundle(self):
+        self.add_permissions(
+            "dcim.view_device",
+            "netbox_acls.view_accesslist",
+            "netbox_acls.view_aclstandardrule",
+            "netbox_acls.view_aclextendedrule",
+            "netbox_acls.view_aclinterfaceassignment",
+        )
+        self.create_objects(4)
+        device_ids = list(Device.objects.order_by("pk").values_list("pk", flat=True))
+        query = f"""
+        {{
+            device_acl_bundle(device_ids: {json.dumps([str(pk) for pk in device_ids])}) {{
+                device {{ id }}
+                access_lists {{ name }}
+                standard_rules {{ index access_list {{ name }} source_prefix {{ prefix }} }}
+                interface_assignments {{ direction assigned_object {{ ... on InterfaceType {{ name }} }} }}
+            }}
+        }}
+        """
+        response = self.client.post(reverse("graphql"), data={"query": query}, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        bundles = json.loads(response.content)["data"]["device_acl_bundle"]
+
+        self.assertEqual([int(bundle["device"]["id"]) for bundle in bundles], device_ids)
+        for bundle in bundles:
+            self.assertEqual(len(bundle["access_lists"]), 1)
+            self.assertEqual(bundle["standard_rules"][0]["access_list"], bundle["access_lists"][0])
+            self.assertEqual(bundle["interface_assignments"][0]["assigned_object"]["name"], "eth0")
+
+    @override_settings(PLUGINS_CONFIG={"netbox_acls": {"graphql_max_results": 1000, "graphql_max_cost": 10000000}})
+    def test_graphql_device_acl_bundle_queries(self):
+        self.add_permissions(
+            "dcim.view_device",
+            "dcim.view_interface",
+            "dcim.view_site",
+            "extras.view_tag",
+            "ipam.view_prefix",
+            "netbox_acls.view_accesslist",
+            "netbox_acls.view_aclstandardrule",
+            "netbox_acls.view_aclinterfaceassignment",
+        )
+
+        def count_queries():
+            device_ids = [str(pk) for pk in Device.objects.values_list("pk", flat=True)]
+            query = f"""
+            {{
+                device_acl_bundle(device_ids: {json.dumps(device_ids)}) {{
+                    device {{ name site {{ name }} }}
+                    access_lists {{ name tags {{ name }} }}
+                    standard_rules {{ index source_prefix {{ prefix }} }}
+                    interface_assignments {{ direction assigned_object {{ ... on InterfaceType {{ name device {{ name }} }} }} }}
+                }}
+            }}
+            """
+            return self.count_graphql_queries(query)
+
+        # Half of the objects are assigned to devices, each with its own bundle
+        self.assertConstantQueries(count_queries, counts=(1, 11))
+
+    def test_graphql_rule_queries(self):
+        self.add_permissions(
+            "netbox_acls.view_aclstandardrule",
+            "netbox_acls.view_accesslist",
+            "ipam.view_prefix",
+            "dcim.view_device",
+            "virtualization.view_virtualmachine",
+        )
+        query = """
+        {
+            acl_standard_rule_list {
+                index
+                source_prefix { prefix }
+                access_list {
+                    name
+                    assigned_object {
+                        ... on DeviceType { name }
+                        ... on VirtualMachineType { name }
+                    }
+                }
+            }
+        }
+        """
+        self.assertConstantQueries(lambda: self.count_graphql_queries(query))
+
+
+class ACLInterfaceAssignmentBulkCreateTestCase(DeviceTestMixin, APITestCase):
+    """Test the validation of ACL interface assignments created in bulk"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        devices = [cls.create_test_device(f"Device {i}") for i in range(1, 3)]
+        cls.interfaces = [Interface.objects.create(device=devices[0], name=f"eth{i}", type="1000base-t") for i in range(10)]
+        cls.access_lists = [
+            AccessList.objects.create(
+                name=f"testacl{i}",
+                assigned_object=devices[0] if i < 3 else devices[1],
+                type=ACLTypeChoices.TYPE_STANDARD,
+                default_action=ACLActionChoices.ACTION_DENY,
+            )
+            for i in range(1, 4)
+        ]
+
+    def setUp(self):
+        super().setUp()
+        self.add_permissions("netbox_acls.add_aclinterfaceassignment")
+        self.url = reverse("plugins-api:netbox_acls-api:aclinterfaceassignment-list")
+
+    def assignment(self, interface, access_list, direction=ACLAssignmentDirectionChoices.DIRECTION_INGRESS):
+        return {
+            "access_list": access_list.pk,
+            "direction": direction,
+            "assigned_object_type": "dcim.interface",
+            "assigned_object_id": interface.pk,
+        }
+
+    def count_lookup_queries(self, data):
+        """
+        Return the number of queries looking up interfaces and Access Lists while validating data.
+        """
+        serializer = ACLInterfaceAssignmentSerializer(data=data, many=True, context={"request": None})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        return len([query for query in queries if '"dcim_interface"' in query["sql"] or '"netbox_acls_accesslist"' in query["sql"]])
+
+    def test_constant_lookup_queries(self):
+        access_list = self.access_lists[0]
+        queries = self.count_lookup_queries([self.assignment(interface, access_list) for interface in self.interfaces[:2]])
+        self.assertEqual(self.count_lookup_queries([self.assignment(interface, access_list) for interface in self.interfaces]), queries)
+
+    def test_bulk_create(self):
+        data = [self.assignment(interface, self.access_lists[0]) for interface in self.interfaces]
+        response = self.client.post(self.url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        self.assertEqual(ACLInterfaceAssignment.objects.count(), len(self.interfaces))
+
+    def test_duplicates_within_batch(self):
+        data = [
+            self.assignment(self.interfaces[0], self.access_lists[0]),
+            self.assignment(self.interfaces[0], self.access_lists[0]),
+            self.assignment(self.interfaces[0], self.access_lists[1]),
+            self.assignment(self.interfaces[0], self.access_lists[1], ACLAssignmentDirectionChoices.DIRECTION_EGRESS),
+        ]
+        response = self.client.post(self.url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("access_list", response.data[1])
+        self.assertIn("direction", response.data[2])
+        self.assertEqual(response.data[3], {})
+        self.assertFalse(ACLInterfaceAssignment.objects.exists())
+
+    def test_direction_already_assigned(self):
+        ACLInterfaceAssignment.objects.create(
+            access_list=self.access_lists[0],
+            assigned_object=self.interfaces[0],
+            direction=ACLAssignmentDirectionChoices.DIRECTION_INGRESS,
+        )
+        for data in (
+            self.assignment(self.interfaces[0], self.access_lists[1]),
+            [self.assignment(self.interfaces[1], self.access_lists[1]), self.assignment(self.interfaces[0], self.access_lists[1])],
+        ):
+            response = self.client.post(self.url, data, format="json", **self.header)
+            self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("direction", response.data[1])
+        self.assertEqual(ACLInterfaceAssignment.objects.count(), 1)
+
+    def test_access_list_of_another_host(self):
+        data = [self.assignment(self.interfaces[0], self.access_lists[2])]
+        response = self.client.post(self.url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("access_list", response.data[0])
+
+
+class ACLRuleCursorPaginationTestCase(DeviceTestMixin, APITestCase):
+    """Test paging through ACL rules with a cursor"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        device = cls.create_test_device()
+        for i in range(1, 4):
+            access_list = AccessList.objects.create(
+                name=f"testacl{i}",
+                assigned_object=device,
+                type=ACLTypeChoices.TYPE_EXTENDED,
+                default_action=ACLActionChoices.ACTION_DENY,
+            )
+            for index in (30, 10, 20):
+                ACLExtendedRule.objects.create(access_list=access_list, index=index, action=ACLRuleActionChoices.ACTION_PERMIT)
+
+    def setUp(self):
+        super().setUp()
+        self.add_permissions("netbox_acls.view_aclextendedrule")
+        self.url = reverse("plugins-api:netbox_acls-api:aclextendedrule-list")
+
+    def test_cursor_pages(self):
+        expected = list(ACLExtendedRule.objects.order_by("access_list_id", "index").values_list("pk", flat=True))
+        pks = []
+        url = f"{self.url}?cursor=&limit=4"
+        while url:
+            response = self.client.get(url, **self.header)
+            self.assertHttpStatus(response, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            pks.extend(rule["id"] for rule in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(pks, expected)
+
+    def test_cursor_with_filter(self):
+        access_list = AccessList.objects.get(name="testacl2")
+        response = self.client.get(f"{self.url}?cursor=&limit=2&access_list={access_list.pk}", **self.header)
+        self.assertEqual([rule["index"] for rule in response.data["results"]], [10, 20])
+        response = self.client.get(response.data["next"], **self.header)
+        self.assertEqual([rule["index"] for rule in response.data["results"]], [30])
+        self.assertIsNone(response.data["next"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f"{self.url}?cursor=invalid", **self.header)
+        self.assertHttpStatus(response, status.HTTP_404_NOT_FOUND)
+
+    def test_offset_pagination_by_default(self):
+        response = self.client.get(f"{self.url}?limit=4", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 9)
+
+
+class ExportTestCase(DeviceTestMixin, APITestCase):
+    """Test the streaming exports of ACL rules and interface assignments"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        device = cls.create_test_device()
+        interface = Interface.objects.create(device=device, name="eth0", type="1000base-t")
+        access_list = AccessList.objects.create(
+            name="testacl1",
+            assigned_object=device,
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        ACLExtendedRule.objects.create(
+            access_list=access_list,
+            index=20,
+            action=ACLRuleActionChoices.ACTION_PERMIT,
+            protocol=ACLProtocolChoices.PROTOCOL_TCP,
+            source_prefix=Prefix.objects.create(prefix="10.0.0.0/8"),
+            destination_ports=[80, 443],
+        )
+        ACLExtendedRule.objects.create(access_list=access_list, index=10, action=ACLRuleActionChoices.ACTION_DENY)
+        ACLInterfaceAssignment.objects.create(
+            access_list=access_list,
+            assigned_object=interface,
+            direction=ACLAssignmentDirectionChoices.DIRECTION_INGRESS,
+        )
+
+    def export(self, viewname, query=""):
+        response = self.client.get(f"{reverse(viewname)}{query}", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_rules(self):
+        self.add_permissions("netbox_acls.view_aclextendedrule")
+        lines = self.export("plugins-api:netbox_acls-api:aclextendedrule-export").splitlines()
+        rules = [json.loads(line) for line in lines]
+        self.assertEqual([rule["index"] for rule in rules], [10, 20])
+        self.assertEqual(rules[1]["source_prefix"], "10.0.0.0/8")
+        self.assertEqual(rules[1]["destination_ports"], [80, 443])
+        self.assertIsNone(rules[0]["source_prefix"])
+
+    def test_csv_rules(self):
+        self.add_permissions("netbox_acls.view_aclextendedrule")
+        content = self.export("plugins-api:netbox_acls-api:aclextendedrule-export", "?format=csv&index=20")
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["source_prefix"], "10.0.0.0/8")
+        self.assertEqual(rows[0]["destination_ports"], "80,443")
+
+    def test_interface_assignments(self):
+        self.add_permissions("netbox_acls.view_aclinterfaceassignment")
+        lines = self.export("plugins-api:netbox_acls-api:aclinterfaceassignment-export").splitlines()
+        assignment = json.loads(lines[0])
+        self.assertEqual(assignment["assigned_object_type"], "dcim.interface")
+        self.assertEqual(assignment["assigned_object"], "eth0")
+        self.assertEqual(assignment["host"], "Device 1")
+
+    def test_permission_required(self):
+        response = self.client.get(reverse("plugins-api:netbox_acls-api:aclextendedrule-export"), **self.header)
+        self.assertHttpStatus(response, status.HTTP_403_FORBIDDEN)
+
+
+class EvaluateBatchTestCase(DeviceTestMixin, APITestCase):
+    """Test the validation of the batches of flows evaluated against an Access List"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        device = cls.create_test_device()
+        cls.access_list = AccessList.objects.create(
+            name="testacl1",
+            assigned_object=device,
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        ACLExtendedRule.objects.create(
+            access_list=cls.access_list,
+            index=10,
+            action=ACLRuleActionChoices.ACTION_PERMIT,
+            protocol=ACLProtocolChoices.PROTOCOL_TCP,
+            destination_ports=[443],
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.add_permissions("netbox_acls.view_accesslist")
+        self.url = reverse("plugins-api:netbox_acls-api:accesslist-evaluate-batch", kwargs={"pk": self.access_list.pk})
+
+    @skipIf(np is None, "NumPy is not installed")
+    def test_flows(self):
+        data = {"flows": [["10.0.0.1", "10.0.0.2", "tcp", 40000, 443], ["10.0.0.1", "10.0.0.2", "tcp", 40000, 22]]}
+        response = self.client.post(self.url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data["flows"], 2)
+        self.assertEqual(response.data["default"], 1)
+
+    @skipIf(np is None, "NumPy is not installed")
+    def test_port_out_of_range(self):
+        # Ports above 65535 would match the ports of the next rule
+        data = {"flows": [["10.0.0.1", "10.0.0.2", "tcp", 40000, 65536 + 443]]}
+        response = self.client.post(self.url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+
+    @skipIf(np is None, "NumPy is not installed")
+    def test_npz_unknown_array(self):
+        npz = io.BytesIO()
+        np.savez(npz, source=np.array([0x0A000001]), port=np.array([443]))
+        npz.seek(0)
+        npz.name = "flows.npz"
+        response = self.client.post(self.url, {"file": npz}, format="multipart", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("file", response.data)
+
+
+class ConditionalGetTestCase(DeviceTestMixin, APITestCase):
+    """Test the ETag and Last-Modified validators of the Access List and ACL rule endpoints"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        device = cls.create_test_device()
+        cls.access_list = AccessList.objects.create(
+            name="testacl1",
+            assigned_object=device,
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        cls.rule = ACLExtendedRule.objects.create(
+            access_list=cls.access_list,
+            index=10,
+            action=ACLRuleActionChoices.ACTION_PERMIT,
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.add_permissions("netbox_acls.view_accesslist", "netbox_acls.view_aclextendedrule")
+
+    def get(self, url, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(url, **self.header, **headers)
+
+    def test_list_not_modified(self):
+        url = reverse("plugins-api:netbox_acls-api:aclextendedrule-list")
+        response = self.get(url)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertNotIn("Last-Modified", response)
+
+        response = self.get(url, response["ETag"])
+        self.assertHttpStatus(response, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_list_modified(self):
+        url = reverse("plugins-api:netbox_acls-api:aclextendedrule-list")
+        etag = self.get(url)["ETag"]
+
+        ACLExtendedRule.objects.create(access_list=self.access_list, index=20, action=ACLRuleActionChoices.ACTION_DENY)
+        response = self.get(url, etag)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_modified_by_deletion(self):
+        url = reverse("plugins-api:netbox_acls-api:aclextendedrule-list")
+        ACLExtendedRule.objects.create(access_list=self.access_list, index=20, action=ACLRuleActionChoices.ACTION_DENY)
+        response = self.get(url)
+        etag = response["ETag"]
+
+        # Deleting a rule other than the latest updated leaves the latest timestamp unchanged
+        self.rule.delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60), **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        self.assertHttpStatus(self.get(url, etag), status.HTTP_200_OK)
+
+    def test_detail_not_found(self):
+        url = reverse("plugins-api:netbox_acls-api:accesslist-list")
+        self.assertHttpStatus(self.get(f"{url}abc/"), status.HTTP_404_NOT_FOUND)
+
+    def test_detail_last_modified(self):
+        url = reverse("plugins-api:netbox_acls-api:accesslist-detail", kwargs={"pk": self.access_list.pk})
+        last_modified = self.get(url)["Last-Modified"]
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified, **self.header)
+        self.assertHttpStatus(response, status.HTTP_304_NOT_MODIFIED)
+
+    def test_filters_change_etag(self):
+        url = reverse("plugins-api:netbox_acls-api:aclextendedrule-list")
+        etag = self.get(url)["ETag"]
+        response = self.get(f"{url}?index=10", etag)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+
+    def test_detail_modified_by_rule(self):
+        url = reverse("plugins-api:netbox_acls-api:accesslist-detail", kwargs={"pk": self.access_list.pk})
+        etag = self.get(url)["ETag"]
+        self.assertHttpStatus(self.get(url, etag), status.HTTP_304_NOT_MODIFIED)
+
+        self.rule.action = ACLRuleActionChoices.ACTION_DENY
+        self.rule.save()
+        self.assertHttpStatus(self.get(url, etag), status.HTTP_200_OK)
+
+    def test_rule_detail_modified_by_access_list(self):
+        url = reverse("plugins-api:netbox_acls-api:aclextendedrule-detail", kwargs={"pk": self.rule.pk})
+        etag = self.get(url)["ETag"]
+
+        access_list = AccessList.objects.get(pk=self.access_list.pk)
+        access_list.name = "testacl2"
+        access_list.save()
+        response = self.get(url, etag)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data["access_list"]["name"], "testacl2")
+
+
+@override_settings(PLUGINS_CONFIG={"netbox_acls": {"graphql_max_results": 2, "graphql_max_cost": 10}})
+class GraphQLLimitTestCase(DeviceTestMixin, APITestCase):
+    """Test the size and cost limits of the GraphQL list fields"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        cls.device = cls.create_test_device()
+        access_list = AccessList.objects.create(
+            name="testacl1",
+            assigned_object=cls.device,
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        for index in (10, 20, 30):
+            ACLExtendedRule.objects.create(access_list=access_list, index=index, action=ACLRuleActionChoices.ACTION_PERMIT)
+
+    def setUp(self):
+        super().setUp()
+        self.add_permissions("dcim.view_device", "netbox_acls.view_aclextendedrule", "netbox_acls.view_accesslist")
+
+    def query(self, query):
+        response = self.client.post(reverse("graphql"), data={"query": query}, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        return json.loads(response.content)
+
+    def test_max_results(self):
+        data = self.query("{ acl_extended_rule_list { index } }")
+        self.assertEqual([rule["index"] for rule in data["data"]["acl_extended_rule_list"]], [10, 20])
+
+    def test_pagination(self):
+        data = self.query("{ acl_extended_rule_list(pagination: {offset: 2, limit: 2}) { index } }")
+        self.assertEqual([rule["index"] for rule in data["data"]["acl_extended_rule_list"]], [30])
+
+    def test_cost_limit(self):
+        data = self.query("{ acl_extended_rule_list { index action remark access_list { name type } } }")
+        self.assertIn("exceeds the limit of 10", data["errors"][0]["message"])
+
+        # Reading fewer objects at once lowers the cost of the query
+        data = self.query("{ acl_extended_rule_list(pagination: {limit: 1}) { index action remark access_list { name type } } }")
+        self.assertNotIn("errors", data)
+
+    def test_nested_list_limits(self):
+        data = self.query("{ access_list_list { name aclextendedrules { index } } }")
+        self.assertEqual([rule["index"] for rule in data["data"]["access_list_list"][0]["aclextendedrules"]], [10, 20])
+
+        data = self.query("{ access_list_list { aclextendedrules(pagination: {offset: 2}) { index } } }")
+        self.assertEqual([rule["index"] for rule in data["data"]["access_list_list"][0]["aclextendedrules"]], [30])
+
+        # The fields of each rule count once for each rule the nested list may return
+        data = self.query("{ access_list_list { name aclextendedrules { index action } } }")
+        self.assertIn("The cost of this query (12)", data["errors"][0]["message"])
+
+        data = self.query("{ access_list_list(pagination: {limit: 1}) { name aclextendedrules(pagination: {limit: 1}) { index action } } }")
+        self.assertNotIn("errors", data)
+
+    def test_device_acl_bundle_limits(self):
+        data = self.query(f'{{ device_acl_bundle(device_ids: ["{self.device.pk}", "0", "-1"]) {{ access_lists {{ name }} }} }}')
+        self.assertIn("At most 2 devices", data["errors"][0]["message"])
+
+        # The device's Access List has more rules than allowed
+        data = self.query(f'{{ device_acl_bundle(device_ids: ["{self.device.pk}"]) {{ extended_rules {{ index }} }} }}')
+        self.assertIn("more than 2 rules", data["errors"][0]["message"])
+
+        data = self.query(
+            f'{{ device_acl_bundle(device_ids: ["{self.device.pk}", "0"]) '
+            f"{{ access_lists {{ name type }} extended_rules {{ index action remark }} }} }}",
+        )
+        self.assertIn("exceeds the limit of 10", data["errors"][0]["message"])
+
+
+class HostBundleTestCase(DeviceTestMixin, APITestCase):
+    """Test the bundles of the Access Lists of a host"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        cls.device = cls.create_test_device()
+        cls.access_list = AccessList.objects.create(
+            name="testacl1",
+            assigned_object=cls.device,
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        for index in (20, 10):
+            ACLExtendedRule.objects.create(
+                access_list=cls.access_list,
+                index=index,
+                action=ACLRuleActionChoices.ACTION_PERMIT,
+                protocol=ACLProtocolChoices.PROTOCOL_TCP,
+                destination_prefix=Prefix.objects.create(prefix=f"10.{index}.0.0/16"),
+                destination_ports=[443],
+            )
+        ACLInterfaceAssignment.objects.create(
+            access_list=cls.access_list,
+            assigned_object=Interface.objects.create(device=cls.device, name="eth0", type="1000base-t"),
+            direction=ACLAssignmentDirectionChoices.DIRECTION_INGRESS,
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.add_permissions(
+            "dcim.view_device",
+            "netbox_acls.view_accesslist",
+            "netbox_acls.view_aclextendedrule",
+            "netbox_acls.view_aclinterfaceassignment",
+        )
+        self.url = reverse("plugins-api:netbox_acls-api:host-bundle", kwargs={"host_type": "dcim.device", "pk": self.device.pk})
+
+    def test_bundle(self):
+        response = self.client.get(self.url, **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data["host"], {"type": "dcim.device", "id": self.device.pk, "name": "Device 1"})
+        access_list = response.data["access_lists"][0]
+        self.assertEqual([rule["index"] for rule in access_list["rules"]], [10, 20])
+        self.assertEqual(access_list["rules"][0]["destination_prefix"], "10.10.0.0/16")
+        self.assertEqual(access_list["rules"][0]["destination_ports"], [443])
+        self.assertEqual(access_list["interface_assignments"][0]["interface"], "eth0")
+        self.assertEqual(access_list["interface_assignments"][0]["host"], "Device 1")
+
+    def test_bundle_changes(self):
+        response = self.client.get(self.url, **self.header)
+        etag = response["ETag"]
+        self.assertHttpStatus(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.header), status.HTTP_304_NOT_MODIFIED)
+
+        ACLExtendedRule.objects.create(access_list=self.access_list, index=30, action=ACLRuleActionChoices.ACTION_DENY)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual([rule["index"] for rule in response.data["access_lists"][0]["rules"]], [10, 20, 30])
+
+    def test_permissions_narrowed(self):
+        etag = self.client.get(self.url, **self.header)["ETag"]
+
+        ObjectPermission.objects.filter(object_types__model="aclextendedrule").update(constraints={"index": 10})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual([rule["index"] for rule in response.data["access_lists"][0]["rules"]], [10])
+
+    def test_unknown_host_type(self):
+        url = reverse("plugins-api:netbox_acls-api:host-bundle", kwargs={"host_type": "dcim.site", "pk": self.device.pk})
+        self.assertHttpStatus(self.client.get(url, **self.header), status.HTTP_404_NOT_FOUND)
+
+    def test_permission_required(self):
+        self.user.object_permissions.all().delete()
+        self.assertHttpStatus(self.client.get(self.url, **self.header), status.HTTP_404_NOT_FOUND)
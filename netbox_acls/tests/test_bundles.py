@@ -0,0 +1,234 @@
+import io
+import json
+import tarfile
+
+from dcim.models import Device, Interface, Site, VirtualChassis
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from ipam.models import Prefix
+
+from netbox_acls.bundles import filter_hosts, get_bundle_files, get_bundle_version, get_host_bundles, write_bundle_archive
+from netbox_acls.choices import *
+from netbox_acls.models import *
+from netbox_acls.tests.utils import DeviceTestMixin
+
+
+class HostBundleTestCase(DeviceTestMixin, TestCase):
+    """Test gathering the Access Lists of hosts, with their rules and interface assignments"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        cls.prefix = Prefix.objects.create(prefix="10.0.0.0/8")
+
+    def create_device(self, i, virtual_chassis=None):
+        """
+        Create a device with an extended and a standard Access List, the former applied to an interface.
+        """
+        device = self.create_test_device(
+            f"Device {i}",
+            virtual_chassis=virtual_chassis,
+            vc_position=i if virtual_chassis else None,
+        )
+        extended = AccessList.objects.create(
+            name=f"extended{i}",
+            assigned_object=device,
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        for index in (20, 10):
+            ACLExtendedRule.objects.create(
+                access_list=extended,
+                index=index,
+                action=ACLRuleActionChoices.ACTION_PERMIT,
+                destination_prefix=self.prefix,
+            )
+        standard = AccessList.objects.create(
+            name=f"standard{i}",
+            assigned_object=device,
+            type=ACLTypeChoices.TYPE_STANDARD,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        ACLStandardRule.objects.create(
+            access_list=standard,
+            index=10,
+            action=ACLRuleActionChoices.ACTION_PERMIT,
+            source_prefix=self.prefix,
+        )
+        ACLInterfaceAssignment.objects.create(
+            access_list=extended,
+            assigned_object=Interface.objects.create(device=device, name="eth0", type="1000base-t"),
+            direction=ACLAssignmentDirectionChoices.DIRECTION_INGRESS,
+        )
+        return device
+
+    def create_virtual_chassis(self, i):
+        """
+        Create a virtual chassis with a standard Access List, and two member devices.
+        """
+        virtual_chassis = VirtualChassis.objects.create(name=f"Virtual Chassis {i}")
+        AccessList.objects.create(
+            name=f"chassis{i}",
+            assigned_object=virtual_chassis,
+            type=ACLTypeChoices.TYPE_STANDARD,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        self.create_device(2 * i, virtual_chassis)
+        self.create_device(2 * i + 1, virtual_chassis)
+
+    def get_bundles(self):
+        """
+        Return the bundles of every device, and the number of queries run to gather and read them.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            bundles = get_host_bundles(Device.objects.order_by("pk"))
+            for bundle in bundles:
+                for rule in bundle.standard_rules + bundle.extended_rules:
+                    str(rule.access_list.assigned_object)
+                    str(rule.source_prefix)
+                for assignment in bundle.interface_assignments:
+                    str(assignment.assigned_object.device)
+        return bundles, len(queries)
+
+    def test_bundle(self):
+        device = self.create_device(1)
+        self.create_device(2)
+        bundle = self.get_bundles()[0][0]
+
+        self.assertEqual(bundle.host, device)
+        self.assertEqual([access_list.name for access_list in bundle.access_lists], ["extended1", "standard1"])
+        self.assertEqual([rule.index for rule in bundle.extended_rules], [10, 20])
+        self.assertEqual([rule.access_list.name for rule in bundle.standard_rules], ["standard1"])
+        self.assertEqual(len(bundle.interface_assignments), 1)
+        self.assertEqual(bundle.interface_assignments[0].assigned_object.device, device)
+
+    def test_virtual_chassis(self):
+        virtual_chassis = VirtualChassis.objects.create(name="Virtual Chassis 1")
+        AccessList.objects.create(
+            name="chassis",
+            assigned_object=virtual_chassis,
+            type=ACLTypeChoices.TYPE_STANDARD,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        self.create_device(1, virtual_chassis)
+        self.create_device(2, virtual_chassis)
+        for bundle in self.get_bundles()[0]:
+            self.assertIn("chassis", [access_list.name for access_list in bundle.access_lists])
+
+        bundle = get_host_bundles(VirtualChassis.objects.all())[0]
+        self.assertEqual(
+            [access_list.name for access_list in bundle.access_lists],
+            ["chassis", "extended1", "extended2", "standard1", "standard2"],
+        )
+        self.assertEqual(len(bundle.interface_assignments), 2)
+
+    def test_version(self):
+        device = self.create_device(1)
+        version = get_bundle_version(device)
+        self.assertEqual(get_bundle_version(device), version)
+
+        ACLStandardRule.objects.create(
+            access_list=AccessList.objects.get(name="standard1"),
+            index=20,
+            action=ACLRuleActionChoices.ACTION_DENY,
+        )
+        self.assertNotEqual(get_bundle_version(device), version)
+        version = get_bundle_version(device)
+
+        ACLInterfaceAssignment.objects.get().delete()
+        self.assertNotEqual(get_bundle_version(device), version)
+
+    def test_constant_queries(self):
+        self.create_device(1)
+        # Warm up the content type cache
+        self.get_bundles()
+        queries = self.get_bundles()[1]
+
+        for i in range(2, 12):
+            self.create_device(i)
+        bundles, count = self.get_bundles()
+        self.assertEqual(len(bundles), 11)
+        self.assertEqual(count, queries)
+
+    def get_bundle_files(self, model):
+        """
+        Return the files of the bundles of every host of a model, with the configuration of each platform,
+        and the number of queries run to build them.
+        """
+        host_ids = list(model.objects.values_list("pk", flat=True))
+        platforms = ACLRenderPlatformChoices.values()
+        with CaptureQueriesContext(connection) as queries:
+            files = get_bundle_files(model._meta.label_lower, host_ids, platforms)
+        return files, len(queries)
+
+    def test_bundle_files_constant_queries(self):
+        self.create_device(1)
+        self.create_virtual_chassis(1)
+        # Warm up the content type cache
+        for model in (Device, VirtualChassis):
+            self.get_bundle_files(model)
+        device_queries = self.get_bundle_files(Device)[1]
+        chassis_queries = self.get_bundle_files(VirtualChassis)[1]
+
+        # The Access Lists created since are rendered for the first time, from the rules and assignments of the bundles
+        for i in range(2, 7):
+            self.create_device(20 + i)
+            self.create_virtual_chassis(i)
+        files, count = self.get_bundle_files(Device)
+        self.assertEqual(len([name for name, _ in files if name.endswith(".json")]), 18)
+        self.assertEqual(count, device_queries)
+        files, count = self.get_bundle_files(VirtualChassis)
+        self.assertEqual(len([name for name, _ in files if name.endswith(".json")]), 6)
+        self.assertEqual(count, chassis_queries)
+
+    def test_archive(self):
+        device = self.create_device(1)
+        other_site = Site.objects.create(name="Site 2", slug="site-2")
+        self.create_test_device("Device 2", site=other_site)
+
+        archive = io.BytesIO()
+        count = write_bundle_archive(
+            archive,
+            [filter_hosts(Device, site_ids=[self.site.pk])],
+            platforms=[ACLRenderPlatformChoices.PLATFORM_CISCO_IOS],
+            workers=1,
+        )
+        self.assertEqual(count, 1)
+
+        archive.seek(0)
+        with tarfile.open(fileobj=archive, mode="r:gz") as tarball:
+            self.assertEqual(tarball.getnames(), [f"dcim.device/{device.pk}.json", f"dcim.device/{device.pk}.cisco-ios.txt"])
+            bundle = json.load(tarball.extractfile(f"dcim.device/{device.pk}.json"))
+            config = tarball.extractfile(f"dcim.device/{device.pk}.cisco-ios.txt").read().decode()
+        self.assertEqual(bundle["host"]["name"], "Device 1")
+        self.assertEqual([access_list["name"] for access_list in bundle["access_lists"]], ["extended1", "standard1"])
+        self.assertIn("extended1", config)
+        self.assertIn("standard1", config)
+
+
+class BundleArchiveWorkersTestCase(DeviceTestMixin, TransactionTestCase):
+    """Test building bundles in worker processes, which only see committed objects"""
+
+    create_device = HostBundleTestCase.create_device
+
+    def setUp(self):
+        self.create_device_objects()
+        self.prefix = Prefix.objects.create(prefix="10.0.0.0/8")
+
+    def test_workers(self):
+        devices = [self.create_device(i) for i in range(1, 4)]
+
+        archive = io.BytesIO()
+        count = write_bundle_archive(archive, [Device.objects.all()], workers=2, chunk_size=1)
+        self.assertEqual(count, 3)
+
+        archive.seek(0)
+        with tarfile.open(fileobj=archive, mode="r:gz") as tarball:
+            # Chunks are written in order, whichever worker completes first
+            self.assertEqual(tarball.getnames(), [f"dcim.device/{device.pk}.json" for device in devices])
+            bundle = json.load(tarball.extractfile(f"dcim.device/{devices[2].pk}.json"))
+        self.assertEqual([access_list["name"] for access_list in bundle["access_lists"]], ["extended3", "standard3"])
+
+        # The connections closed before forking are reopened
+        self.assertEqual(Device.objects.count(), 3)
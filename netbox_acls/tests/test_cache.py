@@ -0,0 +1,123 @@
+from dcim.models import Interface
+from django.test import TestCase
+from ipam.models import Prefix
+
+from netbox_acls.cache import get_assigned_count
+from netbox_acls.choices import *
+from netbox_acls.engine import Flow, get_compiled_access_list
+from netbox_acls.models import *
+from netbox_acls.tests.utils import DeviceTestMixin
+from netbox_acls.views import DeviceAccessListView
+
+
+class AssignedCountTestCase(DeviceTestMixin, TestCase):
+    """Test the cached counts shown as tab badges"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        cls.devices = [cls.create_test_device(f"Device {i}") for i in range(1, 3)]
+        cls.interface = Interface.objects.create(device=cls.devices[0], name="eth0", type="1000base-t")
+
+    def create_access_list(self, name):
+        return AccessList.objects.create(
+            name=name,
+            assigned_object=self.devices[0],
+            type=ACLTypeChoices.TYPE_STANDARD,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+
+    def test_cached_badge(self):
+        self.create_access_list("testacl1")
+        self.assertEqual(DeviceAccessListView.tab.render(self.devices[0])["badge"], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(DeviceAccessListView.tab.render(self.devices[0])["badge"], 1)
+
+    def test_access_list_changes(self):
+        access_list = self.create_access_list("testacl1")
+        self.assertEqual(get_assigned_count(AccessList, self.devices[0]), 1)
+        self.assertEqual(get_assigned_count(AccessList, self.devices[1]), 0)
+
+        self.create_access_list("testacl2")
+        self.assertEqual(get_assigned_count(AccessList, self.devices[0]), 2)
+
+        access_list.assigned_object = self.devices[1]
+        access_list.save()
+        self.assertEqual(get_assigned_count(AccessList, self.devices[0]), 1)
+        self.assertEqual(get_assigned_count(AccessList, self.devices[1]), 1)
+
+        access_list.delete()
+        self.assertEqual(get_assigned_count(AccessList, self.devices[1]), 0)
+
+    def test_interface_assignment_changes(self):
+        self.assertEqual(get_assigned_count(ACLInterfaceAssignment, self.interface), 0)
+        assignment = ACLInterfaceAssignment.objects.create(
+            access_list=self.create_access_list("testacl1"),
+            assigned_object=self.interface,
+            direction=ACLAssignmentDirectionChoices.DIRECTION_INGRESS,
+        )
+        self.assertEqual(get_assigned_count(ACLInterfaceAssignment, self.interface), 1)
+
+        assignment.delete()
+        self.assertEqual(get_assigned_count(ACLInterfaceAssignment, self.interface), 0)
+
+
+class CompiledAccessListTestCase(DeviceTestMixin, TestCase):
+    """Test the cached compiled form of Access Lists"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        cls.device = cls.create_test_device()
+
+    def setUp(self):
+        self.prefix = Prefix.objects.create(prefix="10.0.0.0/8")
+        self.access_list = AccessList.objects.create(
+            name="testacl1",
+            assigned_object=self.device,
+            type=ACLTypeChoices.TYPE_STANDARD,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        ACLStandardRule.objects.create(
+            access_list=self.access_list,
+            index=10,
+            action=ACLRuleActionChoices.ACTION_PERMIT,
+            source_prefix=self.prefix,
+        )
+
+    def get_compiled(self):
+        return get_compiled_access_list(AccessList.objects.get(pk=self.access_list.pk))
+
+    def test_cached(self):
+        compiled = self.get_compiled()
+        access_list = AccessList.objects.get(pk=self.access_list.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_compiled_access_list(access_list), compiled)
+
+    def test_rule_changes(self):
+        self.assertEqual(len(self.get_compiled().rules), 1)
+        rule = ACLStandardRule.objects.create(
+            access_list=self.access_list,
+            index=20,
+            action=ACLRuleActionChoices.ACTION_DENY,
+        )
+        self.assertEqual([rule.index for rule in self.get_compiled().rules], [10, 20])
+
+        rule.delete()
+        self.assertEqual([rule.index for rule in self.get_compiled().rules], [10])
+
+    def test_prefix_changes(self):
+        flow = Flow.from_values("192.0.2.1")
+        self.assertTrue(self.get_compiled().evaluate(flow).is_default)
+
+        prefix = Prefix.objects.get(pk=self.prefix.pk)
+        prefix.prefix = "192.0.2.0/24"
+        prefix.save()
+        self.assertFalse(self.get_compiled().evaluate(flow).is_default)
+
+    def test_access_list_changes(self):
+        self.get_compiled()
+        access_list = AccessList.objects.get(pk=self.access_list.pk)
+        access_list.default_action = ACLActionChoices.ACTION_PERMIT
+        access_list.save()
+        self.assertEqual(self.get_compiled().default_action, ACLActionChoices.ACTION_PERMIT)
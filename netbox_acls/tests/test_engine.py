@@ -0,0 +1,261 @@
+from unittest import mock, skipIf
+
+from django.test import SimpleTestCase
+
+from netbox_acls.choices import *
+from netbox_acls.engine import *
+from netbox_acls.engine import analysis
+from netbox_acls.engine.vectorized import np
+
+
+class CompiledAccessListTestCase(SimpleTestCase):
+    """Test first-match evaluation of compiled Access Lists"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.access_list = CompiledAccessList(
+            pk=1,
+            name="testacl1",
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+            rules=(
+                compile_rule(1, 10, ACLRuleActionChoices.ACTION_REMARK, remark="Web servers"),
+                compile_rule(
+                    2,
+                    20,
+                    ACLRuleActionChoices.ACTION_DENY,
+                    protocol=ACLProtocolChoices.PROTOCOL_TCP,
+                    source="10.0.0.66/32",
+                    destination="192.168.1.0/24",
+                ),
+                compile_rule(
+                    3,
+                    30,
+                    ACLRuleActionChoices.ACTION_PERMIT,
+                    protocol=ACLProtocolChoices.PROTOCOL_TCP,
+                    source="10.0.0.0/8",
+                    destination="192.168.1.0/24",
+                    destination_ports=[443, 80],
+                ),
+                compile_rule(4, 40, ACLRuleActionChoices.ACTION_PERMIT, protocol=ACLProtocolChoices.PROTOCOL_ICMP),
+                compile_rule(5, 50, ACLRuleActionChoices.ACTION_PERMIT, source="2001:db8::/32"),
+            ),
+        )
+
+    def evaluate(self, *args, **kwargs):
+        return self.access_list.evaluate(Flow.from_values(*args, **kwargs))
+
+    def test_first_match(self):
+        verdict = self.evaluate("10.0.0.66", "192.168.1.10", "tcp", 40000, 443)
+        self.assertEqual(verdict.action, ACLRuleActionChoices.ACTION_DENY)
+        self.assertEqual(verdict.rule.index, 20)
+
+        verdict = self.evaluate("10.1.2.3", "192.168.1.10", "tcp", 40000, 443)
+        self.assertEqual(verdict.action, ACLRuleActionChoices.ACTION_PERMIT)
+        self.assertEqual(verdict.rule.index, 30)
+
+    def test_ports(self):
+        verdict = self.evaluate("10.1.2.3", "192.168.1.10", "tcp", 40000, 22)
+        self.assertTrue(verdict.is_default)
+        self.assertEqual(verdict.action, ACLActionChoices.ACTION_DENY)
+
+    def test_protocol(self):
+        self.assertEqual(self.evaluate("172.16.0.1", "8.8.8.8", "icmp").rule.index, 40)
+        self.assertTrue(self.evaluate("10.1.2.3", "192.168.1.10", "udp", 40000, 443).is_default)
+
+    def test_ip_version(self):
+        self.assertEqual(self.evaluate("2001:db8::1", "2001:db8:1::1", "udp", 53, 53).rule.index, 50)
+        self.assertTrue(self.evaluate("2001:db9::1", "2001:db8:1::1", "udp", 53, 53).is_default)
+
+    def test_invalid_flow(self):
+        with self.assertRaises(ValueError):
+            Flow.from_values("10.0.0.1", "2001:db8::1")
+        with self.assertRaises(ValueError):
+            Flow.from_values("not-an-address")
+
+    def test_standard_rules_match_on_source(self):
+        access_list = CompiledAccessList(
+            pk=2,
+            name="testacl2",
+            type=ACLTypeChoices.TYPE_STANDARD,
+            default_action=ACLActionChoices.ACTION_PERMIT,
+            rules=(compile_rule(6, 10, ACLRuleActionChoices.ACTION_DENY, source="10.0.0.0/8"),),
+        )
+        self.assertEqual(access_list.evaluate(Flow.from_values("10.9.9.9")).action, ACLRuleActionChoices.ACTION_DENY)
+        self.assertEqual(access_list.evaluate(Flow.from_values("11.9.9.9")).action, ACLActionChoices.ACTION_PERMIT)
+
+    def test_destination_prefix_requires_destination(self):
+        access_list = CompiledAccessList(
+            pk=3,
+            name="testacl3",
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+            rules=(compile_rule(7, 10, ACLRuleActionChoices.ACTION_PERMIT, destination="0.0.0.0/0"),),
+        )
+        self.assertTrue(access_list.evaluate(Flow.from_values("10.9.9.9")).is_default)
+        self.assertEqual(access_list.evaluate(Flow.from_values("10.9.9.9", "8.8.8.8")).rule.index, 10)
+
+    def test_lowest_matching_position(self):
+        # Rules found under different prefixes and ports are matched in index order
+        rules = [
+            compile_rule(
+                i,
+                i * 10,
+                ACLRuleActionChoices.ACTION_PERMIT if i % 3 else ACLRuleActionChoices.ACTION_DENY,
+                protocol=ACLProtocolChoices.PROTOCOL_TCP if i % 2 else "",
+                source=(None, "10.0.0.0/8", f"10.{i % 4}.0.0/16", f"10.{i % 4}.{i % 8}.0/24")[i % 4],
+                source_ports=[1024] if i % 5 == 0 else None,
+                destination=(None, f"192.168.{i % 3}.0/24", f"192.168.{i % 3}.{i % 7}/32")[i % 3],
+                destination_ports=([], [443], [80, 443], [22])[i % 4],
+            )
+            for i in range(1, 200)
+        ]
+        access_list = CompiledAccessList(
+            pk=4,
+            name="testacl4",
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+            rules=tuple(rules),
+        )
+        for source in ("10.1.1.1", "10.2.2.9", "10.3.0.1", "172.16.0.1"):
+            for destination in ("192.168.0.1", "192.168.1.3", "192.168.2.5", "8.8.8.8", None):
+                for protocol in ("tcp", "udp"):
+                    for source_port, destination_port in ((1024, 443), (40000, 80), (40000, 22), (None, None)):
+                        flow = Flow.from_values(source, destination, protocol, source_port, destination_port)
+                        with self.subTest(flow=flow):
+                            expected = next((rule for rule in rules if rule.matches(flow)), None)
+                            self.assertIs(access_list.evaluate(flow).rule, expected)
+
+
+class AnalyzeAccessListTestCase(SimpleTestCase):
+    """Test the detection of ACL rules which never take effect"""
+
+    def analyze(self, *rules, default_action=ACLActionChoices.ACTION_DENY):
+        access_list = CompiledAccessList(
+            pk=1,
+            name="testacl1",
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=default_action,
+            rules=rules,
+        )
+        return {
+            finding.rule.index: (finding.kind, finding.related_rule.index if finding.related_rule else None)
+            for finding in analyze_access_list(access_list)
+        }
+
+    def test_shadowed_and_redundant(self):
+        findings = self.analyze(
+            compile_rule(1, 10, ACLRuleActionChoices.ACTION_PERMIT, protocol=ACLProtocolChoices.PROTOCOL_TCP, source="10.0.0.0/8"),
+            compile_rule(2, 20, ACLRuleActionChoices.ACTION_DENY, protocol=ACLProtocolChoices.PROTOCOL_TCP, source="10.1.0.0/16"),
+            compile_rule(
+                3,
+                30,
+                ACLRuleActionChoices.ACTION_PERMIT,
+                protocol=ACLProtocolChoices.PROTOCOL_TCP,
+                source="10.2.0.0/16",
+                destination_ports=[443],
+            ),
+            compile_rule(4, 40, ACLRuleActionChoices.ACTION_PERMIT, protocol=ACLProtocolChoices.PROTOCOL_UDP, source="10.3.0.0/16"),
+        )
+        self.assertEqual(
+            findings,
+            {
+                20: (ACLRuleFindingChoices.FINDING_SHADOWED, 10),
+                30: (ACLRuleFindingChoices.FINDING_REDUNDANT, 10),
+            },
+        )
+
+    def test_partial_overlap_is_not_shadowed(self):
+        findings = self.analyze(
+            compile_rule(1, 10, ACLRuleActionChoices.ACTION_PERMIT, source="10.1.0.0/16", destination_ports=[80]),
+            compile_rule(2, 20, ACLRuleActionChoices.ACTION_DENY, source="10.0.0.0/8", destination_ports=[80, 443]),
+            default_action=ACLActionChoices.ACTION_PERMIT,
+        )
+        self.assertEqual(findings, {})
+
+    def test_default_action(self):
+        findings = self.analyze(
+            compile_rule(1, 10, ACLRuleActionChoices.ACTION_DENY, source="10.1.0.0/16"),
+            compile_rule(2, 20, ACLRuleActionChoices.ACTION_DENY, source="10.2.0.0/16"),
+            compile_rule(3, 30, ACLRuleActionChoices.ACTION_PERMIT, source="10.0.0.0/8"),
+            compile_rule(4, 40, ACLRuleActionChoices.ACTION_DENY, source="192.168.0.0/16"),
+        )
+        self.assertEqual(findings, {40: (ACLRuleFindingChoices.FINDING_DEFAULT_ACTION, None)})
+
+    def test_default_action_shadowing(self):
+        # Removing the first rule would let the second one deny the packets it permits
+        findings = self.analyze(
+            compile_rule(1, 10, ACLRuleActionChoices.ACTION_PERMIT, source="10.0.0.0/8"),
+            compile_rule(2, 20, ACLRuleActionChoices.ACTION_DENY, source="10.0.0.0/8"),
+            default_action=ACLActionChoices.ACTION_PERMIT,
+        )
+        self.assertEqual(findings, {20: (ACLRuleFindingChoices.FINDING_SHADOWED, 10)})
+
+    def test_remarks_are_ignored(self):
+        findings = self.analyze(
+            compile_rule(1, 10, ACLRuleActionChoices.ACTION_REMARK, remark="Anything"),
+            compile_rule(2, 20, ACLRuleActionChoices.ACTION_PERMIT, source="10.0.0.0/8"),
+        )
+        self.assertEqual(findings, {})
+
+    def test_any_source_work_is_bounded(self):
+        # Rules sharing the same source and protocol are told apart by their destinations and ports
+        count = 2000
+        rules = [
+            compile_rule(
+                i,
+                i * 10,
+                ACLRuleActionChoices.ACTION_DENY if i % 2 else ACLRuleActionChoices.ACTION_PERMIT,
+                protocol=ACLProtocolChoices.PROTOCOL_TCP,
+                destination=f"10.{i // 256}.{i % 256}.1/32",
+                destination_ports=[443] if i % 4 < 2 else [80, 443],
+            )
+            for i in range(1, count + 1)
+        ]
+        with mock.patch.object(analysis._RuleIndex, "find", autospec=True, side_effect=analysis._RuleIndex.find) as find:
+            findings = self.analyze(*rules)
+
+        self.assertEqual(
+            findings,
+            {rule.index: (ACLRuleFindingChoices.FINDING_DEFAULT_ACTION, None) for rule in rules[::2]},
+        )
+        # A few branches per level and rule, rather than a number growing with the rules
+        self.assertLess(find.call_count, 10 * count)
+
+
+@skipIf(np is None, "NumPy is not installed")
+class FlowBatchTestCase(SimpleTestCase):
+    """Test the validation of batches of flows"""
+
+    def test_records_out_of_range(self):
+        for record in (
+            ("10.0.0.1", "10.0.0.2", "tcp", 1024, 65536),
+            ("10.0.0.1", "10.0.0.2", "tcp", -1, 80),
+            ("10.0.0.1", "10.0.0.2", "40000", None, None),
+        ):
+            with self.subTest(record=record):
+                with self.assertRaisesRegex(ValueError, "out of the range"):
+                    FlowBatch.from_records([record])
+
+    def test_arrays(self):
+        batch = FlowBatch.from_arrays(
+            source=np.array([0x0A000001, 0x0A000002]),
+            protocol=np.array([6, 17]),
+            destination_port=np.array([443, -1]),
+        )
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch.destination_port.tolist(), [443, 65536])
+
+    def test_arrays_out_of_range(self):
+        source = np.array([0x0A000001])
+        for arrays in (
+            {"destination_port": np.array([65536])},
+            {"protocol": np.array([40000])},
+            {"source": np.array([2**32])},
+            {"destination": np.array([1, 2])},
+            {"source_port": np.array([1.5])},
+        ):
+            with self.subTest(arrays=list(arrays)):
+                with self.assertRaises(ValueError):
+                    FlowBatch.from_arrays(**{"source": source, **arrays})
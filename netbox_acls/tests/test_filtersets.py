@@ -0,0 +1,88 @@
+from django.test import TestCase
+from ipam.models import Prefix
+
+from netbox_acls.choices import *
+from netbox_acls.filtersets import ACLExtendedRuleFilterSet
+from netbox_acls.models import *
+from netbox_acls.tests.utils import DeviceTestMixin
+
+
+class ACLExtendedRuleFilterSetTestCase(DeviceTestMixin, TestCase):
+    """Test the filters of extended ACL rules"""
+
+    queryset = ACLExtendedRule.objects.all()
+    filterset = ACLExtendedRuleFilterSet
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        device = cls.create_test_device()
+        access_list = AccessList.objects.create(
+            name="testacl1",
+            assigned_object=device,
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        prefixes = {
+            prefix: Prefix.objects.create(prefix=prefix)
+            for prefix in ("10.0.0.0/8", "10.20.0.0/16", "10.20.30.0/24", "192.0.2.0/24", "2001:db8::/32")
+        }
+        for index, source_ports, destination_ports, source_prefix, destination_prefix in (
+            (10, None, [22], "10.0.0.0/8", None),
+            (20, [1024], [80, 443], "10.20.0.0/16", "192.0.2.0/24"),
+            (30, None, [443], "10.20.30.0/24", None),
+            (40, None, None, None, "2001:db8::/32"),
+        ):
+            ACLExtendedRule.objects.create(
+                access_list=access_list,
+                index=index,
+                action=ACLRuleActionChoices.ACTION_PERMIT,
+                protocol=ACLProtocolChoices.PROTOCOL_TCP,
+                source_prefix=prefixes.get(source_prefix),
+                source_ports=source_ports,
+                destination_prefix=prefixes.get(destination_prefix),
+                destination_ports=destination_ports,
+            )
+        ACLExtendedRule.objects.create(
+            access_list=access_list,
+            index=50,
+            action=ACLRuleActionChoices.ACTION_REMARK,
+            remark="Web servers",
+        )
+
+    def filter_indexes(self, params):
+        return sorted(self.filterset(params, self.queryset).qs.values_list("index", flat=True))
+
+    def test_destination_port(self):
+        self.assertEqual(self.filter_indexes({"destination_port": [22]}), [10])
+        self.assertEqual(self.filter_indexes({"destination_port": [443]}), [20, 30])
+        self.assertEqual(self.filter_indexes({"destination_port": [22, 80]}), [10, 20])
+
+    def test_source_port(self):
+        self.assertEqual(self.filter_indexes({"source_port": [1024]}), [20])
+        self.assertEqual(self.filter_indexes({"source_port": [22]}), [])
+
+    def test_search(self):
+        self.assertEqual(self.filter_indexes({"q": "ACL1"}), [10, 20, 30, 40, 50])
+        self.assertEqual(self.filter_indexes({"q": "web"}), [])
+
+    def test_source_contains(self):
+        self.assertEqual(self.filter_indexes({"source_contains": "10.20.30.40"}), [10, 20, 30, 40, 50])
+        self.assertEqual(self.filter_indexes({"source_contains": "10.20.0.0/16"}), [10, 20, 40, 50])
+        self.assertEqual(self.filter_indexes({"source_contains": "192.0.2.1"}), [40, 50])
+
+    def test_destination_contains(self):
+        self.assertEqual(self.filter_indexes({"destination_contains": "192.0.2.1"}), [10, 20, 30, 50])
+        self.assertEqual(self.filter_indexes({"destination_contains": "2001:db8::/48"}), [10, 30, 40, 50])
+        self.assertEqual(self.filter_indexes({"destination_contains": "198.51.100.1"}), [10, 30, 50])
+
+    def test_overlaps(self):
+        self.assertEqual(self.filter_indexes({"overlaps": "10.20.0.0/16"}), [10, 20, 30, 40, 50])
+        self.assertEqual(self.filter_indexes({"overlaps": "10.20.40.0/24"}), [10, 20, 30, 40, 50])
+        self.assertEqual(self.filter_indexes({"overlaps": "192.0.2.0/25"}), [10, 20, 30, 40, 50])
+        self.assertEqual(self.filter_indexes({"overlaps": "2001:db8:1::/48"}), [10, 30, 40, 50])
+        self.assertEqual(self.filter_indexes({"overlaps": "198.51.100.0/24"}), [10, 30, 40, 50])
+
+    def test_invalid_network(self):
+        self.assertEqual(self.filter_indexes({"overlaps": "10.20.0.0/33"}), [])
+        self.assertEqual(self.filter_indexes({"source_contains": "web"}), [])
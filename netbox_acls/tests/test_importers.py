@@ -0,0 +1,208 @@
+from core.models import ObjectChange
+from dcim.models import Device, Interface
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import SimpleTestCase, TestCase
+from extras.models import CachedValue
+from ipam.models import Prefix
+
+from netbox_acls.choices import *
+from netbox_acls.importers import *
+from netbox_acls.models import *
+from netbox_acls.tests.utils import DeviceTestMixin
+
+RUNNING_CONFIG = """\
+interface GigabitEthernet0/1
+ description Uplink
+ ip access-group web in
+ ipv6 traffic-filter web6 out
+!
+ip access-list extended web
+ 10 remark Web servers
+ 20 permit tcp 10.0.0.0 0.255.255.255 host 192.168.1.10 eq www 443
+ 30 permit udp any range 5000 5003 192.168.1.0 0.0.0.255 log
+ 40 deny tcp any any gt 1023
+ permit icmp any any
+ deny ip 10.0.0.0 0.255.0.255 any
+ip access-list standard mgmt
+ permit 10.1.1.1
+ permit 10.2.0.0 0.0.255.255
+!
+ipv6 access-list web6
+ sequence 10 permit tcp 2001:db8::/32 any eq 22
+access-list 10 permit any
+access-list 10 deny host 10.9.9.9
+access-list 110 permit tcp any any established
+"""
+
+
+class ACLConfigParserTestCase(SimpleTestCase):
+    """Test the parsing of Access Lists out of running configurations"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.parser = ACLConfigParser()
+        cls.items = list(cls.parser.parse(RUNNING_CONFIG.splitlines(keepends=True)))
+        cls.access_lists = {item.name: item for item in cls.items if isinstance(item, ParsedAccessList)}
+
+    def test_assignments(self):
+        self.assertEqual(
+            [item for item in self.items if isinstance(item, ParsedAssignment)],
+            [
+                ParsedAssignment("GigabitEthernet0/1", "web", ACLAssignmentDirectionChoices.DIRECTION_INGRESS),
+                ParsedAssignment("GigabitEthernet0/1", "web6", ACLAssignmentDirectionChoices.DIRECTION_EGRESS, family=6),
+            ],
+        )
+
+    def test_extended_entries(self):
+        access_list = self.access_lists["web"]
+        self.assertEqual(access_list.type, ACLTypeChoices.TYPE_EXTENDED)
+        self.assertEqual(
+            access_list.rules,
+            [
+                ParsedRule(10, ACLRuleActionChoices.ACTION_REMARK, remark="Web servers"),
+                ParsedRule(
+                    20,
+                    ACLRuleActionChoices.ACTION_PERMIT,
+                    protocol=ACLProtocolChoices.PROTOCOL_TCP,
+                    source_prefix="10.0.0.0/8",
+                    destination_prefix="192.168.1.10/32",
+                    destination_ports=(80, 443),
+                ),
+                ParsedRule(
+                    30,
+                    ACLRuleActionChoices.ACTION_PERMIT,
+                    protocol=ACLProtocolChoices.PROTOCOL_UDP,
+                    source_ports=(5000, 5001, 5002, 5003),
+                    destination_prefix="192.168.1.0/24",
+                ),
+                # Entries without a sequence number follow the previous one
+                ParsedRule(50, ACLRuleActionChoices.ACTION_PERMIT, protocol=ACLProtocolChoices.PROTOCOL_ICMP),
+            ],
+        )
+
+    def test_standard_entries(self):
+        access_list = self.access_lists["mgmt"]
+        self.assertEqual(access_list.type, ACLTypeChoices.TYPE_STANDARD)
+        self.assertEqual([rule.source_prefix for rule in access_list.rules], ["10.1.1.1/32", "10.2.0.0/16"])
+
+    def test_ipv6_and_numbered_access_lists(self):
+        self.assertEqual(
+            self.access_lists["web6"].rules,
+            [ParsedRule(10, "permit", protocol="tcp", source_prefix="2001:db8::/32", destination_ports=(22,))],
+        )
+        self.assertEqual(self.access_lists["10"].type, ACLTypeChoices.TYPE_STANDARD)
+        self.assertEqual([rule.source_prefix for rule in self.access_lists["10"].rules], [None, "10.9.9.9/32"])
+        self.assertEqual(self.access_lists["110"].type, ACLTypeChoices.TYPE_EXTENDED)
+
+    def test_unsupported_entries(self):
+        # Port operators other than eq and range, non-contiguous wildcard masks and options
+        # changing which packets match are skipped with a warning
+        self.assertEqual(len(self.parser.warnings), 3)
+        self.assertEqual(self.access_lists["110"].rules, [])
+
+
+DUPLICATE_NAMES_CONFIG = """\
+interface GigabitEthernet0/1
+ ip access-group edge in
+ ipv6 traffic-filter edge out
+interface GigabitEthernet0/2
+ ip access-group edge in
+ ip access-group mgmt in
+!
+ip access-list extended edge
+ 10 permit tcp any any eq 22
+ 20 permit udp any any eq 53
+ipv6 access-list edge
+ 10 deny ipv6 any any
+ip access-list standard mgmt
+ 10 permit 10.1.1.1
+"""
+
+
+class ACLConfigImporterTestCase(DeviceTestMixin, TestCase):
+    """Test the import of Access Lists, rules and interface assignments from running configurations"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        cls.device = cls.create_test_device()
+        for name in ("GigabitEthernet0/1", "GigabitEthernet0/2"):
+            Interface.objects.create(device=cls.device, name=name, type="1000base-t")
+
+    def import_config(self, config, **kwargs):
+        importer = ACLConfigImporter(self.device, **kwargs)
+        return importer.import_config(config.splitlines()), importer.warnings
+
+    def test_import(self):
+        stats, warnings = self.import_config(RUNNING_CONFIG, batch_size=2)
+        self.assertEqual(stats["access_lists"], 5)
+        self.assertEqual(stats["rules"], 9)
+        self.assertEqual(stats["assignments"], 2)
+        self.assertEqual(AccessList.objects.get(name="web").extended_rule_count, 4)
+        self.assertEqual(
+            set(ACLInterfaceAssignment.objects.values_list("access_list__name", "direction")),
+            {("web", ACLAssignmentDirectionChoices.DIRECTION_INGRESS), ("web6", ACLAssignmentDirectionChoices.DIRECTION_EGRESS)},
+        )
+
+        # Existing Access Lists and assignments are skipped
+        stats, warnings = self.import_config(RUNNING_CONFIG)
+        self.assertEqual((stats.get("access_lists", 0), stats["access_lists_skipped"], stats["assignments"]), (0, 5, 0))
+
+    def test_duplicate_names(self):
+        for batch_size in (1, 1000):
+            with self.subTest(batch_size=batch_size):
+                stats, warnings = self.import_config(DUPLICATE_NAMES_CONFIG, batch_size=batch_size)
+                access_list = AccessList.objects.get(name="edge")
+                self.assertEqual(stats["access_lists"], 2)
+                self.assertEqual([rule.index for rule in access_list.aclextendedrules.all()], [10, 20])
+                self.assertIn("Skipped IPv6 Access List edge: an IPv4 Access List of the same name was already read", warnings)
+
+                # The IPv6 assignment, and the second assignment in the same direction, are skipped
+                self.assertEqual(stats["assignments"], 2)
+                self.assertEqual(
+                    set(ACLInterfaceAssignment.objects.values_list("assigned_object_id", "access_list__name", "direction")),
+                    {
+                        (interface.pk, "edge", ACLAssignmentDirectionChoices.DIRECTION_INGRESS)
+                        for interface in Interface.objects.filter(device=self.device)
+                    },
+                )
+                self.assertEqual(len(warnings), 3)
+                AccessList.objects.all().delete()
+
+    def test_replace(self):
+        self.import_config(DUPLICATE_NAMES_CONFIG)
+        ACLExtendedRule.objects.filter(index=20).delete()
+
+        stats, warnings = self.import_config(DUPLICATE_NAMES_CONFIG, replace=True)
+        self.assertEqual(stats["access_lists_replaced"], 2)
+        # The rules of the IPv4 Access List are not replaced by those of the IPv6 one of the same name
+        access_list = AccessList.objects.get(name="edge")
+        self.assertEqual(
+            list(access_list.aclextendedrules.values_list("index", "destination_ports")),
+            [(10, [22]), (20, [53])],
+        )
+
+    def test_created_prefixes(self):
+        Prefix.objects.create(prefix="10.0.0.0/8")
+        user = get_user_model().objects.create_user(username="importer")
+
+        stats, warnings = self.import_config(RUNNING_CONFIG, user=user)
+        prefixes = {str(prefix.prefix): prefix for prefix in Prefix.objects.all()}
+        self.assertEqual(stats["prefixes"], len(prefixes) - 1)
+        # The hierarchy and the search cache of the prefixes created in bulk are updated
+        self.assertEqual(prefixes["10.0.0.0/8"]._children, 3)
+        self.assertEqual(prefixes["10.2.0.0/16"]._depth, 1)
+        self.assertTrue(
+            CachedValue.objects.filter(
+                object_type=ContentType.objects.get_for_model(Prefix),
+                object_id=prefixes["10.2.0.0/16"].pk,
+            ).exists(),
+        )
+
+        # A single change summarizes the import
+        change = ObjectChange.objects.get(user=user)
+        self.assertEqual((change.changed_object_type.model_class(), change.changed_object_id), (Device, self.device.pk))
+        self.assertEqual(change.postchange_data["access_list_import"]["access_lists"], 5)
+        self.assertEqual(sorted(change.postchange_data["created_prefixes"]), sorted(set(prefixes) - {"10.0.0.0/8"}))
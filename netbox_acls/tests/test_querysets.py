@@ -0,0 +1,118 @@
+from io import StringIO
+
+from dcim.models import Device
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test import TestCase
+
+from netbox_acls.choices import *
+from netbox_acls.models import *
+from netbox_acls.tests.utils import DeviceTestMixin
+
+
+class AccessListQuerySetTestCase(DeviceTestMixin, TestCase):
+    """Test the cached rule counters of AccessList"""
+
+    acl_count = 20
+    rules_per_acl = 500
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        device = cls.create_test_device()
+        device_type = ContentType.objects.get_for_model(Device)
+
+        access_lists = AccessList.objects.bulk_create(
+            AccessList(
+                name=f"testacl{i}",
+                assigned_object_type=device_type,
+                assigned_object_id=device.id,
+                type=ACLTypeChoices.TYPE_EXTENDED if i % 2 else ACLTypeChoices.TYPE_STANDARD,
+                default_action=ACLActionChoices.ACTION_DENY,
+            )
+            for i in range(cls.acl_count)
+        )
+        for access_list in access_lists:
+            rule_model = ACLExtendedRule if access_list.type == ACLTypeChoices.TYPE_EXTENDED else ACLStandardRule
+            rule_model.objects.bulk_create(
+                rule_model(
+                    access_list=access_list,
+                    index=index,
+                    action=ACLRuleActionChoices.ACTION_PERMIT,
+                )
+                for index in range(cls.rules_per_acl)
+            )
+
+        # An Access List carrying rules of both types would have its rule
+        # count multiplied by a join over both rule tables.
+        cls.mixed_acl = AccessList.objects.create(
+            name="testaclmixed",
+            assigned_object_type=device_type,
+            assigned_object_id=device.id,
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        ACLStandardRule.objects.bulk_create(
+            ACLStandardRule(access_list=cls.mixed_acl, index=index, action=ACLRuleActionChoices.ACTION_PERMIT) for index in range(30)
+        )
+        ACLExtendedRule.objects.bulk_create(
+            ACLExtendedRule(access_list=cls.mixed_acl, index=index, action=ACLRuleActionChoices.ACTION_PERMIT) for index in range(40)
+        )
+
+        # bulk_create() bypasses the counter signal handlers
+        AccessList.objects.update_rule_counts()
+        cls.mixed_acl.refresh_from_db()
+
+    def test_rule_counts(self):
+        access_lists = AccessList.objects.annotate_rule_counts().exclude(pk=self.mixed_acl.pk)
+        for access_list in access_lists:
+            self.assertEqual(access_list.rule_count, self.rules_per_acl)
+            if access_list.type == ACLTypeChoices.TYPE_EXTENDED:
+                self.assertEqual(access_list.extended_rule_count, self.rules_per_acl)
+                self.assertEqual(access_list.standard_rule_count, 0)
+            else:
+                self.assertEqual(access_list.standard_rule_count, self.rules_per_acl)
+                self.assertEqual(access_list.extended_rule_count, 0)
+
+    def test_rule_counts_with_both_rule_types(self):
+        access_list = AccessList.objects.annotate_rule_counts().get(pk=self.mixed_acl.pk)
+        self.assertEqual(access_list.standard_rule_count, 30)
+        self.assertEqual(access_list.extended_rule_count, 40)
+        self.assertEqual(access_list.rule_count, 70)
+
+    def test_rule_counts_query_count(self):
+        with self.assertNumQueries(1):
+            access_lists = list(AccessList.objects.annotate_rule_counts())
+        self.assertEqual(len(access_lists), self.acl_count + 1)
+
+    def test_rule_counts_ordering_and_filtering(self):
+        queryset = AccessList.objects.annotate_rule_counts()
+        self.assertEqual(queryset.order_by("-rule_count").first(), self.mixed_acl)
+        self.assertEqual(queryset.filter(rule_count__lt=self.rules_per_acl).count(), 1)
+
+    def test_rule_counts_update_queries(self):
+        # Every counter is recalculated by a single UPDATE, however many Access Lists and rules there are
+        AccessList.objects.update(standard_rule_count=0, extended_rule_count=0)
+        with self.assertNumQueries(1):
+            AccessList.objects.update_rule_counts()
+        self.assertEqual(AccessList.objects.annotate_rule_counts().get(pk=self.mixed_acl.pk).rule_count, 70)
+
+    def test_rule_counts_follow_rule_changes(self):
+        rule = ACLStandardRule.objects.create(
+            access_list=self.mixed_acl,
+            index=100,
+            action=ACLRuleActionChoices.ACTION_DENY,
+        )
+        self.mixed_acl.refresh_from_db()
+        self.assertEqual(self.mixed_acl.standard_rule_count, 31)
+
+        rule.delete()
+        self.mixed_acl.refresh_from_db()
+        self.assertEqual(self.mixed_acl.standard_rule_count, 30)
+
+    def test_rebuild_rule_counts_command(self):
+        AccessList.objects.update(standard_rule_count=0, extended_rule_count=0)
+        call_command("rebuild_acl_rule_counts", stdout=StringIO())
+        self.mixed_acl.refresh_from_db()
+        self.assertEqual(self.mixed_acl.standard_rule_count, 30)
+        self.assertEqual(self.mixed_acl.extended_rule_count, 40)
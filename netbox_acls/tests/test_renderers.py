@@ -0,0 +1,90 @@
+from django.test import SimpleTestCase
+
+from netbox_acls.choices import *
+from netbox_acls.engine import *
+from netbox_acls.renderers import *
+
+
+class RendererTestCase(SimpleTestCase):
+    """Test the rendering of compiled Access Lists into platform configuration"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.access_list = CompiledAccessList(
+            pk=1,
+            name="testacl1",
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+            rules=(
+                compile_rule(1, 10, ACLRuleActionChoices.ACTION_REMARK, remark="Web servers"),
+                compile_rule(
+                    2,
+                    20,
+                    ACLRuleActionChoices.ACTION_PERMIT,
+                    protocol=ACLProtocolChoices.PROTOCOL_TCP,
+                    source="10.0.0.0/8",
+                    destination="192.168.1.10/32",
+                    destination_ports=[443, 80],
+                ),
+                compile_rule(3, 30, ACLRuleActionChoices.ACTION_PERMIT, source="2001:db8::/32"),
+            ),
+        )
+
+    def render(self, platform):
+        return get_renderer(platform).render_rules(self.access_list).splitlines()
+
+    def test_cisco_ios(self):
+        self.assertEqual(
+            self.render(ACLRenderPlatformChoices.PLATFORM_CISCO_IOS),
+            [
+                "ip access-list extended testacl1",
+                " 10 remark Web servers",
+                " 20 permit tcp 10.0.0.0 0.255.255.255 host 192.168.1.10 eq 80 443",
+                " deny ip any any",
+                "ipv6 access-list testacl1",
+                " sequence 10 remark Web servers",
+                " sequence 30 permit ipv6 2001:db8::/32 any",
+                " deny ipv6 any any",
+            ],
+        )
+
+    def test_cisco_nxos_expands_ports(self):
+        lines = self.render(ACLRenderPlatformChoices.PLATFORM_CISCO_NXOS)
+        self.assertIn(" permit tcp 10.0.0.0/8 192.168.1.10/32 eq 80", lines)
+        self.assertIn(" permit tcp 10.0.0.0/8 192.168.1.10/32 eq 443", lines)
+        # Entries are left unnumbered once a rule spans several of them
+        self.assertIn(" remark Web servers", lines)
+
+    def test_juniper_junos(self):
+        lines = self.render(ACLRenderPlatformChoices.PLATFORM_JUNIPER_JUNOS)
+        self.assertIn("set firewall family inet filter testacl1 term 20 from destination-port [ 80 443 ]", lines)
+        self.assertIn("set firewall family inet6 filter testacl1 term 30 then accept", lines)
+        self.assertEqual(lines[-1], "set firewall family inet6 filter testacl1 term default then discard")
+
+    def test_nftables(self):
+        lines = self.render(ACLRenderPlatformChoices.PLATFORM_NFTABLES)
+        self.assertIn(
+            '\t\tip saddr 10.0.0.0/8 ip daddr 192.168.1.10/32 tcp dport { 80, 443 } accept comment "index 20"',
+            lines,
+        )
+        self.assertIn('\t\tip6 saddr 2001:db8::/32 accept comment "index 30"', lines)
+        self.assertEqual(lines[-3], "\t\tdrop")
+
+    def test_cisco_ports_without_protocol(self):
+        access_list = CompiledAccessList(
+            pk=1,
+            name="testacl1",
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+            rules=(compile_rule(1, 10, ACLRuleActionChoices.ACTION_PERMIT, destination="192.168.1.10/32", destination_ports=[53]),),
+        )
+        lines = get_renderer(ACLRenderPlatformChoices.PLATFORM_CISCO_IOS).render_rules(access_list).splitlines()
+        self.assertEqual(
+            lines[1:3],
+            [" permit tcp any host 192.168.1.10 eq 53", " permit udp any host 192.168.1.10 eq 53"],
+        )
+
+    def test_unknown_platform(self):
+        with self.assertRaises(ValueError):
+            get_renderer("unknown")
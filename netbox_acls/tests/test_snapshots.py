@@ -0,0 +1,66 @@
+import tempfile
+from pathlib import Path
+from unittest import skipIf
+
+from dcim.models import Interface
+from django.test import TestCase
+from ipam.models import Prefix
+
+from netbox_acls.choices import *
+from netbox_acls.models import *
+from netbox_acls.snapshots import pa, pq, write_snapshot
+from netbox_acls.tests.utils import DeviceTestMixin
+
+
+@skipIf(pa is None, "PyArrow is not installed")
+class WriteSnapshotTestCase(DeviceTestMixin, TestCase):
+    """Test columnar snapshots of the Access Lists, rules and assignments"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        device = cls.create_test_device()
+        access_list = AccessList.objects.create(
+            name="testacl1",
+            assigned_object=device,
+            type=ACLTypeChoices.TYPE_EXTENDED,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        ACLExtendedRule.objects.create(
+            access_list=access_list,
+            index=10,
+            action=ACLRuleActionChoices.ACTION_PERMIT,
+            protocol=ACLProtocolChoices.PROTOCOL_TCP,
+            destination_prefix=Prefix.objects.create(prefix="2001:db8::/32"),
+            destination_ports=[80, 443],
+        )
+        ACLInterfaceAssignment.objects.create(
+            access_list=access_list,
+            assigned_object=Interface.objects.create(device=device, name="eth0", type="1000base-t"),
+            direction=ACLAssignmentDirectionChoices.DIRECTION_INGRESS,
+        )
+
+    def test_parquet_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            rows = write_snapshot(directory)
+            self.assertEqual(
+                rows,
+                {"access_lists": 1, "standard_rules": 0, "extended_rules": 1, "interface_assignments": 1},
+            )
+            rule = pq.read_table(Path(directory) / "extended_rules.parquet").to_pylist()[0]
+            assignment = pq.read_table(Path(directory) / "interface_assignments.parquet").to_pylist()[0]
+
+        self.assertEqual(rule["destination_ports"], [80, 443])
+        self.assertEqual(rule["destination_prefix"], "2001:db8::/32")
+        self.assertEqual(rule["destination_version"], 6)
+        self.assertEqual((rule["destination_first_hi"], rule["destination_first_lo"]), (0x20010DB800000000, 0))
+        self.assertEqual((rule["destination_last_hi"], rule["destination_last_lo"]), (0x20010DB8FFFFFFFF, 2**64 - 1))
+        self.assertIsNone(rule["source_version"])
+        self.assertEqual((assignment["host"], assignment["assigned_object"]), ("Device 1", "eth0"))
+
+    def test_arrow_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            write_snapshot(directory, "arrow")
+            access_lists = pa.ipc.open_file(Path(directory) / "access_lists.arrow").read_all().to_pylist()
+        self.assertEqual(access_lists[0]["name"], "testacl1")
+        self.assertEqual(access_lists[0]["host"], "Device 1")
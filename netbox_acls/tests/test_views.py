@@ -0,0 +1,50 @@
+from django.urls import reverse
+from utilities.testing import TestCase
+
+from netbox_acls.choices import *
+from netbox_acls.models import *
+from netbox_acls.tests.utils import DeviceTestMixin
+
+
+class ACLRuleListViewTestCase(DeviceTestMixin, TestCase):
+    """Test the list of rules embedded in the view of an Access List"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_device_objects()
+        cls.access_list = AccessList.objects.create(
+            name="testacl1",
+            assigned_object=cls.create_test_device(),
+            type=ACLTypeChoices.TYPE_STANDARD,
+            default_action=ACLActionChoices.ACTION_DENY,
+        )
+        ACLStandardRule.objects.bulk_create(
+            ACLStandardRule(
+                access_list=cls.access_list,
+                index=i * 10,
+                action=ACLRuleActionChoices.ACTION_PERMIT,
+            )
+            for i in range(1, 101)
+        )
+
+    def get_page(self, **params):
+        self.add_permissions("netbox_acls.view_aclstandardrule")
+        params = {"embedded": "True", "access_list": self.access_list.pk, "per_page": 25, **params}
+        response = self.client.get(reverse("plugins:netbox_acls:aclstandardrule_list"), params)
+        self.assertHttpStatus(response, 200)
+        return response.context["table"].page
+
+    def test_jump_to_index(self):
+        page = self.get_page(jump_to_index=505)
+        self.assertEqual(page.number, 3)
+        self.assertEqual([rule.index for rule in page.object_list], [i * 10 for i in range(51, 76)])
+
+    def test_jump_to_first_index(self):
+        self.assertEqual(self.get_page(jump_to_index=10).number, 1)
+        self.assertEqual(self.get_page(jump_to_index=0).number, 1)
+
+    def test_jump_past_last_index(self):
+        self.assertEqual(self.get_page(jump_to_index=5000).number, 4)
+
+    def test_invalid_index(self):
+        self.assertEqual(self.get_page(jump_to_index="x").number, 1)
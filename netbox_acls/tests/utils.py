@@ -0,0 +1,35 @@
+from dcim.models import Device, DeviceRole, DeviceType, Manufacturer, Site
+
+__all__ = ("DeviceTestMixin",)
+
+
+class DeviceTestMixin:
+    """
+    Creates the site, device type and role shared by the devices of a test case.
+    """
+
+    @classmethod
+    def create_device_objects(cls):
+        cls.site = Site.objects.create(name="Site 1", slug="site-1")
+        manufacturer = Manufacturer.objects.create(
+            name="Manufacturer 1",
+            slug="manufacturer-1",
+        )
+        cls.devicetype = DeviceType.objects.create(
+            manufacturer=manufacturer,
+            model="Device Type 1",
+        )
+        cls.devicerole = DeviceRole.objects.create(
+            name="Device Role 1",
+            slug="device-role-1",
+        )
+
+    @classmethod
+    def create_test_device(cls, name="Device 1", **kwargs):
+        return Device.objects.create(
+            name=name,
+            site=cls.site,
+            device_type=cls.devicetype,
+            role=cls.devicerole,
+            **kwargs,
+        )
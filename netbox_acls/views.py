@@ -4,15 +4,18 @@ Specifically, all the various interactions with a client.
 """
 
 from dcim.models import Device, Interface, VirtualChassis
-from django.db.models import Count
 from netbox.views import generic
+from utilities.paginator import get_paginate_count
 from utilities.views import ViewTab, register_model_view
 from virtualization.models import VirtualMachine, VMInterface
 
 from . import choices, filtersets, forms, models, tables
+from .cache import get_assigned_count
+from .engine import get_access_list_findings
 
 __all__ = (
     "AccessListView",
+    "AccessListAnalysisView",
     "AccessListListView",
     "AccessListEditView",
     "AccessListDeleteView",
@@ -50,25 +53,58 @@ class AccessListView(generic.ObjectView):
 
     def get_extra_context(self, request, instance):
         """
-        Depending on the Access List type, the list view will return
-        the required ACL Rule using the previous defined tables in tables.py.
+        Depending on the Access List type, return the list view of the ACL Rules, from which the
+        rules table is loaded one page at a time.
+
+        The table is not built from the compiled Access List cache: its rows link to, and show
+        the tags and custom fields of, the rule objects, which compiled rules do not hold. Only
+        the page shown is read from the rule tables.
         """
 
         if instance.type == choices.ACLTypeChoices.TYPE_EXTENDED:
-            table = tables.ACLExtendedRuleTable(instance.aclextendedrules.all())
-        elif instance.type == choices.ACLTypeChoices.TYPE_STANDARD:
-            table = tables.ACLStandardRuleTable(instance.aclstandardrules.all())
-        else:
-            table = None
+            return {"rules_viewname": "plugins:netbox_acls:aclextendedrule_list"}
+        if instance.type == choices.ACLTypeChoices.TYPE_STANDARD:
+            return {"rules_viewname": "plugins:netbox_acls:aclstandardrule_list"}
+        return {}
 
-        if table:
-            table.columns.hide("access_list")
-            table.configure(request)
 
-            return {
-                "rules_table": table,
-            }
-        return {}
+@register_model_view(models.AccessList, "analysis")
+class AccessListAnalysisView(generic.ObjectView):
+    """
+    Defines the view of the rules of an Access List which never take effect.
+    """
+
+    queryset = models.AccessList.objects.all()
+    template_name = "netbox_acls/accesslist_analysis.html"
+    tab = ViewTab(
+        label="Analysis",
+        permission="netbox_acls.view_accesslist",
+        weight=600,
+    )
+
+    def get_extra_context(self, request, instance):
+        if instance.type == choices.ACLTypeChoices.TYPE_EXTENDED:
+            rule_model = models.ACLExtendedRule
+        else:
+            rule_model = models.ACLStandardRule
+        findings = get_access_list_findings(instance)
+        labels = dict(choices.ACLRuleFindingChoices())
+        rules = rule_model.objects.in_bulk(
+            {finding.rule.pk for finding in findings} | {finding.related_rule.pk for finding in findings if finding.related_rule},
+        )
+
+        return {
+            "findings": [
+                {
+                    "rule": rules.get(finding.rule.pk),
+                    "kind": finding.kind,
+                    "kind_display": labels.get(finding.kind),
+                    "kind_color": choices.ACLRuleFindingChoices.colors.get(finding.kind),
+                    "related_rule": rules.get(finding.related_rule.pk) if finding.related_rule else None,
+                }
+                for finding in findings
+            ],
+        }
 
 
 class AccessListListView(generic.ObjectListView):
@@ -76,9 +112,7 @@ class AccessListListView(generic.ObjectListView):
     Defines the list view for the AccessLists django model.
     """
 
-    queryset = models.AccessList.objects.annotate(
-        rule_count=Count("aclextendedrules") + Count("aclstandardrules"),
-    ).prefetch_related("tags")
+    queryset = models.AccessList.objects.annotate_rule_counts().prefetch_related("tags")
     table = tables.AccessListTable
     filterset = filtersets.AccessListFilterSet
     filterset_form = forms.AccessListFilterForm
@@ -128,9 +162,7 @@ class AccessListChildView(generic.ObjectChildrenView):
         }
 
     def prep_table_data(self, request, queryset, parent):
-        return queryset.annotate(
-            rule_count=Count("aclextendedrules") + Count("aclstandardrules"),
-        )
+        return queryset.annotate_rule_counts()
 
 
 @register_model_view(Device, "access_lists")
@@ -138,7 +170,7 @@ class DeviceAccessListView(AccessListChildView):
     queryset = Device.objects.prefetch_related("tags")
     tab = ViewTab(
         label="Access Lists",
-        badge=lambda obj: models.AccessList.objects.filter(device=obj).count(),
+        badge=lambda obj: get_assigned_count(models.AccessList, obj),
         permission="netbox_acls.view_accesslist",
     )
 
@@ -153,7 +185,7 @@ class VirtualChassisAccessListView(AccessListChildView):
     queryset = VirtualChassis.objects.prefetch_related("tags")
     tab = ViewTab(
         label="Access Lists",
-        badge=lambda obj: models.AccessList.objects.filter(virtual_chassis=obj).count(),
+        badge=lambda obj: get_assigned_count(models.AccessList, obj),
         permission="netbox_acls.view_accesslist",
     )
 
@@ -168,7 +200,7 @@ class VirtualMachineAccessListView(AccessListChildView):
     queryset = VirtualMachine.objects.prefetch_related("tags")
     tab = ViewTab(
         label="Access Lists",
-        badge=lambda obj: models.AccessList.objects.filter(virtual_machine=obj).count(),
+        badge=lambda obj: get_assigned_count(models.AccessList, obj),
         permission="netbox_acls.view_accesslist",
     )
 
@@ -277,9 +309,7 @@ class InterfaceACLInterfaceAssignmentView(ACLInterfaceAssignmentChildView):
     queryset = Interface.objects.prefetch_related("device", "tags")
     tab = ViewTab(
         label="ACL Interface Assignments",
-        badge=lambda obj: models.ACLInterfaceAssignment.objects.filter(
-            interface=obj,
-        ).count(),
+        badge=lambda obj: get_assigned_count(models.ACLInterfaceAssignment, obj),
         permission="netbox_acls.view_aclinterfaceassignment",
     )
 
@@ -296,9 +326,7 @@ class VirtualMachineInterfaceACLInterfaceAssignmentView(
     queryset = VMInterface.objects.prefetch_related("virtual_machine", "tags")
     tab = ViewTab(
         label="ACL Interface Assignments",
-        badge=lambda obj: models.ACLInterfaceAssignment.objects.filter(
-            vminterface=obj,
-        ).count(),
+        badge=lambda obj: get_assigned_count(models.ACLInterfaceAssignment, obj),
         permission="netbox_acls.view_aclinterfaceassignment",
     )
 
@@ -308,6 +336,35 @@ class VirtualMachineInterfaceACLInterfaceAssignmentView(
         )
 
 
+#
+# ACLRule views
+#
+
+
+class ACLRuleListView(generic.ObjectListView):
+    """
+    Defines the list view shared by the ACL Rule django models.
+    """
+
+    def get_table(self, data, request, bulk_actions=True):
+        """
+        Hide the Access List column when embedded in the view of an Access List, and turn to the page
+        holding the index given by jump_to_index, so that the rules around it are shown as well.
+        """
+        if "jump_to_index" in request.GET:
+            # Set the page read when the table is configured to the one holding the index
+            request.GET = request.GET.copy()
+            index = request.GET.pop("jump_to_index")[-1]
+            if index.isdigit():
+                position = data.filter(index__lt=int(index)).count()
+                request.GET["page"] = str(position // get_paginate_count(request) + 1)
+
+        table = super().get_table(data, request, bulk_actions)
+        if request.GET.get("embedded"):
+            table.columns.hide("access_list")
+        return table
+
+
 #
 # ACLStandardRule views
 #
@@ -326,15 +383,16 @@ class ACLStandardRuleView(generic.ObjectView):
     )
 
 
-class ACLStandardRuleListView(generic.ObjectListView):
+class ACLStandardRuleListView(ACLRuleListView):
     """
     Defines the list view for the ACLStandardRule django model.
     """
 
-    queryset = models.ACLStandardRule.objects.prefetch_related(
+    queryset = models.ACLStandardRule.objects.select_related(
         "access_list",
-        "tags",
         "source_prefix",
+    ).prefetch_related(
+        "tags",
     )
     table = tables.ACLStandardRuleTable
     filterset = filtersets.ACLStandardRuleFilterSet
@@ -406,16 +464,17 @@ class ACLExtendedRuleView(generic.ObjectView):
     )
 
 
-class ACLExtendedRuleListView(generic.ObjectListView):
+class ACLExtendedRuleListView(ACLRuleListView):
     """
     Defines the list view for the ACLExtendedRule django model.
     """
 
-    queryset = models.ACLExtendedRule.objects.prefetch_related(
+    queryset = models.ACLExtendedRule.objects.select_related(
         "access_list",
-        "tags",
         "source_prefix",
         "destination_prefix",
+    ).prefetch_related(
+        "tags",
     )
     table = tables.ACLExtendedRuleTable
     filterset = filtersets.ACLExtendedRuleFilterSet